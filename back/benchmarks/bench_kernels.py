@@ -0,0 +1,314 @@
+"""
+Micro-benchmarks de los kernels numéricos de cada servicio.
+
+Llama directamente a las funciones de cálculo (sin HTTP) sobre un corpus
+representativo de funciones y tamaños de matriz, y reporta evaluaciones por
+segundo, iteraciones y pico de memoria. Los resultados se comparan contra un
+baseline JSON para detectar regresiones de tiempo o cambios en los resultados.
+
+Uso:
+    python bench_kernels.py                       # ejecutar y comparar con baseline.json
+    python bench_kernels.py --filter newton       # solo los casos que contienen "newton"
+    python bench_kernels.py --update-baseline     # guardar los resultados como nuevo baseline
+"""
+import argparse
+import importlib.util
+import json
+import math
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+METHODS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'methods')
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+_services = {}
+
+def load_service(name):
+    """Importa methods/<name>/service.py como módulo independiente."""
+    if name not in _services:
+        path = os.path.join(METHODS_DIR, name, 'service.py')
+        spec = importlib.util.spec_from_file_location(f"bench_{name.replace('-', '_')}", path)
+        module = importlib.util.module_from_spec(spec)
+        # Registrado para que pickle encuentre sus funciones (SOLVER_WORKERS > 0)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+        # El calentamiento corre en un hilo: no debe competir con las mediciones
+        module.warmup.wait()
+        _services[name] = module
+    return _services[name]
+
+class EvaluationCounter:
+    def __init__(self, func):
+        self.func = func
+        self.calls = 0
+
+    def __call__(self, *args):
+        if args and isinstance(args[0], np.ndarray):
+            # evaluate_vectorized pasa todos los puntos juntos: cada uno es una evaluación.
+            # Si la llamada falla, los vuelve a pedir uno por uno y se cuentan allí
+            values = self.func(*args)
+            self.calls += args[0].size
+            return values
+        self.calls += 1
+        return self.func(*args)
+
+def diagonally_dominant_system(n, seed=0):
+    rng = np.random.default_rng(seed)
+    A = rng.uniform(-1, 1, (n, n))
+    A[np.diag_indices(n)] = np.abs(A).sum(axis=1) + 1
+    b = rng.uniform(-10, 10, n)
+    return A, b
+
+ROOT_CORPUS = [
+    ("x**3 - 2*x - 5", 0.0, 3.0),
+    ("exp(-x)*cos(x) - 0.1", 0.0, 2.0),
+    ("sin(x) - 0.5", 0.0, 1.5),
+    ("log(x) - 1", 1.0, 4.0),
+    ("x*exp(x) - 1", 0.0, 1.0),
+]
+
+FIXED_POINT_CORPUS = [
+    ("cos(x)", 1.0),
+    ("exp(-x)", 0.5),
+    ("(x + 2/x)/2", 1.0),
+]
+
+ODE_CORPUS = [
+    ("x + y", 0.0, 1.0, 1e-3, 1.0),
+    ("y*cos(x)", 0.0, 1.0, 1e-4, 1.0),
+]
+
+INTEGRAL_CORPUS = [
+    ("exp(-x**2)", 0.0, 1.0),
+    ("sin(x)**2 + cos(3*x)", 0.0, math.pi),
+    ("1/(1 + x**2)", -5.0, 5.0),
+]
+
+MATRIX_SIZES = [5, 20, 50]
+
+def build_cases():
+    """Devuelve la lista de casos: (nombre, preparar) donde preparar() -> (ejecutar, contador)."""
+    cases = []
+
+    for function_str, xi, xu in ROOT_CORPUS:
+        def bisection_case(function_str=function_str, xi=xi, xu=xu):
+            service = load_service('bisection')
+            f = EvaluationCounter(service.parse_function(function_str))
+            return (lambda: service.biseccion(f, function_str, xi, xu, 1e-10, 200)), f
+        cases.append((f"biseccion[{function_str}]", bisection_case))
+
+        def brent_case(function_str=function_str, xi=xi, xu=xu):
+            service = load_service('bisection')
+            f = EvaluationCounter(service.parse_function(function_str))
+            return (lambda: service.brent(f, function_str, xi, xu, 1e-10, 200)), f
+        cases.append((f"brent[{function_str}]", brent_case))
+
+        def scan_case(function_str=function_str, xi=xi, xu=xu):
+            service = load_service('bisection')
+            f = EvaluationCounter(service.parse_function(function_str))
+            return (lambda: service.find_root_within_interval(f, xi, xu, 1e-10)), f
+        cases.append((f"find_root_within_interval[{function_str}]", scan_case))
+
+        def newton_case(function_str=function_str, xi=xi, xu=xu):
+            service = load_service('newton-raphson')
+            cached = service.prepare_function(function_str)
+            f = EvaluationCounter(cached["f"])
+            fp = EvaluationCounter(cached["f_derivative"])
+            counter = EvaluationCounter(None)
+            counter.calls_of = (f, fp)
+            x0 = (xi + xu) / 2
+            return (lambda: service.newton_raphson(f, fp, function_str, str(cached["derivative"]), x0, 1e-10, 200)), counter
+        cases.append((f"newton_raphson[{function_str}]", newton_case))
+
+        def secant_case(function_str=function_str, xi=xi, xu=xu):
+            service = load_service('secant')
+            f = EvaluationCounter(service.parse_function(function_str))
+            return (lambda: service.secant_method(f, function_str, xi, xu, 1e-10, 200)), f
+        cases.append((f"secant_method[{function_str}]", secant_case))
+
+    for function_str, x0 in FIXED_POINT_CORPUS:
+        def fixed_point_case(function_str=function_str, x0=x0):
+            service = load_service('fixed-point')
+            g = EvaluationCounter(service.parse_function(function_str))
+            return (lambda: service.puntoFijo(g, function_str, x0, 1e-10, 1000)), g
+        cases.append((f"puntoFijo[{function_str}]", fixed_point_case))
+
+    for n in MATRIX_SIZES:
+        def jacobi_case(n=n):
+            service = load_service('jacobi')
+            A, b = diagonally_dominant_system(n)
+            return (lambda: service.jacobi(A, b, 1e-10, 1000)), None
+        cases.append((f"jacobi[n={n}]", jacobi_case))
+
+        def gauss_seidel_case(n=n):
+            service = load_service('gauss-seidel')
+            A, b = diagonally_dominant_system(n)
+            return (lambda: service.gauss_seidel(A, b, 1e-10, 1000)), None
+        cases.append((f"gauss_seidel[n={n}]", gauss_seidel_case))
+
+    for function_str, x0, y0, h, x_final in ODE_CORPUS:
+        def euler_case(function_str=function_str, x0=x0, y0=y0, h=h, x_final=x_final):
+            service = load_service('euler')
+            f = EvaluationCounter(service.parse_function(function_str))
+            return (lambda: service.metodo_euler(f, function_str, x0, y0, h, x_final)), f
+        cases.append((f"metodo_euler[{function_str},h={h}]", euler_case))
+
+    for function_str, a, b in INTEGRAL_CORPUS:
+        for n in (100, 2000):
+            def simpson_case(function_str=function_str, a=a, b=b, n=n):
+                service = load_service('simpson')
+                f = EvaluationCounter(service.parse_function(function_str))
+                return (lambda: service.regla_simpson(f, function_str, a, b, n)), f
+            cases.append((f"regla_simpson[{function_str},n={n}]", simpson_case))
+
+            def trapezoid_case(function_str=function_str, a=a, b=b, n=n):
+                service = load_service('trapezoid')
+                f = EvaluationCounter(service.parse_function(function_str))
+                return (lambda: service.regla_simpson(f, function_str, a, b, n)), f
+            cases.append((f"trapezoid[{function_str},n={n}]", trapezoid_case))
+
+        def romberg_case(function_str=function_str, a=a, b=b):
+            service = load_service('romberg')
+            f = EvaluationCounter(service.parse_function(function_str))
+            return (lambda: service.metodo_romberg(f, function_str, a, b, 1e-10, 20)), f
+        cases.append((f"metodo_romberg[{function_str}]", romberg_case))
+
+    return cases
+
+def evaluations_of(counter):
+    if counter is None:
+        return 0
+    if hasattr(counter, 'calls_of'):
+        return sum(c.calls for c in counter.calls_of)
+    return counter.calls
+
+def reset(counter):
+    if counter is None:
+        return
+    for c in getattr(counter, 'calls_of', (counter,)):
+        c.calls = 0
+
+def summarize_result(result):
+    """Extrae los valores que deben mantenerse estables entre versiones."""
+    summary = {}
+    for key in ('root', 'integral', 'converged', 'found', 'xi', 'xu'):
+        if key in result:
+            summary[key] = result[key]
+    if 'solution' in result:
+        solution = result['solution']
+        if isinstance(solution, dict):
+            summary['final_y'] = solution['y_values'][-1]
+        else:
+            summary['solution_norm'] = float(np.linalg.norm(solution))
+    if 'iterations' in result:
+        summary['iterations'] = result['iterations']
+    elif 'iterations_detail' in result:
+        summary['iterations'] = len(result['iterations_detail'])
+    return summary
+
+def run_case(prepare, min_time, max_repeats):
+    run, counter = prepare()
+
+    reset(counter)
+    result = run()
+    evaluations = evaluations_of(counter)
+
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_repeats and (len(timings) < 3 or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = statistics.median(timings)
+    return {
+        "median_ms": round(median * 1000, 4),
+        "min_ms": round(min(timings) * 1000, 4),
+        "repeats": len(timings),
+        "evaluations": evaluations,
+        "evaluations_per_second": round(evaluations / median) if evaluations and median > 0 else None,
+        "peak_memory_kb": round(peak / 1024, 1),
+        "result": summarize_result(result),
+    }
+
+def values_differ(current, baseline, rtol=1e-9):
+    if isinstance(baseline, float) and isinstance(current, (int, float)):
+        return not math.isclose(current, baseline, rel_tol=rtol, abs_tol=rtol)
+    return current != baseline
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        ratio = current["median_ms"] / previous["median_ms"] if previous["median_ms"] else 1.0
+        current["vs_baseline"] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: {previous['median_ms']} ms -> {current['median_ms']} ms (x{ratio:.2f})")
+        for key, value in previous["result"].items():
+            if values_differ(current["result"].get(key), value):
+                regressions.append(f"{name}: '{key}' cambió de {value} a {current['result'].get(key)}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de los kernels numéricos")
+    parser.add_argument('--filter', default='', help="ejecutar solo los casos cuyo nombre contenga este texto")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="archivo JSON de referencia")
+    parser.add_argument('--update-baseline', action='store_true', help="sobrescribir el baseline con estos resultados")
+    parser.add_argument('--output', help="guardar los resultados completos en este archivo JSON")
+    parser.add_argument('--threshold', type=float, default=0.25, help="aumento relativo de tiempo considerado regresión (0.25 = 25%%)")
+    parser.add_argument('--min-time', type=float, default=0.2, help="segundos mínimos de medición por caso")
+    parser.add_argument('--max-repeats', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, prepare in build_cases():
+        if args.filter not in name:
+            continue
+        results[name] = run_case(prepare, args.min_time, args.max_repeats)
+        r = results[name]
+        eps = f"{r['evaluations_per_second']:>12,}" if r['evaluations_per_second'] else f"{'-':>12}"
+        print(f"{name:<60} {r['median_ms']:>10.3f} ms  {eps} eval/s  it={r['result'].get('iterations', '-'):<6} mem={r['peak_memory_kb']:>8.1f} KB")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+
+    regressions = compare(results, baseline, args.threshold) if baseline and not args.update_baseline else []
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as fh:
+            json.dump(baseline, fh, indent=2, sort_keys=True)
+            fh.write('\n')
+        print(f"\nBaseline actualizado: {args.baseline}")
+        return 0
+
+    if regressions:
+        print("\nRegresiones respecto al baseline:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+
+    if baseline:
+        print("\nSin regresiones respecto al baseline.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
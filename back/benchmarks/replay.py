@@ -0,0 +1,179 @@
+"""
+Reproduce tráfico capturado por los servicios (REQUEST_LOG_PATH) contra el
+stack de docker-compose o contra las aplicaciones Flask en el mismo proceso,
+y reporta latencias p50/p95/p99 y throughput por servicio y ruta.
+
+Uso:
+    python replay.py captura.jsonl                          # contra localhost:5001..5010
+    python replay.py captura.jsonl --concurrency 16 --repeat 5
+    python replay.py captura.jsonl --target inprocess       # sin red ni contenedores
+    python replay.py bisection.jsonl simpson.jsonl --service simpson --output resultado.json
+"""
+import argparse
+import json
+import math
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_kernels import load_service
+
+# Puertos publicados en docker-compose.yml
+SERVICE_PORTS = {
+    'bisection': 5001,
+    'fixed-point': 5002,
+    'newton-raphson': 5003,
+    'secant': 5004,
+    'jacobi': 5005,
+    'gauss-seidel': 5006,
+    'euler': 5007,
+    'simpson': 5008,
+    'trapezoid': 5009,
+    'romberg': 5010,
+}
+
+def read_capture(paths, services=None, limit=None):
+    entries = []
+    for path in paths:
+        with open(path, encoding='utf-8') as fh:
+            for number, line in enumerate(fh, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"{path}:{number}: línea inválida, se omite", file=sys.stderr)
+                    continue
+                if entry.get('service') not in SERVICE_PORTS or not isinstance(entry.get('payload'), dict):
+                    continue
+                if services and entry['service'] not in services:
+                    continue
+                entries.append(entry)
+                if limit and len(entries) >= limit:
+                    return entries
+    return entries
+
+class HttpTarget:
+    def __init__(self, host, timeout):
+        self.host = host
+        self.timeout = timeout
+
+    def send(self, entry):
+        url = f"http://{self.host}:{SERVICE_PORTS[entry['service']]}{entry['route']}"
+        body = json.dumps(entry['payload']).encode('utf-8')
+        req = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'}, method='POST')
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+class InProcessTarget:
+    """Usa el test client de Flask de cada servicio; un cliente por hilo."""
+
+    def __init__(self, services):
+        # Importar antes de medir: la carga de SymPy no debe contar como latencia
+        self.apps = {service: load_service(service).app for service in services}
+        self.local = threading.local()
+
+    def send(self, entry):
+        clients = getattr(self.local, 'clients', None)
+        if clients is None:
+            clients = self.local.clients = {}
+        client = clients.get(entry['service'])
+        if client is None:
+            client = clients[entry['service']] = self.apps[entry['service']].test_client()
+        return client.post(entry['route'], json=entry['payload']).status_code
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+def replay(entries, target, concurrency):
+    samples = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    lock = threading.Lock()
+
+    def fire(entry):
+        key = (entry['service'], entry['route'])
+        started = time.perf_counter()
+        try:
+            status = target.send(entry)
+        except Exception as e:
+            status = f"error: {type(e).__name__}"
+        elapsed = time.perf_counter() - started
+        with lock:
+            samples[key].append(elapsed)
+            statuses[key][str(status)] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(fire, entries))
+    wall_time = time.perf_counter() - started
+
+    recorded = defaultdict(list)
+    for entry in entries:
+        if isinstance(entry.get('latency_ms'), (int, float)):
+            recorded[(entry['service'], entry['route'])].append(entry['latency_ms'])
+
+    report = {}
+    for key in sorted(samples):
+        latencies = sorted(samples[key])
+        captured = sorted(recorded.get(key, []))
+        report[f"{key[0]} {key[1]}"] = {
+            "requests": len(latencies),
+            "throughput_rps": round(len(latencies) / wall_time, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "max_ms": round(latencies[-1] * 1000, 3),
+            "captured_p50_ms": percentile(captured, 50),
+            "statuses": dict(statuses[key]),
+        }
+    return report, wall_time
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproduce tráfico capturado contra los servicios")
+    parser.add_argument('captures', nargs='+', help="archivos JSONL generados con REQUEST_LOG_PATH")
+    parser.add_argument('--target', choices=('compose', 'inprocess'), default='compose')
+    parser.add_argument('--host', default='localhost', help="host del stack de docker-compose")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=1, help="veces que se reproduce la captura completa")
+    parser.add_argument('--limit', type=int, help="máximo de peticiones leídas de la captura")
+    parser.add_argument('--service', action='append', help="reproducir solo este servicio (se puede repetir)")
+    parser.add_argument('--timeout', type=float, default=60.0, help="timeout HTTP por petición, en segundos")
+    parser.add_argument('--output', help="guardar el reporte en este archivo JSON")
+    args = parser.parse_args(argv)
+
+    entries = read_capture(args.captures, args.service, args.limit)
+    if not entries:
+        print("La captura no contiene peticiones reproducibles", file=sys.stderr)
+        return 1
+
+    target = HttpTarget(args.host, args.timeout) if args.target == 'compose' else InProcessTarget({entry['service'] for entry in entries})
+    report, wall_time = replay(entries * args.repeat, target, args.concurrency)
+
+    print(f"{len(entries) * args.repeat} peticiones en {wall_time:.2f} s "
+          f"({len(entries) * args.repeat / wall_time:.1f} req/s, concurrencia {args.concurrency})\n")
+    print(f"{'servicio ruta':<32} {'n':>6} {'req/s':>9} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'captura p50':>12}  estados")
+    for name, row in report.items():
+        captured = f"{row['captured_p50_ms']:.3f}" if row['captured_p50_ms'] is not None else '-'
+        print(f"{name:<32} {row['requests']:>6} {row['throughput_rps']:>9.1f} {row['p50_ms']:>10.3f} "
+              f"{row['p95_ms']:>10.3f} {row['p99_ms']:>10.3f} {captured:>12}  {row['statuses']}")
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump({"wall_time_s": round(wall_time, 3), "concurrency": args.concurrency, "routes": report}, fh, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
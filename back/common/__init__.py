@@ -0,0 +1,24 @@
+"""
+Infraestructura compartida por los servicios de métodos numéricos: métricas,
+diagnóstico, perfilado, registro de tráfico, plazos, trabajos asíncronos y cachés.
+Cada servicio crea su aplicación Flask y llama una vez a init_service.
+"""
+from .deadlines import install_deadlines
+from .diagnostics import install_diagnostics
+from .jobs import install_jobs
+from .metrics import install_metrics
+from .profiling import install_profiling
+from .request_log import install_request_log
+from .result_cache import install_result_cache
+
+def init_service(app, service):
+    """Registra los ganchos y rutas comunes en app y devuelve sus métricas."""
+    # El orden importa: Flask corre los before_request en este orden y los after_request al revés
+    metrics = install_metrics(app, service)
+    install_diagnostics(app)
+    install_profiling(app)
+    install_request_log(app)
+    install_deadlines(app)
+    install_jobs(app)
+    install_result_cache(app)
+    return metrics
@@ -0,0 +1,292 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import tokenize
+import urllib.parse
+import zlib
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Caché compartida entre réplicas: resultados, funciones compiladas con SymPy y (en
+# Newton-Raphson) derivadas. CACHE_BACKEND elige dónde se guardan:
+#   memory                 solo este proceso (por defecto)
+#   sqlite:///ruta.db      un archivo que comparten los procesos de una misma máquina
+#   redis://host:6379/0    cualquier servidor que hable el protocolo de Redis
+# CACHE_MAX_BYTES limita el tamaño en memoria y en SQLite; en Redis lo limita maxmemory.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+# Cambiarlo invalida todo lo guardado por versiones anteriores del servicio
+CACHE_NAMESPACE = os.environ.get('CACHE_NAMESPACE', 'numeric:v1')
+# Los valores más grandes que esto se comprimen con zlib
+CACHE_COMPRESS_MIN_BYTES = 512
+
+def encode_cache_value(value):
+    # Un byte de cabecera indica si el resto viene comprimido
+    if len(value) >= CACHE_COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(value, 6)
+        if len(compressed) < len(value):
+            return b'z' + compressed
+    return b'r' + value
+
+def decode_cache_value(data):
+    if data[:1] == b'z':
+        return zlib.decompress(data[1:])
+    if data[:1] == b'r':
+        return data[1:]
+    return None
+
+def cache_key(*parts):
+    digest = hashlib.sha256(json.dumps(parts, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8'))
+    return f"{CACHE_NAMESPACE}:{digest.hexdigest()}"
+
+def expression_key(text):
+    """
+    Forma canónica de una expresión para las claves: sus tokens de Python separados por
+    un espacio. 'x**2-4' y 'x**2 - 4' comparten clave; 'x 2' y 'x2' no, porque la
+    separación entre tokens se conserva. Un texto que no se puede tokenizar queda igual.
+    """
+    try:
+        tokens = tokenize.generate_tokens(io.StringIO(text.strip()).readline)
+        return ' '.join(token.string for token in tokens if token.string)
+    except (tokenize.TokenError, SyntaxError):
+        return text
+
+class CacheBackend:
+    """
+    Interfaz de los almacenes de la caché compartida: claves de texto y valores en
+    bytes, con vencimiento en segundos. Un fallo del almacén nunca debe romper una
+    petición: get devuelve None y set no hace nada.
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+class MemoryCacheBackend(CacheBackend):
+    """LRU limitado por el total de bytes guardados."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        _, value = self._entries.pop(key)
+        self.size -= len(value)
+
+class SqliteCacheBackend(CacheBackend):
+    """
+    Archivo SQLite en modo WAL compartido por los procesos de la máquina. Al superar
+    max_bytes se borran las entradas usadas hace más tiempo.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "expires REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def _connection(self):
+        # Una conexión por hilo y por proceso: las heredadas con fork no se reutilizan
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        try:
+            with self._connection() as conn:
+                row = conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                if row[1] < time.time():
+                    conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    return None
+                conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (time.time(), key))
+                return bytes(row[0])
+        except sqlite3.Error as e:
+            logger.warning("Caché SQLite no disponible: %s", e)
+            return None
+
+    def set(self, key, value, ttl):
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), now + ttl, now)
+                )
+                total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+                if total > self.max_bytes:
+                    conn.execute("DELETE FROM cache WHERE expires < ?", (now,))
+                    rows = conn.execute("SELECT key, size FROM cache ORDER BY accessed").fetchall()
+                    total = sum(size for _, size in rows)
+                    stale = []
+                    for stale_key, size in rows:
+                        if total <= self.max_bytes:
+                            break
+                        stale.append((stale_key,))
+                        total -= size
+                    conn.executemany("DELETE FROM cache WHERE key = ?", stale)
+        except sqlite3.Error as e:
+            logger.warning("Caché SQLite no disponible: %s", e)
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Cliente mínimo del protocolo RESP (GET y SET con PX), suficiente para Redis,
+    KeyDB o un servidor de prueba local. No requiere dependencias adicionales. Tras
+    un fallo se deja de consultar durante RETRY_SECONDS para no penalizar cada petición.
+    """
+    RETRY_SECONDS = 5.0
+
+    def __init__(self, host, port, db=0, password=None, timeout=0.5):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+        self._retry_at = 0.0
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None or self._local.pid != os.getpid():
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self._local.sock, self._local.reader, self._local.pid = sock, sock.makefile('rb'), os.getpid()
+            if self.password:
+                self._call('AUTH', self.password)
+            if self.db:
+                self._call('SELECT', str(self.db))
+        return sock
+
+    def _fail(self, e):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+        if time.monotonic() >= self._retry_at:
+            logger.warning("Caché Redis no disponible: %s", e)
+        self._retry_at = time.monotonic() + self.RETRY_SECONDS
+
+    def _call(self, *parts):
+        sock = self._connection()
+        chunks = [b'*%d\r\n' % len(parts)]
+        for part in parts:
+            data = part if isinstance(part, bytes) else str(part).encode('utf-8')
+            chunks.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        sock.sendall(b''.join(chunks))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError("Respuesta incompleta del servidor de caché")
+        kind, rest = line[:1], line[1:-2]
+        if kind in (b'+', b':'):
+            return rest
+        if kind == b'-':
+            raise ConnectionError(rest.decode('utf-8', 'replace'))
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            return [self._read_reply() for _ in range(max(int(rest), 0))]
+        raise ConnectionError("Respuesta desconocida del servidor de caché")
+
+    def get(self, key):
+        if time.monotonic() < self._retry_at:
+            return None
+        try:
+            return self._call('GET', key)
+        except (OSError, ValueError) as e:
+            self._fail(e)
+            return None
+
+    def set(self, key, value, ttl):
+        if time.monotonic() < self._retry_at:
+            return
+        try:
+            self._call('SET', key, value, 'PX', str(max(int(ttl * 1000), 1)))
+        except (OSError, ValueError) as e:
+            self._fail(e)
+
+def open_cache_backend(url, max_bytes):
+    if url == 'memory':
+        return MemoryCacheBackend(max_bytes)
+    if url.startswith('sqlite:///'):
+        return SqliteCacheBackend(url[len('sqlite:///'):], max_bytes)
+    if url.startswith('redis://'):
+        parsed = urllib.parse.urlparse(url)
+        db = parsed.path.strip('/')
+        return RedisCacheBackend(parsed.hostname or 'localhost', parsed.port or 6379,
+                                 int(db) if db else 0, parsed.password)
+    raise ValueError(f"CACHE_BACKEND no reconocido: {url}")
+
+class SharedCache:
+    """Codifica los valores y los guarda en el almacén configurado."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get(self, key):
+        data = self.backend.get(key)
+        if data is None:
+            return None
+        try:
+            return decode_cache_value(data)
+        except zlib.error:
+            return None
+
+    def set(self, key, value, ttl):
+        self.backend.set(key, encode_cache_value(value), ttl)
+
+shared_cache = SharedCache(open_cache_backend(CACHE_BACKEND, CACHE_MAX_BYTES))
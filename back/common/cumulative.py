@@ -0,0 +1,270 @@
+import math
+import os
+
+import numpy as np
+from flask import current_app, jsonify, request
+
+from .deadlines import SolverError, check_deadline
+from .diagnostics import track_phase
+from .expressions import evaluate_vectorized
+from .metrics import json_response
+from .result_cache import cached_result
+
+# Integral acumulada: F(x) = ∫_a^x f en todos los nodos de la malla con una sola evaluación
+# vectorizada de f, en lugar de una petición por cada límite superior (cada una integra de
+# nuevo desde a). Entre nodos, F se interpola con Hermite cúbico: se conoce F y también F' = f.
+# Simpson, trapecio y Romberg registran /cumulative con las reglas que ofrece cada uno.
+CUMULATIVE_MAX_SUBINTERVALS = int(os.environ.get('CUMULATIVE_MAX_SUBINTERVALS', 100000))
+CUMULATIVE_MAX_POINTS = 10000
+CUMULATIVE_RULES = {
+    'trapezoid': "Regla del trapecio acumulada",
+    'simpson': "Regla de Simpson 1/3 acumulada",
+    'romberg': "Método de Romberg acumulado",
+}
+CUMULATIVE_DEFAULT_LEVELS = 4
+CUMULATIVE_MAX_LEVELS = 10
+
+def cumulative_trapezoid(values, h):
+    return np.concatenate(([0.0], np.cumsum((values[:-1] + values[1:]) * (h / 2))))
+
+def cumulative_simpson(values, h):
+    # Nodos pares: Simpson 1/3 por pares de subintervalos. Impares: la parábola por los tres
+    # nodos del par integrada sobre su primera mitad, h/12·(5·f0 + 8·f1 - f2)
+    left, middle, right = values[:-2:2], values[1::2], values[2::2]
+    even = np.concatenate(([0.0], np.cumsum((left + 4 * middle + right) * (h / 3))))
+    cumulative = np.empty(len(values))
+    cumulative[0::2] = even
+    cumulative[1::2] = even[:-1] + (5 * left + 8 * middle - right) * (h / 12)
+    return cumulative
+
+def cumulative_romberg(values, h, levels):
+    """
+    Romberg sobre la integral acumulada. values está en la malla más fina; el nivel k es el
+    trapecio acumulado con la mitad de paso que el anterior, tomado en los nodos de la malla
+    gruesa, y la extrapolación de Richardson de la tabla sigue valiendo en cada nodo.
+    Devuelve F en los nodos gruesos y la mayor diferencia entre las dos últimas diagonales.
+    """
+    finest = levels - 1
+    table = []
+    for k in range(levels):
+        stride = 2 ** (finest - k)
+        row = [cumulative_trapezoid(values[::stride], h * stride)[::2 ** k]]
+        for j in range(1, k + 1):
+            row.append(row[j - 1] + (row[j - 1] - table[k - 1][j - 1]) / (4 ** j - 1))
+        table.append(row)
+    error = float(np.abs(table[-1][-1] - table[-2][-2]).max()) if levels > 1 else None
+    return table[-1][-1], error
+
+def hermite_interpolate(nodes, cumulative, values, points):
+    # Hermite cúbico por tramos con F y su derivada f en los nodos: error O(h^4)
+    k = np.clip(np.searchsorted(nodes, points, side='right') - 1, 0, len(nodes) - 2)
+    h = nodes[k + 1] - nodes[k]
+    t = (points - nodes[k]) / h
+    t2, t3 = t * t, t * t * t
+    return ((2 * t3 - 3 * t2 + 1) * cumulative[k] + (t3 - 2 * t2 + t) * h * values[k]
+            + (3 * t2 - 2 * t3) * cumulative[k + 1] + (t3 - t2) * h * values[k + 1])
+
+def integral_acumulada(f, f_function_str, a, b, n, rule, points=None, levels=1):
+    try:
+        h = (b - a) / n
+        if h < 1e-15:
+            return {"error": "El paso de integración es demasiado pequeño, esto puede causar errores numéricos"}
+
+        # Romberg evalúa una sola vez la malla más fina; los niveles son submallas suyas
+        stride = 2 ** (levels - 1) if rule == 'romberg' else 1
+        check_deadline()
+        fine_nodes = a + (b - a) / (n * stride) * np.arange(n * stride + 1)
+        fine_values = evaluate_vectorized(f, fine_nodes)
+        invalid = np.flatnonzero(~np.isfinite(fine_values))
+        if invalid.size:
+            return {"error": f"La función produce un valor no válido en x = {fine_nodes[invalid[0]]}"}
+
+        check_deadline()
+        nodes, values = fine_nodes[::stride], fine_values[::stride]
+        error = None
+        if rule == 'romberg':
+            cumulative, error = cumulative_romberg(fine_values, (b - a) / (n * stride), levels)
+        elif rule == 'simpson':
+            cumulative = cumulative_simpson(values, h)
+        else:
+            cumulative = cumulative_trapezoid(values, h)
+        if not np.isfinite(cumulative).all():
+            return {"error": "El resultado de la integral no es un número válido"}
+
+        result = {
+            "function": f_function_str,
+            "interval": [a, b],
+            "subintervals": n,
+            "step_size": h,
+            "rule": rule,
+            "method": CUMULATIVE_RULES[rule],
+            "status": "success",
+            "integral": float(cumulative[-1]),
+            "nodes": nodes.tolist(),
+            "cumulative": cumulative.tolist(),
+            "function_evaluations": int(fine_nodes.size),
+        }
+        if rule == 'romberg':
+            result["levels"] = levels
+            result["error_estimate"] = error
+        if points is not None:
+            interpolated = hermite_interpolate(nodes, cumulative, values, np.asarray(points, dtype=np.float64))
+            result["points"] = [{"x": x, "integral": value} for x, value in zip(points, interpolated.tolist())]
+        return result
+
+    except SolverError:
+        raise
+    except Exception as e:
+        return {"error": f"Error durante el cálculo de la integral acumulada: {str(e)}"}
+
+def install_cumulative(app, pool, parse_function, rules, default_rule, validate_function=None):
+    """
+    Registra POST /cumulative con las reglas de rules (claves de CUMULATIVE_RULES).
+    validate_function, si se da, revisa el texto de la función antes de consultar la caché.
+    """
+    def cumulative_solve():
+        try:
+            if not request.is_json:
+                return jsonify({
+                    "error": "El contenido debe ser JSON válido",
+                    "message": "Asegúrate de enviar datos en formato JSON"
+                }), 400
+
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                return jsonify({
+                    "error": "JSON vacío o inválido",
+                    "message": "El cuerpo de la petición debe contener datos JSON válidos"
+                }), 400
+
+            required_fields = ['function', 'a', 'b', 'n']
+            missing_fields = [field for field in required_fields if field not in data or not str(data[field]).strip()]
+            if missing_fields:
+                return jsonify({
+                    "error": "Faltan campos obligatorios",
+                    "message": f"Los siguientes campos son requeridos: {', '.join(missing_fields)}",
+                    "required_fields": required_fields
+                }), 400
+
+            f_function_str = str(data['function']).strip()
+
+            try:
+                a = float(data['a'])
+                b = float(data['b'])
+            except (ValueError, TypeError):
+                return jsonify({
+                    "error": "Límites inválidos",
+                    "message": f"Los límites 'a' y 'b' deben ser números válidos. Recibido: a='{data['a']}', b='{data['b']}'"
+                }), 400
+
+            if not (math.isfinite(a) and math.isfinite(b)) or a >= b:
+                return jsonify({
+                    "error": "Intervalo inválido",
+                    "message": f"Los límites deben ser finitos y el inferior 'a' ({a}) menor que el superior 'b' ({b})"
+                }), 400
+
+            try:
+                n = int(data['n'])
+            except (ValueError, TypeError):
+                return jsonify({
+                    "error": "Parámetro 'n' inválido",
+                    "message": f"El número de subintervalos 'n' debe ser un número entero. Recibido: '{data['n']}'"
+                }), 400
+
+            if n <= 0 or n > CUMULATIVE_MAX_SUBINTERVALS:
+                return jsonify({
+                    "error": "Número de subintervalos inválido",
+                    "message": f"El número de subintervalos 'n' debe estar entre 1 y {CUMULATIVE_MAX_SUBINTERVALS}. Recibido: {n}"
+                }), 400
+
+            rule = data.get('rule', default_rule)
+            if rule not in rules:
+                return jsonify({
+                    "error": "Regla inválida",
+                    "message": f"El campo 'rule' debe ser una de: {', '.join(rules)}. Recibido: '{rule}'"
+                }), 400
+
+            if rule == 'simpson' and n % 2 != 0:
+                # n = 1 solo tiene un vecino par válido: 0 subintervalos no es una malla
+                suggestion = f"{n + 1} o {n - 1}" if n > 1 else f"{n + 1}"
+                return jsonify({
+                    "error": "Número de subintervalos debe ser par",
+                    "message": f"La regla de Simpson 1/3 requiere un número par de subintervalos. Recibido: {n} (impar). Prueba con {suggestion}"
+                }), 400
+
+            levels = 1
+            if rule == 'romberg':
+                try:
+                    levels = int(data.get('levels', CUMULATIVE_DEFAULT_LEVELS))
+                except (ValueError, TypeError):
+                    return jsonify({
+                        "error": "Niveles inválidos",
+                        "message": f"El campo 'levels' debe ser un número entero. Recibido: '{data.get('levels')}'"
+                    }), 400
+                if levels < 1 or levels > CUMULATIVE_MAX_LEVELS or n * 2 ** (levels - 1) > CUMULATIVE_MAX_SUBINTERVALS:
+                    return jsonify({
+                        "error": "Niveles inválidos",
+                        "message": f"'levels' debe estar entre 1 y {CUMULATIVE_MAX_LEVELS} y la malla más fina (n·2^(levels-1)) no puede superar {CUMULATIVE_MAX_SUBINTERVALS} subintervalos"
+                    }), 400
+
+            # Puntos opcionales donde se interpola F, además de los nodos
+            points = data.get('points')
+            if points is not None:
+                if not isinstance(points, list) or len(points) > CUMULATIVE_MAX_POINTS:
+                    return jsonify({
+                        "error": "Puntos inválidos",
+                        "message": f"El campo 'points' debe ser una lista de hasta {CUMULATIVE_MAX_POINTS} números"
+                    }), 400
+                try:
+                    points = [float(point) for point in points]
+                except (ValueError, TypeError):
+                    return jsonify({
+                        "error": "Puntos inválidos",
+                        "message": "Todos los elementos de 'points' deben ser números válidos"
+                    }), 400
+                outside = [point for point in points if not a <= point <= b]
+                if outside:
+                    return jsonify({
+                        "error": "Puntos fuera del intervalo",
+                        "message": f"Los puntos deben estar dentro de [{a}, {b}]. Fuera del intervalo: {', '.join(str(point) for point in outside[:5])}"
+                    }), 400
+
+            try:
+                if validate_function is not None:
+                    validate_function(f_function_str)
+                # Con los datos ya validados, un cálculo idéntico se responde desde la caché sin
+                # interpretar la función
+                cached = cached_result(function=f_function_str, a=a, b=b, n=n, rule=rule, points=points,
+                                       levels=levels)
+                if cached is not None:
+                    return cached
+                f = parse_function(f_function_str)
+            except ValueError as ve:
+                return jsonify({
+                    "error": "Función matemática inválida",
+                    "message": str(ve),
+                    "suggestion": "Verifica la sintaxis de tu función. Ejemplos válidos: 'x**2', 'sin(x)', 'exp(x)', 'log(x)'"
+                }), 400
+
+            with track_phase('compute'):
+                result = pool.run(integral_acumulada, f, f_function_str, a, b, n, rule, points, levels)
+
+            if "error" in result:
+                return jsonify({
+                    "error": "Error en el cálculo de la integral acumulada",
+                    "message": result["error"],
+                    "function": f_function_str
+                }), 400
+
+            return json_response(result)
+
+        except SolverError:
+            raise
+        except Exception as e:
+            current_app.logger.exception("Error en el cálculo de la integral acumulada")
+            return jsonify({
+                "error": "Error interno del servidor",
+                "message": str(e)
+            }), 500
+
+    app.add_url_rule('/cumulative', 'cumulative_solve', cumulative_solve, methods=['POST'])
@@ -0,0 +1,92 @@
+import os
+import time
+from contextvars import ContextVar
+
+from flask import g, jsonify, request
+
+SOLVER_TIMEOUT = float(os.environ.get('SOLVER_TIMEOUT', '60'))
+
+class SolverError(RuntimeError):
+    pass
+
+class SolverBusy(SolverError):
+    pass
+
+class SolverCancelled(SolverError):
+    pass
+
+class SolverTimeout(SolverError):
+    def __init__(self, message, partial=None):
+        super().__init__(message, partial)
+        self.message = message
+        self.partial = partial
+
+    def __str__(self):
+        return self.message
+
+# Plazo por petición: SOLVER_TIMEOUT, o el campo "timeout" del cuerpo si es menor
+current_deadline = ContextVar('current_deadline', default=None)
+# Trabajo asíncrono en curso (/jobs): recibe el avance y su límite es JOB_TIMEOUT
+current_job = ContextVar('current_job', default=None)
+JOB_TIMEOUT = float(os.environ.get('JOB_TIMEOUT', '600'))
+
+def check_deadline(partial=None):
+    job = current_job.get()
+    if job is not None:
+        job.report(partial)
+    deadline = current_deadline.get()
+    if deadline is not None and time.monotonic() > deadline:
+        raise SolverTimeout("El cálculo superó el tiempo límite de la petición", partial)
+
+def start_deadline():
+    if request.method != 'POST':
+        return
+    limit = JOB_TIMEOUT if current_job.get() is not None else SOLVER_TIMEOUT
+    timeout = limit
+    data = request.get_json(silent=True)
+    if isinstance(data, dict) and 'timeout' in data:
+        try:
+            requested = float(data['timeout'])
+        except (TypeError, ValueError):
+            requested = float('nan')
+        if not requested > 0:
+            return jsonify({
+                "error": "Tiempo límite inválido",
+                "message": "El campo 'timeout' debe ser un número positivo de segundos"
+            }), 400
+        timeout = min(requested, limit)
+    g.deadline_token = current_deadline.set(time.monotonic() + timeout)
+
+def stop_deadline(exc):
+    token = g.pop('deadline_token', None)
+    if token is not None:
+        current_deadline.reset(token)
+
+def solver_error(e):
+    return jsonify({
+        "error": "Error durante el cálculo",
+        "message": str(e)
+    }), 500
+
+def solver_busy(e):
+    return jsonify({
+        "error": "Servicio saturado",
+        "message": str(e)
+    }), 503
+
+def solver_timeout(e):
+    body = {
+        "error": "Tiempo de cálculo excedido",
+        "message": str(e),
+        "suggestion": "Reduce el número de iteraciones o simplifica la función"
+    }
+    if e.partial:
+        body["partial_result"] = e.partial
+    return jsonify(body), 504
+
+def install_deadlines(app):
+    app.before_request(start_deadline)
+    app.teardown_request(stop_deadline)
+    app.register_error_handler(SolverError, solver_error)
+    app.register_error_handler(SolverBusy, solver_busy)
+    app.register_error_handler(SolverTimeout, solver_timeout)
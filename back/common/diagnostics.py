@@ -0,0 +1,108 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, g, request
+
+# Diagnóstico opcional por petición ("diagnostics": true en el cuerpo o ?diagnostics=1)
+current_diagnostics = ContextVar('current_diagnostics', default=None)
+
+class Diagnostics:
+    def __init__(self):
+        self.evaluations = {}
+        self.phases = {}
+        self.worker_phases = {}
+        self.started = (time.perf_counter(), time.thread_time())
+
+    @contextmanager
+    def phase(self, name):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            totals = self.phases.setdefault(name, [0.0, 0.0])
+            totals[0] += time.perf_counter() - wall
+            totals[1] += time.thread_time() - cpu
+
+    def count(self, name, func, vectorized=False):
+        self.evaluations.setdefault(name, 0)
+
+        def counted(*args):
+            # En evaluaciones vectorizadas se cuenta cada punto del arreglo
+            self.evaluations[name] += getattr(args[0], 'size', 1) if vectorized else 1
+            return func(*args)
+        return counted
+
+    def worker_dict(self):
+        return {"evaluations": self.evaluations, "phases": self.phases}
+
+    def merge(self, worker):
+        # Evaluaciones y fases medidas dentro del proceso de cálculo
+        for name, calls in worker["evaluations"].items():
+            self.evaluations[name] = self.evaluations.get(name, 0) + calls
+        for name, t in worker["phases"].items():
+            totals = self.worker_phases.setdefault(name, [0.0, 0.0])
+            totals[0] += t[0]
+            totals[1] += t[1]
+
+    def as_dict(self):
+        # Lo que no es interpretación, compilación, cálculo ni serialización es validación
+        wall = time.perf_counter() - self.started[0] - sum(t[0] for t in self.phases.values())
+        cpu = time.thread_time() - self.started[1] - sum(t[1] for t in self.phases.values())
+        phases = {**self.phases, "validate": [max(wall, 0.0), max(cpu, 0.0)]}
+        result = {
+            "phases": {
+                name: {"wall_ms": round(t[0] * 1000, 3), "cpu_ms": round(t[1] * 1000, 3)}
+                for name, t in phases.items()
+            }
+        }
+        if self.worker_phases:
+            result["worker_phases"] = {
+                name: {"wall_ms": round(t[0] * 1000, 3), "cpu_ms": round(t[1] * 1000, 3)}
+                for name, t in self.worker_phases.items()
+            }
+        if self.evaluations:
+            result["function_evaluations"] = self.evaluations
+        return result
+
+@contextmanager
+def track_phase(name):
+    diagnostics = current_diagnostics.get()
+    if diagnostics is None:
+        yield
+    else:
+        with diagnostics.phase(name):
+            yield
+
+def counted(name, func, vectorized=False):
+    diagnostics = current_diagnostics.get()
+    return func if diagnostics is None else diagnostics.count(name, func, vectorized)
+
+def start_diagnostics():
+    if request.method != 'POST':
+        return
+    data = request.get_json(silent=True)
+    if request.args.get('diagnostics') == '1' or (isinstance(data, dict) and data.get('diagnostics') is True):
+        g.diagnostics_token = current_diagnostics.set(Diagnostics())
+
+def attach_diagnostics(response):
+    diagnostics = current_diagnostics.get()
+    if diagnostics is not None and response.is_json:
+        # Releer el cuerpo también es serialización: se mide antes de armar el bloque de
+        # diagnóstico, que se agrega al objeto y se vuelve a serializar completo
+        with diagnostics.phase('serialize'):
+            body = response.get_json()
+        if isinstance(body, dict):
+            body["diagnostics"] = diagnostics.as_dict()
+            response.set_data(current_app.json.dumps(body))
+    return response
+
+def stop_diagnostics(exc):
+    token = g.pop('diagnostics_token', None)
+    if token is not None:
+        current_diagnostics.reset(token)
+
+def install_diagnostics(app):
+    app.before_request(start_diagnostics)
+    app.after_request(attach_diagnostics)
+    app.teardown_request(stop_diagnostics)
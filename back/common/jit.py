@@ -0,0 +1,94 @@
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .diagnostics import current_diagnostics
+
+# Nivel JIT opcional (JIT=1; apagado por defecto, y Numba no viene en requirements.txt,
+# ver requirements-jit.txt): una función que se usa JIT_PROMOTE_AFTER veces se compila a
+# código nativo junto con el bucle completo del método, que devuelve los iterados en
+# arreglos. La compilación corre en segundo plano; sin Numba, o si la expresión no se
+# puede compilar, todo sigue en Python.
+try:
+    import numba
+except ImportError:
+    numba = None
+
+logger = logging.getLogger(__name__)
+
+JIT_ENABLED = numba is not None and os.environ.get('JIT', '0') != '0'
+JIT_PROMOTE_AFTER = int(os.environ.get('JIT_PROMOTE_AFTER', '3'))
+JIT_MAX_COMPILED = int(os.environ.get('JIT_MAX_COMPILED', '64'))
+# Iteraciones por llamada al bucle compilado; entre llamadas se revisa el plazo
+JIT_CHUNK = 1024
+JIT_NAMESPACE = {'np': np, 'numpy': np, 'math': math, 'abs': abs, 'min': min, 'max': max}
+
+class JitTier:
+    def __init__(self, promote_after, max_compiled):
+        self.promote_after = promote_after
+        self.max_compiled = max_compiled
+        self.uses = {}
+        self.compiled = OrderedDict()
+        self.pending = set()
+        self.lock = threading.Lock()
+
+    def lookup(self, key, build):
+        """Bucle compilado para key, o None mientras la función no haya sido promovida."""
+        with self.lock:
+            if key in self.compiled:
+                self.compiled.move_to_end(key)
+                return self.compiled[key]
+            if key in self.pending:
+                return None
+            if len(self.uses) > 16 * self.max_compiled:
+                self.uses.clear()
+            self.uses[key] = self.uses.get(key, 0) + 1
+            if self.uses[key] < self.promote_after:
+                return None
+            self.pending.add(key)
+        threading.Thread(target=self._compile, args=(key, build), name='jit', daemon=True).start()
+        return None
+
+    def _compile(self, key, build):
+        try:
+            compiled = build(*key[1:])
+        except Exception as e:
+            # None queda registrado: esa expresión no se vuelve a intentar
+            logger.info("La función no se pudo compilar con Numba: %s", e)
+            compiled = None
+        with self.lock:
+            self.pending.discard(key)
+            self.uses.pop(key, None)
+            self.compiled[key] = compiled
+            while len(self.compiled) > self.max_compiled:
+                self.compiled.popitem(last=False)
+
+jit_tier = JitTier(JIT_PROMOTE_AFTER, JIT_MAX_COMPILED)
+
+def jit_function(source, variables):
+    # error_model='numpy': una división por cero da inf/nan y el bucle la detecta como anomalía
+    return numba.njit(error_model='numpy')(eval(f"lambda {', '.join(variables)}: {source}", dict(JIT_NAMESPACE)))
+
+def jit_loop(build, *functions):
+    """
+    Bucle compilado por build a partir del código de las funciones, o None: sin JIT, con
+    diagnóstico activo (el bucle compilado no cuenta las evaluaciones), si alguna función
+    no trae jit_source o mientras no haya sido promovida.
+    """
+    if not JIT_ENABLED or current_diagnostics.get() is not None:
+        return None
+    sources = [getattr(getattr(f, 'raw', f), 'jit_source', None) for f in functions]
+    if None in sources:
+        return None
+    return jit_tier.lookup((build.__name__, *sources), build)
+
+def call_compiled(loop, *args):
+    # Una excepción dentro del bucle compilado cuenta como anomalía: decide la versión en Python
+    try:
+        return loop(*args)
+    except Exception:
+        return None
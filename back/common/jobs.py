@@ -0,0 +1,216 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, jsonify, request
+
+from .deadlines import SolverBusy, SolverCancelled, current_job
+
+# Trabajos asíncronos: POST /jobs responde de inmediato con un id y el cálculo corre en
+# segundo plano con la misma validación que la ruta original. Así el balanceador puede
+# tener timeouts cortos sin cortar cálculos largos legítimos.
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', '16'))
+JOB_MAX_STORED = int(os.environ.get('JOB_MAX_STORED', '256'))
+JOB_TTL = float(os.environ.get('JOB_TTL', '600'))
+# Cada cuánto informa su avance un cálculo que corre en un proceso aparte
+JOB_PROGRESS_INTERVAL = float(os.environ.get('JOB_PROGRESS_INTERVAL', '0.25'))
+
+def summarize_progress(partial):
+    """Iteración y error actuales a partir del detalle parcial que recibe check_deadline."""
+    if isinstance(partial, dict):
+        lengths = [len(value) for value in partial.values() if isinstance(value, list)]
+        return {"iteration": max(lengths, default=0), "error": None}
+    if isinstance(partial, list):
+        last = partial[-1] if partial else None
+        error = last.get('error') if isinstance(last, dict) else None
+        return {"iteration": len(partial), "error": error if isinstance(error, (int, float)) else None}
+    return None
+
+class Job:
+    def __init__(self, app, route, payload):
+        self.id = uuid.uuid4().hex
+        self.app = app
+        self.route = route
+        self.payload = payload
+        self.status = 'queued'
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.partial = None
+        self.progress = None
+        self.status_code = None
+        self.result = None
+        self.future = None
+        self.cancelled = threading.Event()
+
+    def report(self, partial):
+        # Solo guarda la referencia: el resumen se calcula al consultar el trabajo
+        if partial is not None:
+            self.partial = partial
+        if self.cancelled.is_set():
+            raise SolverCancelled("El trabajo fue cancelado")
+
+    def as_dict(self):
+        status = self.status
+        if status == 'running' and self.cancelled.is_set():
+            status = 'cancelling'
+        body = {
+            "id": self.id,
+            "status": status,
+            "route": self.route,
+            "created_at": self.created,
+            "started_at": self.started,
+            "finished_at": self.finished,
+            "progress": summarize_progress(self.partial) if self.partial is not None else self.progress
+        }
+        if self.finished is not None:
+            body["status_code"] = self.status_code
+            body["result"] = self.result
+        return body
+
+class WorkerProgress:
+    """Equivalente de Job dentro de un proceso de cálculo: envía el avance por la tubería."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.last = 0.0
+
+    def report(self, partial):
+        now = time.monotonic()
+        if partial is None or now - self.last < JOB_PROGRESS_INTERVAL:
+            return
+        self.last = now
+        self.conn.send((None, summarize_progress(partial), None))
+
+class JobStore:
+    """
+    Trabajos en memoria con un máximo de entradas; los terminados se descartan tras
+    JOB_TTL segundos. Los cálculos corren en JOB_WORKERS hilos, que a su vez usan
+    el pool de procesos si SOLVER_WORKERS > 0.
+    """
+
+    def __init__(self, workers, queue_size, max_stored, ttl):
+        self.executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='job')
+        self.slots = threading.BoundedSemaphore(max(workers, 1) + queue_size)
+        self.max_stored = max_stored
+        self.ttl = ttl
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def evict(self):
+        now = time.time()
+        for job_id, job in list(self.jobs.items()):
+            if job.finished is not None and now - job.finished > self.ttl:
+                del self.jobs[job_id]
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished is not None]
+        while len(self.jobs) > self.max_stored and finished:
+            del self.jobs[finished.pop(0)]
+
+    def submit(self, app, route, payload):
+        if not self.slots.acquire(blocking=False):
+            raise SolverBusy("Hay demasiados trabajos pendientes; intenta nuevamente en unos segundos")
+        job = Job(app, route, payload)
+        with self.lock:
+            self.evict()
+            if len(self.jobs) >= self.max_stored:
+                self.slots.release()
+                raise SolverBusy("Se alcanzó el máximo de trabajos guardados; intenta nuevamente en unos minutos")
+            self.jobs[job.id] = job
+        job.future = self.executor.submit(self.execute, job)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            self.evict()
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None and job.finished is not None:
+                # Borrar un trabajo terminado lo quita del almacén
+                del self.jobs[job_id]
+        if job is None or job.finished is not None:
+            return job
+        job.cancelled.set()
+        if job.future.cancel():
+            job.status = 'cancelled'
+            job.finished = time.time()
+            self.slots.release()
+        return job
+
+    def execute(self, job):
+        job.status = 'running'
+        job.started = time.time()
+        token = current_job.set(job)
+        try:
+            with job.app.test_request_context(job.route, method='POST', json=job.payload):
+                response = job.app.full_dispatch_request()
+            job.status_code = response.status_code
+            job.result = response.get_json(silent=True)
+            if job.cancelled.is_set():
+                job.status = 'cancelled'
+            else:
+                job.status = 'done' if response.status_code < 400 else 'failed'
+        except Exception as e:
+            job.status_code = 500
+            job.result = {"error": "Error inesperado en el trabajo", "message": str(e)}
+            job.status = 'failed'
+        finally:
+            current_job.reset(token)
+            job.progress = summarize_progress(job.partial) if job.partial is not None else job.progress
+            job.partial = None
+            job.finished = time.time()
+            self.slots.release()
+
+job_store = JobStore(JOB_WORKERS, JOB_QUEUE_SIZE, JOB_MAX_STORED, JOB_TTL)
+
+def job_routes():
+    return sorted(rule.rule for rule in current_app.url_map.iter_rules()
+                  if 'POST' in rule.methods and not rule.rule.startswith('/jobs'))
+
+def solver_cancelled(e):
+    return jsonify({
+        "error": "Trabajo cancelado",
+        "message": str(e)
+    }), 409
+
+def create_job():
+    if not request.is_json:
+        return jsonify({"error": "El contenido debe ser JSON válido"}), 400
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "El cuerpo debe ser un objeto JSON con los datos del cálculo"}), 400
+
+    payload = dict(data)
+    route = payload.pop('route', '/solve')
+    if route not in job_routes():
+        return jsonify({
+            "error": "Ruta no disponible para trabajos",
+            "message": f"El campo 'route' debe ser una de: {', '.join(job_routes())}"
+        }), 400
+
+    job = job_store.submit(current_app._get_current_object(), route, payload)
+    return jsonify(job.as_dict()), 202, {"Location": f"/jobs/{job.id}"}
+
+def get_job(job_id):
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Trabajo no encontrado", "message": "El trabajo no existe o ya expiró"}), 404
+    return jsonify(job.as_dict())
+
+def cancel_job(job_id):
+    job = job_store.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Trabajo no encontrado", "message": "El trabajo no existe o ya expiró"}), 404
+    return jsonify(job.as_dict())
+
+def install_jobs(app):
+    app.register_error_handler(SolverCancelled, solver_cancelled)
+    app.add_url_rule('/jobs', 'create_job', create_job, methods=['POST'])
+    app.add_url_rule('/jobs/<job_id>', 'get_job', get_job, methods=['GET'])
+    app.add_url_rule('/jobs/<job_id>', 'cancel_job', cancel_job, methods=['DELETE'])
@@ -0,0 +1,174 @@
+import bisect
+import threading
+import time
+
+from flask import current_app, g, has_app_context, jsonify, request
+
+from .diagnostics import track_phase
+
+class Metrics:
+    """
+    Métricas del servicio en formato de texto de Prometheus. Cada observación
+    es una actualización de diccionario bajo un lock, para poder dejarlas activas siempre.
+    """
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    ITERATION_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000)
+
+    def __init__(self, service):
+        self.service = service
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.latency = {}
+        self.iterations = {}
+        self.results = {}
+        self.cache = {}
+        self.in_flight = 0
+
+    def _observe(self, histograms, key, buckets, value):
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = [[0] * len(buckets), 0.0, 0]
+        index = bisect.bisect_left(buckets, value)
+        if index < len(buckets):
+            histogram[0][index] += 1
+        histogram[1] += value
+        histogram[2] += 1
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def observe_request(self, route, status_code, seconds):
+        outcome = "success" if status_code < 400 else "client_error" if status_code < 500 else "server_error"
+        with self._lock:
+            self.requests[(route, outcome)] = self.requests.get((route, outcome), 0) + 1
+            self._observe(self.latency, (route, outcome), self.LATENCY_BUCKETS, seconds)
+
+    def observe_result(self, route, result):
+        if result.get("converged"):
+            label = "converged"
+        elif "error" in result:
+            label = "failed"
+        elif "converged" in result:
+            label = "not_converged"
+        else:
+            label = "completed"
+        iterations = result.get("iterations")
+        with self._lock:
+            self.results[(route, label)] = self.results.get((route, label), 0) + 1
+            if isinstance(iterations, int):
+                self._observe(self.iterations, route, self.ITERATION_BUCKETS, iterations)
+
+    def observe_cache(self, cache, hit):
+        with self._lock:
+            counts = self.cache.setdefault(cache, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def _histogram_lines(self, name, histograms, buckets, label_names):
+        lines = []
+        for key, (counts, total, count) in sorted(histograms.items()):
+            labels = ",".join(f'{n}="{v}"' for n, v in zip(label_names, key if isinstance(key, tuple) else (key,)))
+            labels = f'service="{self.service}",{labels}'
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{{labels}}} {total}')
+            lines.append(f'{name}_count{{{labels}}} {count}')
+        return lines
+
+    def render(self):
+        service = f'service="{self.service}"'
+        with self._lock:
+            lines = [
+                "# HELP numeric_http_requests_total Peticiones HTTP atendidas por ruta y resultado.",
+                "# TYPE numeric_http_requests_total counter"
+            ]
+            for (route, outcome), count in sorted(self.requests.items()):
+                lines.append(f'numeric_http_requests_total{{{service},route="{route}",outcome="{outcome}"}} {count}')
+
+            lines += [
+                "# HELP numeric_http_request_duration_seconds Latencia de las peticiones HTTP.",
+                "# TYPE numeric_http_request_duration_seconds histogram"
+            ]
+            lines += self._histogram_lines("numeric_http_request_duration_seconds", self.latency, self.LATENCY_BUCKETS, ("route", "outcome"))
+
+            lines += [
+                "# HELP numeric_http_requests_in_flight Peticiones HTTP en curso.",
+                "# TYPE numeric_http_requests_in_flight gauge",
+                f"numeric_http_requests_in_flight{{{service}}} {self.in_flight}",
+                "# HELP numeric_solve_iterations Iteraciones usadas por cada cálculo.",
+                "# TYPE numeric_solve_iterations histogram"
+            ]
+            lines += self._histogram_lines("numeric_solve_iterations", self.iterations, self.ITERATION_BUCKETS, ("route",))
+
+            lines += [
+                "# HELP numeric_solve_results_total Resultados de los cálculos (converged, not_converged, failed, completed).",
+                "# TYPE numeric_solve_results_total counter"
+            ]
+            for (route, label), count in sorted(self.results.items()):
+                lines.append(f'numeric_solve_results_total{{{service},route="{route}",result="{label}"}} {count}')
+
+            lines += [
+                "# HELP numeric_expression_cache_requests_total Consultas a las cachés de expresiones por resultado.",
+                "# TYPE numeric_expression_cache_requests_total counter"
+            ]
+            for cache, (hits, misses) in sorted(self.cache.items()):
+                lines.append(f'numeric_expression_cache_requests_total{{{service},cache="{cache}",result="hit"}} {hits}')
+                lines.append(f'numeric_expression_cache_requests_total{{{service},cache="{cache}",result="miss"}} {misses}')
+        return "\n".join(lines) + "\n"
+
+def current_metrics():
+    return current_app.extensions['metrics']
+
+def observe_cache(cache, hit):
+    # Fuera de una petición (calentamiento, procesos de cálculo) no hay servicio al que atribuirlo
+    if has_app_context():
+        current_metrics().observe_cache(cache, hit)
+
+def request_route():
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    current_metrics().request_started()
+
+def record_request_metrics(response):
+    started = g.get('metrics_started')
+    if started is not None:
+        current_metrics().observe_request(request_route(), response.status_code, time.perf_counter() - started)
+    # Todo cálculo cuenta, también los que terminan en un 400 temprano del manejador; los
+    # aciertos de caché no calculan nada
+    result = g.pop('metrics_result', None)
+    if (result is None and request.method == 'POST' and request.url_rule is not None and response.is_json
+            and not request.path.startswith('/jobs') and not g.get('result_cache_hit')):
+        result = response.get_json(silent=True)
+    if isinstance(result, dict):
+        current_metrics().observe_result(request_route(), result)
+    return response
+
+def finish_request_metrics(exc):
+    if g.pop('metrics_started', None) is not None:
+        current_metrics().request_finished()
+
+def metrics_endpoint():
+    return current_app.response_class(current_metrics().render(), mimetype='text/plain; version=0.0.4')
+
+def json_response(result):
+    # record_request_metrics lo registra sin volver a leer el cuerpo
+    g.metrics_result = result
+    with track_phase('serialize'):
+        return jsonify(result)
+
+def install_metrics(app, service):
+    metrics = app.extensions['metrics'] = Metrics(service)
+    app.before_request(start_request_metrics)
+    app.after_request(record_request_metrics)
+    app.teardown_request(finish_request_metrics)
+    app.add_url_rule('/metrics', 'metrics_endpoint', metrics_endpoint, methods=['GET'])
+    return metrics
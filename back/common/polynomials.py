@@ -0,0 +1,115 @@
+import ast
+import math
+
+import numpy as np
+
+# Polinomios: se detectan sobre el árbol ya validado por el compilador rápido. Una forma
+# expandida se evalúa con Horner a partir de los coeficientes; una factorizada
+# ((x - 1)**5) se deja como está, porque expandirla pierde precisión cerca de sus raíces.
+POLYNOMIAL_MAX_DEGREE = 64
+POLYNOMIAL_CONSTANTS = {'pi': math.pi, 'E': math.e}
+
+def polynomial_product(left, right):
+    if max(left) + max(right) > POLYNOMIAL_MAX_DEGREE:
+        return None
+    product = {}
+    for i, a in left.items():
+        for j, b in right.items():
+            product[i + j] = product.get(i + j, 0.0) + a * b
+    return product
+
+def polynomial_terms(node, factored):
+    """Coeficientes {grado: valor} si el árbol es un polinomio en x; None si no lo es."""
+    if isinstance(node, ast.Constant):
+        return {0: float(node.value)}
+    if isinstance(node, ast.Name):
+        return {1: 1.0} if node.id not in POLYNOMIAL_CONSTANTS else {0: POLYNOMIAL_CONSTANTS[node.id]}
+    if isinstance(node, ast.UnaryOp):
+        terms = polynomial_terms(node.operand, factored)
+        return terms if terms is None or isinstance(node.op, ast.UAdd) else {k: -v for k, v in terms.items()}
+    if not isinstance(node, ast.BinOp):
+        return None
+    left, right = polynomial_terms(node.left, factored), polynomial_terms(node.right, factored)
+    if left is None or right is None:
+        return None
+    if isinstance(node.op, (ast.Add, ast.Sub)):
+        sign = 1.0 if isinstance(node.op, ast.Add) else -1.0
+        terms = dict(left)
+        for k, v in right.items():
+            terms[k] = terms.get(k, 0.0) + sign * v
+        return terms
+    if isinstance(node.op, ast.Mult):
+        if len(left) > 1 and len(right) > 1:
+            factored.append(node)
+        return polynomial_product(left, right)
+    # Division y potencia solo con constantes: x/2, x**3
+    if set(right) != {0}:
+        return None
+    if isinstance(node.op, ast.Div):
+        return {k: v / right[0] for k, v in left.items()} if right[0] else None
+    exponent = right[0]
+    if set(left) == {0}:
+        try:
+            value = left[0] ** exponent
+        except (OverflowError, ZeroDivisionError):
+            return None
+        return {0: value} if isinstance(value, float) else None
+    if not exponent.is_integer() or not 0 <= exponent * max(left) <= POLYNOMIAL_MAX_DEGREE:
+        return None
+    if len(left) > 1 and exponent > 1:
+        factored.append(node)
+    terms = {0: 1.0}
+    for _ in range(int(exponent)):
+        terms = polynomial_product(terms, left)
+    return terms
+
+def polynomial_coefficients(node):
+    """(coeficientes de mayor a menor grado, si la expresión ya está expandida) o (None, False)."""
+    factored = []
+    terms = polynomial_terms(node, factored)
+    degree = max((k for k, v in (terms or {}).items() if v), default=0)
+    coefficients = tuple(terms.get(k, 0.0) for k in range(degree, -1, -1)) if degree else ()
+    if not coefficients or not all(math.isfinite(c) for c in coefficients):
+        return None, False
+    return coefficients, not factored
+
+def horner_source(coefficients):
+    # ((c0·x + c1)·x + c2)·x + c3, sin los términos nulos
+    if len(coefficients) == 1:
+        # La derivada de un polinomio de grado 1 es constante
+        return repr(coefficients[0])
+    source = 'x' if coefficients[0] == 1 else f"{coefficients[0]!r} * x"
+    for c in coefficients[1:-1]:
+        source = f"({source} + {c!r}) * x" if c else f"{source} * x"
+    return f"{source} + {coefficients[-1]!r}" if coefficients[-1] else source
+
+def polynomial_derivative(coefficients):
+    degree = len(coefficients) - 1
+    return tuple(c * (degree - i) for i, c in enumerate(coefficients[:-1]))
+
+def polynomial_roots(coefficients, lower, upper):
+    """
+    Raíces reales distintas del polinomio en [lower, upper]: valores propios casi reales de
+    la matriz compañera (np.roots), pulidos con Newton sobre los coeficientes.
+    """
+    with np.errstate(all='ignore'):
+        candidates = np.roots(coefficients)
+    roots = candidates[np.abs(candidates.imag) <= 1e-7 * (1 + np.abs(candidates))].real
+    derivative = polynomial_derivative(coefficients)
+    for _ in range(3):
+        with np.errstate(all='ignore'):
+            value = np.polyval(coefficients, roots)
+            candidate = roots - value / np.polyval(derivative, roots)
+            better = np.isfinite(candidate) & (np.abs(np.polyval(coefficients, candidate)) < np.abs(value))
+        roots = np.where(better, candidate, roots)
+    # Una raíz en un extremo puede caer un ulp afuera
+    slack = 1e-12 * max(1.0, abs(lower), abs(upper))
+    roots = np.sort(np.clip(roots[(roots >= lower - slack) & (roots <= upper + slack)], lower, upper))
+    # Una raíz doble aparece como dos valores a ~sqrt(eps): el promedio del grupo es más exacto
+    clusters = []
+    for root in roots.tolist():
+        if clusters and root - clusters[-1][-1] <= 1e-6 * (1 + abs(root)):
+            clusters[-1].append(root)
+        else:
+            clusters.append([root])
+    return [sum(cluster) / len(cluster) for cluster in clusters]
@@ -0,0 +1,250 @@
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+from functools import cached_property, lru_cache
+
+from flask import g, has_request_context, jsonify, request
+
+from .deadlines import (
+    SOLVER_TIMEOUT,
+    SolverBusy,
+    SolverCancelled,
+    SolverError,
+    SolverTimeout,
+    current_deadline,
+    current_job,
+)
+from .diagnostics import Diagnostics, counted, current_diagnostics, track_phase
+from .jobs import JOB_PROGRESS_INTERVAL, WorkerProgress
+
+# Cálculo en procesos aparte. Los manejadores solo validan, despachan y serializan, así un
+# cálculo largo no bloquea al resto con el GIL, y un proceso que agota el plazo se termina
+# aunque esté dentro de sympify o de una evaluación. SOLVER_WORKERS=0 calcula en el hilo de
+# la petición, donde el plazo solo se revisa entre iteraciones.
+SOLVER_WORKERS = int(os.environ.get('SOLVER_WORKERS', '2'))
+SOLVER_QUEUE_SIZE = int(os.environ.get('SOLVER_QUEUE_SIZE', str(4 * max(SOLVER_WORKERS, 1))))
+# Margen entre el plazo cooperativo (con resultado parcial) y la terminación del proceso
+SOLVER_KILL_GRACE = float(os.environ.get('SOLVER_KILL_GRACE', '1'))
+
+class SolverPool:
+    """
+    Procesos de cálculo creados con fork después del calentamiento de arranque. Cada
+    trabajo ocupa un proceso; si supera el tiempo límite se termina y se reemplaza.
+    Cada servicio crea el suyo, así los procesos heredan sus funciones ya compiladas.
+    """
+
+    def __init__(self, app, workers=SOLVER_WORKERS, queue_size=SOLVER_QUEUE_SIZE, timeout=SOLVER_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(workers + queue_size) if workers > 0 else None
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.started = threading.Event()
+        self.inside_worker = False
+        app.before_request(self.require_workers)
+
+    def require_workers(self):
+        # Sin procesos no hay cómo cortar sympify ni una evaluación larga: un plazo pedido
+        # explícitamente no se podría cumplir
+        if self.workers > 0 or request.method != 'POST':
+            return
+        data = request.get_json(silent=True)
+        if isinstance(data, dict) and 'timeout' in data:
+            return jsonify({
+                "error": "Tiempo límite no disponible",
+                "message": "El servicio corre sin procesos de cálculo (SOLVER_WORKERS=0) y no puede garantizar el campo 'timeout'"
+            }), 503
+
+    def dispatches(self):
+        # Sin procesos configurados, fuera de una petición (calentamiento) o con el perfilador
+        # activo, se calcula en el hilo actual
+        return (self.workers > 0 and not self.inside_worker and has_request_context()
+                and g.get('profiler') is None)
+
+    def spawn(self):
+        context = multiprocessing.get_context('fork')
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(target=solver_worker, args=(self, child_conn, os.getpid()), daemon=True)
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    def start(self):
+        # Se crean al terminar el calentamiento: un fork mientras otro hilo está dentro de
+        # sympify o de un import hereda esos locks tomados y el proceso queda bloqueado
+        with self.lock:
+            if not self.started.is_set():
+                for _ in range(self.workers):
+                    self.idle.put(self.spawn())
+                self.started.set()
+
+    def discard(self, worker):
+        process, conn = worker
+        process.kill()
+        process.join(1)
+        conn.close()
+        self.idle.put(self.spawn())
+
+    def run(self, kernel, *args):
+        if not self.dispatches():
+            return kernel(*args)
+        deadline = current_deadline.get()
+        if deadline is None:
+            deadline = time.monotonic() + self.timeout
+        # Una petición que llega durante el calentamiento espera a que se creen los procesos
+        if not self.started.wait(max(deadline - time.monotonic(), 0)):
+            raise SolverBusy("El servicio todavía se está calentando; intenta nuevamente en unos segundos")
+        if not self.slots.acquire(blocking=False):
+            raise SolverBusy("Todos los procesos de cálculo están ocupados; intenta nuevamente en unos segundos")
+        try:
+            try:
+                worker = self.idle.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                raise SolverBusy("No hubo un proceso de cálculo disponible a tiempo; intenta nuevamente en unos segundos")
+            diagnostics = current_diagnostics.get()
+            job = current_job.get()
+            try:
+                worker[1].send((diagnostics is not None, deadline - time.monotonic(), job is not None, pickle.dumps((kernel, args))))
+                while True:
+                    # El proceso tiene SOLVER_KILL_GRACE segundos para devolver su resultado parcial;
+                    # con un trabajo asíncrono se despierta seguido para recibir avance y cancelación
+                    wait = max(deadline - time.monotonic(), 0) + SOLVER_KILL_GRACE
+                    if job is not None:
+                        wait = min(wait, JOB_PROGRESS_INTERVAL)
+                    if worker[1].poll(wait):
+                        message = worker[1].recv()
+                        if message[0] is None:
+                            job.progress = message[1]
+                            continue
+                        break
+                    if job is not None and job.cancelled.is_set():
+                        self.discard(worker)
+                        raise SolverCancelled("El trabajo fue cancelado")
+                    if job is None or time.monotonic() > deadline + SOLVER_KILL_GRACE:
+                        self.discard(worker)
+                        raise SolverTimeout("El cálculo superó el tiempo límite de la petición y fue detenido")
+                ok, value, worker_diagnostics = message
+            except (EOFError, OSError):
+                self.discard(worker)
+                raise SolverError("El proceso de cálculo terminó inesperadamente")
+            except BaseException:
+                if worker[0].is_alive():
+                    self.idle.put(worker)
+                raise
+            self.idle.put(worker)
+        finally:
+            self.slots.release()
+
+        if diagnostics is not None and worker_diagnostics is not None:
+            diagnostics.merge(worker_diagnostics)
+        if not ok:
+            raise value
+        return value
+
+    def compile(self, factory, *args):
+        """
+        Compila factory(*args) en un proceso de cálculo y devuelve la receta con la que se
+        reconstruye: la del código ya impreso, si la función trae una, así otro proceso no
+        repite sympify ni lambdify. Una expresión patológica agota allí el plazo y el
+        proceso se termina, en lugar de bloquear el hilo de la petición.
+        """
+        return self.run(portable_recipe, (factory, args))
+
+    def function(self, name, factory, *args, local=False, vectorized=False):
+        """
+        RemoteFunction de factory(*args). Con procesos de cálculo la compila uno de ellos y
+        aquí solo queda la receta; local=True la compila en el hilo actual, para lo que no
+        pasa por SymPy (el compilador rápido no evalúa nada del usuario).
+        """
+        # Durante el calentamiento se compila aquí y los procesos lo heredan al crearse
+        if local or not self.dispatches():
+            return RemoteFunction(name, compile_recipe((factory, args)), factory, *args, vectorized=vectorized, pool=self)
+        factory, args = self.compile(factory, *args)
+        return RemoteFunction(name, None, factory, *args, vectorized=vectorized, pool=self)
+
+def solver_worker(pool, conn, parent_pid):
+    pool.inside_worker = True
+    while True:
+        try:
+            # Si el proceso principal desaparece, el trabajador también termina
+            while not conn.poll(1.0):
+                if os.getppid() != parent_pid:
+                    return
+            with_diagnostics, remaining, report_progress, job = conn.recv()
+        except (EOFError, OSError):
+            return
+
+        diagnostics = Diagnostics() if with_diagnostics else None
+        token = current_diagnostics.set(diagnostics)
+        deadline_token = current_deadline.set(time.monotonic() + remaining)
+        job_token = current_job.set(WorkerProgress(conn) if report_progress else None)
+        try:
+            kernel, args = pickle.loads(job)
+            with track_phase('compute'):
+                response = (True, kernel(*args))
+        except Exception as e:
+            response = (False, e)
+        finally:
+            current_job.reset(job_token)
+            current_deadline.reset(deadline_token)
+            current_diagnostics.reset(token)
+
+        worker_diagnostics = diagnostics.worker_dict() if diagnostics is not None else None
+        try:
+            conn.send(response + (worker_diagnostics,))
+        except Exception as e:
+            conn.send((False, SolverError(f"No se pudo devolver el resultado del cálculo: {str(e)}"), worker_diagnostics))
+
+class RemoteFunction:
+    """
+    Función compilada que se puede enviar a un proceso de cálculo. Solo viaja la
+    receta (factory y argumentos); el proceso la compila una vez y la reutiliza.
+    Compilada en un proceso de cálculo, raw es None y la receta se compila aquí solo si
+    se la llama fuera de uno. Con pool, una llamada desde el hilo de la petición también
+    se evalúa en un proceso, así el plazo la corta.
+    """
+
+    def __init__(self, name, raw, factory, *args, vectorized=False, pool=None):
+        self.name = name
+        self._raw = raw
+        self.pool = pool
+        self.recipe = (factory, args)
+        self.vectorized = vectorized
+
+    @property
+    def raw(self):
+        if self._raw is None:
+            self._raw = compile_recipe(self.recipe)
+        return self._raw
+
+    @cached_property
+    def func(self):
+        return counted(self.name, self.raw, self.vectorized)
+
+    @cached_property
+    def vector(self):
+        # Núcleo de NumPy para evaluar arreglos completos; sin él, la misma función
+        return counted(self.name, getattr(self.raw, 'vector', self.raw), True)
+
+    def __call__(self, *args):
+        if self.pool is not None and self.pool.dispatches():
+            return self.pool.run(self, *args)
+        return self.func(*args)
+
+    def __reduce__(self):
+        return (rebuild_remote_function, (self.name, self.recipe, self.vectorized))
+
+@lru_cache(maxsize=128)
+def compile_recipe(recipe):
+    factory, args = recipe
+    built = factory(*args)
+    return getattr(built, 'raw', built)
+
+def rebuild_remote_function(name, recipe, vectorized):
+    return RemoteFunction(name, compile_recipe(recipe), recipe[0], *recipe[1], vectorized=vectorized)
+
+def portable_recipe(recipe):
+    return getattr(compile_recipe(recipe), 'recipe', recipe)
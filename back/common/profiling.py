@@ -0,0 +1,67 @@
+import cProfile
+import os
+import pstats
+import time
+import uuid
+
+from flask import current_app, g, jsonify, request
+
+from .metrics import current_metrics
+
+# Perfilado bajo demanda (?profile=1 o cabecera X-Profile: 1). Solo se activa con
+# PROFILING_ENABLED=1 y, si se define PROFILING_TOKEN, con la cabecera X-Profile-Token.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '').lower() in ('1', 'true', 'yes')
+PROFILING_TOKEN = os.environ.get('PROFILING_TOKEN')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '/tmp/profiles')
+
+def start_profiler():
+    if request.args.get('profile') != '1' and request.headers.get('X-Profile') != '1':
+        return None
+    if not PROFILING_ENABLED or (PROFILING_TOKEN and request.headers.get('X-Profile-Token') != PROFILING_TOKEN):
+        return jsonify({"error": "El perfilado de peticiones no está habilitado en este servicio"}), 403
+    g.profiler = cProfile.Profile()
+    g.profiler.enable()
+
+def attach_profile(response):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    profiler.disable()
+
+    try:
+        top = min(max(int(request.args.get('profile_top', 25)), 1), 200)
+    except ValueError:
+        top = 25
+
+    stats = pstats.Stats(profiler)
+    stats.sort_stats('cumulative')
+    functions = []
+    for func in stats.fcn_list[:top]:
+        primitive_calls, calls, total_time, cumulative_time, _ = stats.stats[func]
+        functions.append({
+            "function": pstats.func_std_string(func),
+            "calls": calls,
+            "primitive_calls": primitive_calls,
+            "total_ms": round(total_time * 1000, 3),
+            "cumulative_ms": round(cumulative_time * 1000, 3)
+        })
+
+    profile = {"top_functions": functions}
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{current_metrics().service}-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.pstats")
+        profiler.dump_stats(path)
+        profile["saved_to"] = path
+    except OSError as e:
+        profile["save_error"] = str(e)
+
+    if response.is_json:
+        body = response.get_json()
+        if isinstance(body, dict):
+            body["profile"] = profile
+            response.set_data(current_app.json.dumps(body))
+    return response
+
+def install_profiling(app):
+    app.before_request(start_profiler)
+    app.after_request(attach_profile)
@@ -0,0 +1,56 @@
+import json
+import os
+import random
+import threading
+import time
+
+from flask import current_app, g, request
+
+from .metrics import current_metrics, request_route
+
+# Registro opcional del tráfico real (REQUEST_LOG_PATH) para reproducirlo con
+# benchmarks/replay.py. Solo guarda la ruta, el cuerpo JSON y la latencia observada.
+REQUEST_LOG_PATH = os.environ.get('REQUEST_LOG_PATH')
+REQUEST_LOG_SAMPLE = float(os.environ.get('REQUEST_LOG_SAMPLE', '1'))
+REQUEST_LOG_MAX_BYTES = int(os.environ.get('REQUEST_LOG_MAX_BYTES', '65536'))
+REQUEST_LOG_IGNORED_FIELDS = ('diagnostics', 'profile')
+request_log_lock = threading.Lock()
+
+def sanitize_payload(payload):
+    if not isinstance(payload, dict):
+        return None
+    return {key: value for key, value in payload.items() if key not in REQUEST_LOG_IGNORED_FIELDS}
+
+def record_request_sample(response):
+    # Las peticiones perfiladas no se registran: su latencia no es representativa
+    if not REQUEST_LOG_PATH or request.method != 'POST' or g.get('profiler') is not None:
+        return response
+    # De un trabajo asíncrono se registra la petición interna, no la de /jobs
+    if request.path == '/jobs':
+        return response
+    started = g.get('metrics_started')
+    if started is None or random.random() >= REQUEST_LOG_SAMPLE:
+        return response
+    payload = sanitize_payload(request.get_json(silent=True))
+    if payload is None:
+        return response
+
+    line = json.dumps({
+        "timestamp": time.time(),
+        "service": current_metrics().service,
+        "route": request_route(),
+        "status": response.status_code,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+        "payload": payload
+    }, ensure_ascii=False, default=str)
+    if len(line) > REQUEST_LOG_MAX_BYTES:
+        return response
+    try:
+        with request_log_lock, open(REQUEST_LOG_PATH, 'a', encoding='utf-8') as log:
+            log.write(line + '\n')
+    except OSError as e:
+        current_app.logger.warning("No se pudo registrar la petición en %s: %s", REQUEST_LOG_PATH, e)
+    return response
+
+def install_request_log(app):
+    app.after_request(record_request_sample)
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from flask import current_app, g, request
+
+from .cache import CACHE_NAMESPACE, expression_key, shared_cache
+from .deadlines import SOLVER_TIMEOUT, SolverTimeout, current_deadline
+from .diagnostics import current_diagnostics
+from .metrics import current_metrics, request_route
+
+# Caché de resultados: las respuestas 200 se guardan con la clave del hash de la ruta y
+# de los parámetros validados (ver cached_result). Un acierto no calcula nada, y con
+# If-None-Match responde 304. RESULT_CACHE=0 la desactiva.
+RESULT_CACHE_ENABLED = os.environ.get('RESULT_CACHE', '1') != '0'
+RESULT_CACHE_MAX_ENTRY_BYTES = int(os.environ.get('RESULT_CACHE_MAX_ENTRY_BYTES', str(256 * 1024)))
+RESULT_CACHE_TTL = float(os.environ.get('RESULT_CACHE_TTL', '3600'))
+# Campos que no cambian el resultado de un cálculo que terminó bien
+RESULT_CACHE_IGNORED_FIELDS = ('timeout',)
+# Peticiones idénticas simultáneas: solo la primera calcula. COALESCE_REQUESTS=0 lo desactiva.
+COALESCE_ENABLED = os.environ.get('COALESCE_REQUESTS', '1') != '0'
+# Estados que dependen de la carga, del plazo o de la cancelación del trabajo de quien
+# calculó: los demás no los heredan
+COALESCE_RETRY_STATUSES = (409, 503, 504)
+
+class InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.status = None
+        self.body = None
+
+class SingleFlight:
+    """
+    Registro de los cálculos en curso por clave. El primero en llegar calcula; los
+    duplicados esperan su respuesta, incluidos los errores, hasta su propio plazo.
+    Los procesos de cálculo solo reciben trabajo desde aquí, así que un duplicado
+    tampoco ocupa un proceso.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def join(self, key):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                return call, False
+            call = self._calls[key] = InFlight()
+            return call, True
+
+    def finish(self, key, call, status, body):
+        call.status, call.body = status, body
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.done.set()
+
+single_flight = SingleFlight()
+
+def canonical_value(value):
+    if isinstance(value, str):
+        return expression_key(value)
+    if isinstance(value, (list, tuple)):
+        return [canonical_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: canonical_value(item) for key, item in value.items()}
+    return value
+
+def result_cache_key(payload, params):
+    # Los campos validados reemplazan a los del cuerpo; los que el manejador no validó
+    # entran tal cual, así un campo olvidado solo provoca fallos de caché
+    fields = {key: value for key, value in payload.items() if key not in RESULT_CACHE_IGNORED_FIELDS}
+    fields.update((key, canonical_value(value)) for key, value in params.items())
+    canonical = json.dumps({
+        "service": current_metrics().service,
+        "route": request_route(),
+        "payload": fields
+    }, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def cached_result(**params):
+    """
+    Respuesta ya calculada para esta petición, o None si hay que calcular. Los
+    manejadores la llaman al terminar la validación, con los campos interpretados
+    (números convertidos, expresiones y modos ya aceptados): la clave usa esos valores,
+    así 4 y 4.0 o 'x**2-4' y 'x**2 - 4' comparten resultado, y una petición inválida
+    nunca alcanza una entrada válida.
+    """
+    # Las peticiones con diagnóstico o perfilado siempre calculan: su valor es medir
+    if ((not RESULT_CACHE_ENABLED and not COALESCE_ENABLED) or g.get('result_cache_key') is not None
+            or g.get('profiler') is not None or current_diagnostics.get() is not None):
+        return None
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return None
+
+    key = g.result_cache_key = result_cache_key(data, params)
+    if RESULT_CACHE_ENABLED:
+        body = shared_cache.get(f"{CACHE_NAMESPACE}:result:{key}")
+        current_metrics().observe_cache('result', body is not None)
+        if body is not None:
+            if request.if_none_match.contains(key):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.response_class(body, mimetype='application/json')
+                response.headers['X-Cache'] = 'HIT'
+            response.set_etag(key)
+            g.result_cache_hit = True
+            return response
+    if COALESCE_ENABLED:
+        return join_in_flight(key)
+    return None
+
+def join_in_flight(key):
+    call, leader = single_flight.join(key)
+    current_metrics().observe_cache('coalesced', not leader)
+    if leader:
+        g.single_flight = (key, call)
+        return None
+
+    deadline = current_deadline.get()
+    wait = max(deadline - time.monotonic(), 0) if deadline is not None else SOLVER_TIMEOUT
+    if not call.done.wait(wait):
+        raise SolverTimeout("El cálculo superó el tiempo límite de la petición mientras esperaba una petición idéntica")
+    # Si quien calculaba no obtuvo una respuesta definitiva, esta petición calcula por su cuenta
+    if call.body is None or call.status in COALESCE_RETRY_STATUSES:
+        return None
+    response = current_app.response_class(call.body, status=call.status, mimetype='application/json')
+    if call.status == 200:
+        response.set_etag(key)
+    response.headers['X-Coalesced'] = '1'
+    g.result_cache_hit = True
+    return response
+
+def store_cached_result(response):
+    key = g.get('result_cache_key')
+    if key is None or g.get('result_cache_hit'):
+        return response
+    body = response.get_data()
+    if RESULT_CACHE_ENABLED:
+        if response.status_code == 200 and response.is_json and len(body) <= RESULT_CACHE_MAX_ENTRY_BYTES:
+            shared_cache.set(f"{CACHE_NAMESPACE}:result:{key}", body, RESULT_CACHE_TTL)
+            response.set_etag(key)
+        response.headers['X-Cache'] = 'MISS'
+    # Se libera después de guardar: quien llegue ahora ya encuentra el resultado en caché
+    flight = g.pop('single_flight', None)
+    if flight is not None:
+        single_flight.finish(*flight, response.status_code, body if response.is_json else None)
+    return response
+
+def release_single_flight(exc):
+    # Sin respuesta (excepción no controlada): los que esperaban calculan por su cuenta
+    flight = g.pop('single_flight', None)
+    if flight is not None:
+        single_flight.finish(*flight, None, None)
+
+def install_result_cache(app):
+    app.after_request(store_cached_result)
+    app.teardown_request(release_single_flight)
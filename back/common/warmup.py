@@ -0,0 +1,58 @@
+import os
+import threading
+import time
+
+# Calentamiento al arrancar: cada servicio compila y evalúa casos habituales antes de
+# declararse listo. WARMUP=0 lo desactiva.
+WARMUP_ENABLED = os.environ.get('WARMUP', '1') != '0'
+# Cargar SymPy aquí evita pagar su importación en la primera función que no cubre la ruta rápida
+WARMUP_SYMPY = os.environ.get('WARMUP_SYMPY', '1') != '0'
+WARMUP_POINTS = (0.5, 1.0, 2.0)
+
+class Warmup:
+    """
+    Estado del calentamiento de arranque; /ready responde 503 hasta que termina. Cada
+    tarea es (descripción, función sin argumentos); la descripción aparece en /ready si falla.
+    """
+
+    def __init__(self, tasks, sympy=False, pool=None):
+        self.tasks = tasks
+        self.sympy = sympy
+        self.pool = pool
+        self.done = threading.Event()
+        self.warmed = 0
+        self.failed = []
+        self.seconds = None
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            for description, task in self.tasks:
+                try:
+                    task()
+                    self.warmed += 1
+                except Exception as e:
+                    self.failed.append({**description, "error": str(e)})
+            if self.sympy and WARMUP_SYMPY:
+                import sympy
+        finally:
+            # Los procesos de cálculo se crean al final para heredar lo ya compilado
+            if self.pool is not None:
+                self.pool.start()
+            self.seconds = time.perf_counter() - started
+            self.done.set()
+
+    def start(self):
+        if not WARMUP_ENABLED:
+            if self.pool is not None:
+                self.pool.start()
+            self.seconds = 0.0
+            self.done.set()
+            return
+        threading.Thread(target=self.run, name='warmup', daemon=True).start()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    def as_dict(self):
+        return {"warmed": self.warmed, "failed": self.failed, "seconds": round(self.seconds, 3)}
@@ -0,0 +1,31 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+BACK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Sin calentamiento: los procesos de cálculo se crean al importar el servicio y las
+# pruebas no esperan a /ready
+os.environ.setdefault('WARMUP', '0')
+sys.path.insert(0, BACK_DIR)
+
+def load_service(name):
+    """Importa methods/<name>/service.py una sola vez, con un nombre de módulo propio."""
+    module_name = f"{name.replace('-', '_')}_service"
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(BACK_DIR, 'methods', name, 'service.py'))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[module_name]
+
+@pytest.fixture(scope='module')
+def service(request):
+    # Las pruebas viven junto a su servicio: el directorio dice cuál cargar
+    return load_service(request.path.parent.name)
+
+@pytest.fixture
+def client(service):
+    return service.app.test_client()
@@ -1,11 +1,30 @@
 from flask import Flask, jsonify, request
 import math
 import numpy as np
-from sympy import symbols, sympify, lambdify
 from flask_cors import CORS
+import ast
+from functools import partial
+import os
+import sys
+
+# El paquete común (back/common) está dos niveles arriba, también dentro de la imagen
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common import init_service
+from common.deadlines import SolverError, check_deadline
+from common.diagnostics import track_phase
+from common.expressions import build_function, compile_expression, evaluate_vectorized, fast_source
+from common.metrics import json_response
+from common.polynomials import polynomial_roots
+from common.pool import SolverPool
+from common.result_cache import cached_result
+from common.warmup import WARMUP_POINTS, Warmup
 
 app = Flask(__name__)
 CORS(app)
+metrics = init_service(app, 'bisection')
+# Procesos de cálculo: compilan y evalúan las funciones del usuario, así el plazo las puede cortar
+solver_pool = SolverPool(app)
 
 @app.route('/solve', methods=['POST'])
 def bisection_solve():
@@ -112,120 +131,47 @@ def bisection_solve():
                 "error": f"El número máximo de intentos debe ser un número entero. Ejemplo: 100. Recibido: {data['max_iterations']}"
             }), 400
 
-        try:
-            f = parse_function(function_str)
-        except ValueError as e:
+        mode = data.get('mode', 'bisection')
+        if mode not in ('bisection', 'brent', 'chebyshev'):
             return jsonify({
-                "error": f"Error en la función matemática: {str(e)}. Verifica que esté escrita correctamente. Ejemplos válidos: 'x**2 - 4', 'sin(x) - 0.5', 'log(x) - 1'"
+                "error": f"El modo debe ser 'bisection' (bisección clásica), 'brent' (método de Brent, más rápido) o 'chebyshev' (todas las raíces de una función suave). Recibido: {mode}"
             }), 400
-        except Exception as e:
-            return jsonify({
-                "error": f"No se pudo procesar la función matemática: {str(e)}. Si el problema continúa, contacta al soporte técnico."
-            }), 500
 
-        # Guardar los límites originales del intervalo
-        xi_original = xi
-        xu_original = xu
-
-        try:
-            f_xi = f(xi)
-            if not math.isfinite(f_xi):
-                return jsonify({
-                    "error": f"La función no se puede calcular correctamente en el límite inferior {xi}. Prueba con un valor diferente."
-                }), 400
-        except Exception as e:
+        # 'all_roots' es su propio cálculo (la matriz compañera): no se combina con otro modo
+        all_roots = bool(data.get('all_roots'))
+        if all_roots and mode != 'bisection':
             return jsonify({
-                "error": f"No se puede calcular la función en el límite inferior {xi}: {str(e)}. Verifica que la función y el límite sean compatibles."
+                "error": f"La opción 'all_roots' ya devuelve todas las raíces del intervalo y no se combina con el modo '{mode}'. Envía 'all_roots' sin 'mode', o usa el modo 'chebyshev' para funciones que no son polinomios."
             }), 400
 
         try:
-            f_xu = f(xu)
-            if not math.isfinite(f_xu):
-                return jsonify({
-                    "error": f"La función no se puede calcular correctamente en el límite superior {xu}. Prueba con un valor diferente."
-                }), 400
-        except Exception as e:
+            validate_function(function_str)
+            # Con los datos ya validados, un cálculo idéntico se responde desde la caché sin
+            # interpretar la función
+            cached = cached_result(function=function_str, xi=xi, xu=xu, tolerance=tolerancia,
+                                   max_iterations=max_iteraciones, mode=mode, all_roots=all_roots)
+            if cached is not None:
+                return cached
+            f = parse_function(function_str)
+        except ValueError as e:
             return jsonify({
-                "error": f"No se puede calcular la función en el límite superior {xu}: {str(e)}. Verifica que la función y el límite sean compatibles."
+                "error": f"Error en la función matemática: {str(e)}. Verifica que esté escrita correctamente. Ejemplos válidos: 'x**2 - 4', 'sin(x) - 0.5', 'log(x) - 1'"
             }), 400
-
-        # Verificar raíces exactas en los extremos
-        try:
-            if abs(f_xi) < tolerancia:
-                return jsonify({
-                    "function": function_str,
-                    "root": float(xi),
-                    "iterations": 0,
-                    "error": 0.0,
-                    "converged": True,
-                    "message": f"¡Raíz exacta encontrada en el límite inferior! x = {xi}",
-                    "iterations_detail": [],
-                    "interval_used": [xi_original, xu_original]
-                })
-            
-            if abs(f_xu) < tolerancia:
-                return jsonify({
-                    "function": function_str,
-                    "root": float(xu),
-                    "iterations": 0,
-                    "error": 0.0,
-                    "converged": True,
-                    "message": f"¡Raíz exacta encontrada en el límite superior! x = {xu}",
-                    "iterations_detail": [],
-                    "interval_used": [xi_original, xu_original]
-                })
-            
-            # Si no hay cambio de signo en los extremos, buscar dentro del intervalo
-            if f_xi * f_xu >= 0:
-                interval_result = find_root_within_interval(f, xi_original, xu_original, tolerancia)
-                if interval_result['found']:
-                    if interval_result['strategy'] == 'exact_root':
-                        # Si encontramos una raíz exacta, devolverla directamente
-                        root_value = interval_result['root']
-                        return jsonify({
-                            "function": function_str,
-                            "root": float(root_value),
-                            "iterations": 0,
-                            "error": 0.0,
-                            "converged": True,
-                            "message": f"¡Raíz exacta encontrada! x = {root_value:.6f}",
-                            "iterations_detail": [],
-                            "interval_used": [xi_original, xu_original]
-                        })
-                    else:
-                        # Usar el subintervalo encontrado para bisección
-                        xi, xu = interval_result['xi'], interval_result['xu']
-                        multiple_roots_info = interval_result.get('multiple_roots_info', None)
-                else:
-                    return jsonify({
-                        "error": f"No se encontró ninguna raíz dentro del intervalo [{xi_original}, {xu_original}]. {interval_result['message']} Para usar el método de bisección, la función debe cambiar de signo dentro del intervalo especificado.",
-                        "interval_searched": [xi_original, xu_original],
-                        "f_xi": f_xi,
-                        "f_xu": f_xu
-                    }), 400
+        except SolverError:
+            raise
         except Exception as e:
             return jsonify({
-                "error": f"Error al buscar raíces dentro del intervalo: {str(e)}. Contacta al soporte técnico si el problema persiste."
+                "error": f"No se pudo procesar la función matemática: {str(e)}. Si el problema continúa, contacta al soporte técnico."
             }), 500
 
-        try:
-            result = biseccion(f, function_str, xi, xu, tolerancia, max_iteraciones)
-            
-            # Agregar información del intervalo original
-            result['interval_used'] = [xi_original, xu_original]
-            result['subinterval_found'] = [xi, xu] if (xi != xi_original or xu != xu_original) else None
-            
-            if 'multiple_roots_info' in locals() and multiple_roots_info:
-                if result.get('converged', False):
-                    current_message = result.get('message', '')
-                    result['message'] = f"{current_message} {multiple_roots_info}"
-            
-            return jsonify(result)
-        except Exception as e:
-            return jsonify({
-                "error": f"Error durante el cálculo: {str(e)}. Si el problema continúa, contacta al soporte técnico."
-            }), 500
+        # Revisiones en los extremos y cálculo, en una sola llamada al proceso de cálculo
+        with track_phase('compute'):
+            result, status = solver_pool.run(resolver_biseccion, f, function_str, xi, xu, tolerancia,
+                                             max_iteraciones, mode, all_roots)
+        return json_response(result), status
 
+    except SolverError:
+        raise
     except Exception as e:
         return jsonify({
             "error": f"Error interno: {str(e)}. Si el problema continúa, contacta al soporte técnico."
@@ -240,24 +186,205 @@ def health_check():
             "error": f"Error en la verificación del sistema: {str(e)}"
         }), 500
 
-def parse_function(function_str):
-    x = symbols('x')
-    try:
-        dangerous_elements = ['__', 'import', 'exec', 'eval', 'open', 'file']
-        for element in dangerous_elements:
-            if element in function_str.lower():
-                raise ValueError(f"La función contiene elementos no permitidos para seguridad")
+# Aritmética de intervalos sobre el mismo subconjunto: cada nodo recibe los extremos de
+# muchos intervalos a la vez (arreglos) y devuelve una cota de f en cada uno, redondeada
+# hacia afuera. Un intervalo vacío (lo > hi) es un tramo fuera del dominio, donde f no da
+# valores finitos; un extremo NaN se trata como no acotado, así que nunca descarta nada.
+def rounded(lo, hi, *operands):
+    empty = lo > hi
+    for operand in operands:
+        empty = empty | (operand[0] > operand[1])
+    lo = np.where(np.isnan(lo), -np.inf, np.nextafter(lo, -np.inf))
+    hi = np.where(np.isnan(hi), np.inf, np.nextafter(hi, np.inf))
+    return np.where(empty, np.inf, lo), np.where(empty, -np.inf, hi)
+
+def interval_add(a, b):
+    return rounded(a[0] + b[0], a[1] + b[1], a, b)
+
+def interval_sub(a, b):
+    return rounded(a[0] - b[1], a[1] - b[0], a, b)
+
+def interval_mul(a, b):
+    products = np.stack((a[0] * b[0], a[0] * b[1], a[1] * b[0], a[1] * b[1]))
+    return rounded(products.min(axis=0), products.max(axis=0), a, b)
+
+def interval_div(a, b):
+    # Un divisor que contiene al cero no acota nada
+    spans_zero = (b[0] <= 0) & (b[1] >= 0)
+    inverse = rounded(np.where(spans_zero, -np.inf, 1 / b[1]), np.where(spans_zero, np.inf, 1 / b[0]), b)
+    return interval_mul(a, inverse)
+
+def interval_pow(a, b):
+    # Con base positiva a**b = exp(b·log a); si la base toca el cero o es negativa no se acota
+    bound = interval_exp(interval_mul(b, interval_log(a)))
+    positive = a[0] > 0
+    return rounded(np.where(positive, bound[0], -np.inf), np.where(positive, bound[1], np.inf), a, b)
 
-        expr = sympify(function_str)
-        func = lambdify(x, expr, modules=['numpy', 'math'])
+def interval_power(a, p):
+    """Potencia con exponente constante p, que es el caso habitual (x**2, x**0.5, x**-1)."""
+    if p < 0:
+        return interval_div(rounded(np.ones_like(a[0]), np.ones_like(a[1]), a), interval_power(a, -p))
+    if p == 0:
+        return rounded(np.ones_like(a[0]), np.ones_like(a[1]), a)
+    if not p.is_integer():
+        # Como en NumPy, una base negativa con exponente fraccionario no da un valor real
+        lo = np.maximum(a[0], 0.0)
+        return rounded(lo ** p, a[1] ** p, (lo, a[1]))
+    lo_p, hi_p = a[0] ** p, a[1] ** p
+    if p % 2:
+        return rounded(lo_p, hi_p, a)
+    low = np.where(a[0] >= 0, lo_p, np.where(a[1] <= 0, hi_p, 0.0))
+    return rounded(low, np.maximum(lo_p, hi_p), a)
 
-        if not callable(func):
-            raise ValueError("No se pudo crear una función matemática válida")
+def monotone(func, low=-np.inf, high=np.inf, decreasing=False):
+    # Función monótona en su dominio [low, high]; la parte del tramo fuera de él se ignora
+    def apply(a):
+        lo, hi = np.maximum(a[0], low), np.minimum(a[1], high)
+        f_lo, f_hi = func(lo), func(hi)
+        return rounded(f_hi, f_lo, (lo, hi)) if decreasing else rounded(f_lo, f_hi, (lo, hi))
+    return apply
 
-        return func
+interval_exp = monotone(np.exp)
+interval_log = monotone(np.log, low=0.0)
+
+def interval_sin(a):
+    lo, hi = a
+    s_lo, s_hi = np.sin(lo), np.sin(hi)
+    # Máximos en π/2 + 2kπ y mínimos en -π/2 + 2kπ; la holgura solo puede ensanchar la cota
+    slack = 1e-9 * (1 + np.abs(hi))
+    peak = np.pi / 2 + 2 * np.pi * np.ceil((lo - np.pi / 2) / (2 * np.pi) - 1e-9)
+    trough = -np.pi / 2 + 2 * np.pi * np.ceil((lo + np.pi / 2) / (2 * np.pi) - 1e-9)
+    full = ~np.isfinite(hi - lo) | (hi - lo >= 2 * np.pi)
+    low = np.where(full | (trough <= hi + slack), -1.0, np.minimum(s_lo, s_hi))
+    high = np.where(full | (peak <= hi + slack), 1.0, np.maximum(s_lo, s_hi))
+    return rounded(low, high, a)
+
+def interval_cos(a):
+    return interval_sin(interval_add(a, (np.full_like(a[0], np.pi / 2), np.full_like(a[1], np.pi / 2))))
+
+def interval_tan(a):
+    lo, hi = a
+    # Sin una asíntota (π/2 + kπ) dentro del tramo, tan es creciente
+    pole = np.pi / 2 + np.pi * np.ceil((lo - np.pi / 2) / np.pi - 1e-9)
+    unbounded = ~np.isfinite(hi - lo) | (hi - lo >= np.pi) | (pole <= hi + 1e-9 * (1 + np.abs(hi)))
+    return rounded(np.where(unbounded, -np.inf, np.tan(lo)), np.where(unbounded, np.inf, np.tan(hi)), a)
+
+def even_bound(func):
+    # Funciones pares crecientes en |x| (cosh, abs): el mínimo está en el punto más cercano a 0
+    def apply(a):
+        near = np.where((a[0] <= 0) & (a[1] >= 0), 0.0, np.minimum(np.abs(a[0]), np.abs(a[1])))
+        return rounded(func(near), func(np.maximum(np.abs(a[0]), np.abs(a[1]))), a)
+    return apply
+
+INTERVAL_FUNCTIONS = {
+    'sin': interval_sin, 'cos': interval_cos, 'tan': interval_tan,
+    'asin': monotone(np.arcsin, -1.0, 1.0), 'acos': monotone(np.arccos, -1.0, 1.0, decreasing=True),
+    'atan': monotone(np.arctan),
+    'sinh': monotone(np.sinh), 'cosh': even_bound(np.cosh), 'tanh': monotone(np.tanh),
+    'exp': interval_exp, 'log': interval_log, 'ln': interval_log, 'sqrt': monotone(np.sqrt, low=0.0),
+    'abs': even_bound(np.abs), 'Abs': even_bound(np.abs),
+}
+INTERVAL_OPERATORS = {ast.Add: interval_add, ast.Sub: interval_sub, ast.Mult: interval_mul, ast.Div: interval_div, ast.Pow: interval_pow}
+
+def constant_value(node):
+    # Subexpresión sin variables (2, -1, 1/2, pi/4): se evalúa una vez con el compilador restringido
+    used = set()
+    source = fast_source(node, ('x',), used)
+    return None if used else float(eval(source, {'np': np, '__builtins__': {}}))
+
+def interval_node(node):
+    value = constant_value(node)
+    if value is not None:
+        return lambda lo, hi: rounded(np.full_like(lo, value), np.full_like(hi, value))
+    if isinstance(node, ast.Name):
+        return lambda lo, hi: (lo, hi)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+        exponent = constant_value(node.right)
+        if exponent is not None:
+            base = interval_node(node.left)
+            return lambda lo, hi: interval_power(base(lo, hi), exponent)
+    if isinstance(node, ast.BinOp):
+        left, right, op = interval_node(node.left), interval_node(node.right), INTERVAL_OPERATORS[type(node.op)]
+        return lambda lo, hi: op(left(lo, hi), right(lo, hi))
+    if isinstance(node, ast.UnaryOp):
+        operand = interval_node(node.operand)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        return lambda lo, hi: (lambda a: (-a[1], -a[0]))(operand(lo, hi))
+    func, argument = INTERVAL_FUNCTIONS[node.func.id], interval_node(node.args[0])
+    return lambda lo, hi: func(argument(lo, hi))
+
+def interval_function(node):
+    """
+    Cota de f sobre intervalos para un árbol que ya aceptó fast_source. Recibe arreglos
+    lo, hi con los extremos y devuelve (f_lo, f_hi) con f(x) en [f_lo, f_hi] para todo x.
+    """
+    enclosure = interval_node(node)
+
+    def evaluate(lo, hi):
+        with np.errstate(all='ignore'):
+            return enclosure(np.asarray(lo, dtype=float), np.asarray(hi, dtype=float))
+    return evaluate
+
+def validate_function(function_str):
+    dangerous_elements = ['__', 'import', 'exec', 'eval', 'open', 'file']
+    for element in dangerous_elements:
+        if element in function_str.lower():
+            raise ValueError(f"La función contiene elementos no permitidos para seguridad")
+
+def compile_function(function_str):
+    # Receta de la RemoteFunction: lo que pasa por SymPy se compila en un proceso de cálculo
+    func = build_function(function_str, horner=True, interval=interval_function)
+    if not callable(func):
+        raise ValueError("No se pudo crear una función matemática válida")
+    return func
+
+def parse_function(function_str):
+    try:
+        return solver_pool.function(
+            'f', compile_function, function_str,
+            local=compile_expression(function_str, horner=True, interval=interval_function) is not None
+        )
+    except SolverError:
+        raise
     except Exception as e:
         raise ValueError(f"No se pudo interpretar la función '{function_str}': {str(e)}")
 
+# Búsqueda por subdivisión: las celdas candidatas terminan INTERVAL_SCAN_REFINE veces más
+# finas que el muestreo uniforme, así se separan raíces más cercanas que su paso.
+INTERVAL_SCAN_ENABLED = os.environ.get('INTERVAL_SCAN', '1') != '0'
+INTERVAL_SCAN_REFINE = 16
+
+def interval_scan_points(enclosure, xi, xu, tolerance, num_points):
+    """
+    Subdivide [xi, xu] por mitades y descarta cada celda donde la aritmética de intervalos
+    demuestra que |f| >= tolerance, es decir, donde no puede haber raíces. Nunca quedan
+    más de num_points celdas. Devuelve los extremos de las celdas que sobreviven (y los
+    del intervalo) ordenados, o una lista vacía si la cota no se pudo evaluar.
+    """
+    lo, hi = np.array([float(xi)]), np.array([float(xu)])
+    min_width = (xu - xi) / (num_points * INTERVAL_SCAN_REFINE)
+    try:
+        while True:
+            f_lo, f_hi = enclosure(lo, hi)
+            possible = ~((f_lo >= tolerance) | (f_hi <= -tolerance))
+            lo, hi = lo[possible], hi[possible]
+            if not len(lo) or hi[0] - lo[0] <= min_width or 2 * len(lo) > num_points:
+                break
+            check_deadline()
+            mid = lo + (hi - lo) / 2
+            lo, hi = np.column_stack((lo, mid)).ravel(), np.column_stack((mid, hi)).ravel()
+    except SolverError:
+        raise
+    except Exception:
+        return []
+    return sorted({xi, xu, *lo.tolist(), *hi.tolist()})
+
+def uniform_points(xi, xu, num_points):
+    step = (xu - xi) / num_points
+    # Asegurar que no excedamos los límites por errores de punto flotante
+    return [max(xi, min(xi + i * step, xu)) for i in range(num_points + 1)]
+
 def find_root_within_interval(f, xi_original, xu_original, tolerance):
     """
     Busca raíces ÚNICAMENTE dentro del intervalo especificado.
@@ -271,29 +398,27 @@ def find_root_within_interval(f, xi_original, xu_original, tolerance):
     num_points = min(max(500, int(abs(xu_original - xi_original) * 100)), 2000)
     
     try:
-        # Crear array de puntos de prueba dentro del intervalo
+        # Con una cota por intervalos solo se muestrean los tramos donde puede haber raíces
+        enclosure = getattr(getattr(f, 'raw', f), 'interval', None)
         x_points = []
-        step = (xu_original - xi_original) / num_points
-        
-        for i in range(num_points + 1):
-            x_test = xi_original + i * step
-            # Asegurar que no excedamos los límites por errores de punto flotante
-            x_test = max(xi_original, min(x_test, xu_original))
-            x_points.append(x_test)
+        if enclosure is not None and INTERVAL_SCAN_ENABLED:
+            x_points = interval_scan_points(enclosure, xi_original, xu_original, tolerance, num_points)
+
+        # Crear array de puntos de prueba dentro del intervalo
+        pruned = bool(x_points)
+        if not x_points:
+            x_points = uniform_points(xi_original, xu_original, num_points)
         
-        # Evaluar función en todos los puntos
+        # Evaluar función en todos los puntos, de una vez con el núcleo de NumPy
         evaluations = []
-        for x_test in x_points:
-            try:
-                f_test = f(x_test)
-                if math.isfinite(f_test):
-                    evaluations.append((x_test, f_test))
-                    
-                    # Verificar si es una raíz exacta
-                    if abs(f_test) < tolerance:
-                        exact_roots.append(x_test)
-            except:
-                continue
+        f_points = evaluate_vectorized(f, np.asarray(x_points, dtype=np.float64)).tolist()
+        for x_test, f_test in zip(x_points, f_points):
+            if math.isfinite(f_test):
+                evaluations.append((x_test, f_test))
+                
+                # Verificar si es una raíz exacta; muestras seguidas bajo la tolerancia son la misma raíz
+                if abs(f_test) < tolerance and (len(evaluations) < 2 or abs(evaluations[-2][1]) >= tolerance):
+                    exact_roots.append(x_test)
         
         # Si no pudimos evaluar ningún punto, retornar error
         if not evaluations:
@@ -355,6 +480,12 @@ def find_root_within_interval(f, xi_original, xu_original, tolerance):
             }
         
         # Si no se encontraron raíces, proporcionar información útil
+        if pruned:
+            # La poda descartó justo los tramos donde |f| es grande y el muestreo no llega al
+            # mínimo: el punto más cercano a cero sale del muestreo uniforme
+            uniform = uniform_points(xi_original, xu_original, num_points)
+            f_uniform = evaluate_vectorized(f, np.asarray(uniform, dtype=np.float64)).tolist()
+            evaluations = [(x_test, f_test) for x_test, f_test in zip(uniform, f_uniform) if math.isfinite(f_test)] or evaluations
         # Encontrar el punto donde la función está más cerca de cero
         min_abs_eval = min(evaluations, key=lambda x: abs(x[1]))
         x_closest, f_closest = min_abs_eval
@@ -370,6 +501,8 @@ def find_root_within_interval(f, xi_original, xu_original, tolerance):
             'strategy': 'no_roots_found'
         }
         
+    except SolverError:
+        raise
     except Exception as e:
         return {
             'found': False,
@@ -379,10 +512,173 @@ def find_root_within_interval(f, xi_original, xu_original, tolerance):
             'strategy': 'search_error'
         }
 
+def resolver_biseccion(f, function_str, xi, xu, tolerancia, max_iteraciones, mode, all_roots):
+    """
+    Todo lo que evalúa f después de validar la petición: las revisiones en los extremos,
+    la búsqueda de un subintervalo y el método. Devuelve (cuerpo, estado HTTP).
+    """
+    # Guardar los límites originales del intervalo
+    xi_original = xi
+    xu_original = xu
+
+    try:
+        f_xi = f(xi)
+        if not math.isfinite(f_xi):
+            return {
+                "error": f"La función no se puede calcular correctamente en el límite inferior {xi}. Prueba con un valor diferente."
+            }, 400
+    except SolverError:
+        raise
+    except Exception as e:
+        return {
+            "error": f"No se puede calcular la función en el límite inferior {xi}: {str(e)}. Verifica que la función y el límite sean compatibles."
+        }, 400
+
+    try:
+        f_xu = f(xu)
+        if not math.isfinite(f_xu):
+            return {
+                "error": f"La función no se puede calcular correctamente en el límite superior {xu}. Prueba con un valor diferente."
+            }, 400
+    except SolverError:
+        raise
+    except Exception as e:
+        return {
+            "error": f"No se puede calcular la función en el límite superior {xu}: {str(e)}. Verifica que la función y el límite sean compatibles."
+        }, 400
+
+    # Polinomios: todas las raíces del intervalo salen de la matriz compañera, sin iterar
+    if all_roots:
+        coefficients = getattr(f.raw, 'coefficients', None)
+        if coefficients is None:
+            return {
+                "error": "La opción 'all_roots' solo está disponible para polinomios (por ejemplo 'x**3 - 2*x - 5'). Para otras funciones suaves usa el modo 'chebyshev'."
+            }, 400
+        result = polynomial_all_roots(coefficients, function_str, xi, xu)
+        result['interval_used'] = [xi_original, xu_original]
+        return result, 200
+
+    # El modo Chebyshev devuelve todas las raíces del intervalo: no necesita cambio de signo
+    if mode == 'chebyshev':
+        try:
+            result = chebyshev_roots(f, function_str, xi, xu, tolerancia)
+            result['interval_used'] = [xi_original, xu_original]
+            return result, 200
+        except SolverError:
+            raise
+        except Exception as e:
+            return {
+                "error": f"Error durante el cálculo: {str(e)}. Si el problema continúa, contacta al soporte técnico."
+            }, 500
+
+    multiple_roots_info = None
+    # Verificar raíces exactas en los extremos
+    try:
+        if abs(f_xi) < tolerancia:
+            return {
+                "function": function_str,
+                "root": float(xi),
+                "iterations": 0,
+                "error": 0.0,
+                "converged": True,
+                "message": f"¡Raíz exacta encontrada en el límite inferior! x = {xi}",
+                "iterations_detail": [],
+                "interval_used": [xi_original, xu_original]
+            }, 200
+
+        if abs(f_xu) < tolerancia:
+            return {
+                "function": function_str,
+                "root": float(xu),
+                "iterations": 0,
+                "error": 0.0,
+                "converged": True,
+                "message": f"¡Raíz exacta encontrada en el límite superior! x = {xu}",
+                "iterations_detail": [],
+                "interval_used": [xi_original, xu_original]
+            }, 200
+
+        # Si no hay cambio de signo en los extremos, buscar dentro del intervalo
+        if f_xi * f_xu >= 0:
+            interval_result = find_root_within_interval(f, xi_original, xu_original, tolerancia)
+            if interval_result['found']:
+                if interval_result['strategy'] == 'exact_root':
+                    # Si encontramos una raíz exacta, devolverla directamente
+                    root_value = interval_result['root']
+                    return {
+                        "function": function_str,
+                        "root": float(root_value),
+                        "iterations": 0,
+                        "error": 0.0,
+                        "converged": True,
+                        "message": f"¡Raíz exacta encontrada! x = {root_value:.6f}",
+                        "iterations_detail": [],
+                        "interval_used": [xi_original, xu_original]
+                    }, 200
+                else:
+                    # Usar el subintervalo encontrado para bisección
+                    xi, xu = interval_result['xi'], interval_result['xu']
+                    multiple_roots_info = interval_result.get('multiple_roots_info', None)
+            else:
+                return {
+                    "error": f"No se encontró ninguna raíz dentro del intervalo [{xi_original}, {xu_original}]. {interval_result['message']} Para usar el método de bisección, la función debe cambiar de signo dentro del intervalo especificado.",
+                    "interval_searched": [xi_original, xu_original],
+                    "f_xi": f_xi,
+                    "f_xu": f_xu
+                }, 400
+    except SolverError:
+        raise
+    except Exception as e:
+        return {
+            "error": f"Error al buscar raíces dentro del intervalo: {str(e)}. Contacta al soporte técnico si el problema persiste."
+        }, 500
+
+    try:
+        if mode == 'brent':
+            result = brent(f, function_str, xi, xu, tolerancia, max_iteraciones)
+        else:
+            result = biseccion(f, function_str, xi, xu, tolerancia, max_iteraciones)
+
+        # Agregar información del intervalo original
+        result['interval_used'] = [xi_original, xu_original]
+        result['subinterval_found'] = [xi, xu] if (xi != xi_original or xu != xu_original) else None
+
+        if multiple_roots_info:
+            if result.get('converged', False):
+                current_message = result.get('message', '')
+                result['message'] = f"{current_message} {multiple_roots_info}"
+
+        return result, 200
+    except SolverError:
+        raise
+    except Exception as e:
+        return {
+            "error": f"Error durante el cálculo: {str(e)}. Si el problema continúa, contacta al soporte técnico."
+        }, 500
+
 def biseccion(f, function_str, xi, xu, tolerancia, max_iteraciones):
     iteraciones = []
 
+    # f(xi) se conserva entre pasos: solo cambia cuando xi se mueve al punto medio
+    try:
+        f_xi = f(xi)
+        if not math.isfinite(f_xi):
+            return {
+                "function": function_str,
+                "error": "La función no se puede calcular en el límite inferior del intervalo.",
+                "converged": False,
+                "iterations_detail": iteraciones
+            }
+    except Exception as e:
+        return {
+            "function": function_str,
+            "error": f"Error al calcular la función en el límite inferior: {str(e)}",
+            "converged": False,
+            "iterations_detail": iteraciones
+        }
+
     for i in range(max_iteraciones):
+        check_deadline(iteraciones)
         try:
             xr = (xi + xu) / 2
             
@@ -441,28 +737,11 @@ def biseccion(f, function_str, xi, xu, tolerancia, max_iteraciones):
                     "iterations_detail": iteraciones
                 }
 
-            try:
-                f_xi = f(xi)
-                if not math.isfinite(f_xi):
-                    return {
-                        "function": function_str,
-                        "error": f"La función no se puede calcular en el límite inferior en el paso {i+1}.",
-                        "converged": False,
-                        "iterations_detail": iteraciones
-                    }
-                
-                if fxr * f_xi > 0:
-                    xi = xr
-                else:
-                    xu = xr
-                    
-            except Exception as e:
-                return {
-                    "function": function_str,
-                    "error": f"Error al actualizar el intervalo en el paso {i+1}: {str(e)}",
-                    "converged": False,
-                    "iterations_detail": iteraciones
-                }
+            if fxr * f_xi > 0:
+                xi = xr
+                f_xi = fxr
+            else:
+                xu = xr
 
         except OverflowError:
             return {
@@ -493,5 +772,286 @@ def biseccion(f, function_str, xi, xu, tolerancia, max_iteraciones):
         "iterations_detail": iteraciones
     }
 
+def brent(f, function_str, xi, xu, tolerancia, max_iteraciones):
+    """
+    Método de Brent: combina interpolación cuadrática inversa y secante con
+    bisección de respaldo. Conserva siempre un intervalo con cambio de signo
+    y evalúa la función una sola vez por paso.
+    """
+    iteraciones = []
+
+    def failure(message):
+        return {
+            "function": function_str,
+            "error": message,
+            "converged": False,
+            "method": "brent",
+            "iterations_detail": iteraciones
+        }
+
+    try:
+        a, b = xi, xu
+        fa, fb = f(a), f(b)
+        evaluations = 2
+        if not (math.isfinite(fa) and math.isfinite(fb)):
+            return failure("La función no se puede calcular en los límites del intervalo.")
+        if fa * fb > 0:
+            return failure("La función no cambia de signo en el intervalo. El método de Brent necesita un cambio de signo.")
+
+        c, fc = a, fa
+        d = e = b - a
+
+        for i in range(max_iteraciones):
+            check_deadline(iteraciones)
+            if fb * fc > 0:
+                c, fc = a, fa
+                d = e = b - a
+            if abs(fc) < abs(fb):
+                a, b, c = b, c, b
+                fa, fb, fc = fb, fc, fb
+
+            tol1 = 2 * 2.220446049250313e-16 * abs(b) + 0.5 * tolerancia
+            xm = 0.5 * (c - b)
+
+            step_type = "bisection"
+            if abs(e) >= tol1 and abs(fa) > abs(fb):
+                s = fb / fa
+                if a == c:
+                    p = 2 * xm * s
+                    q = 1 - s
+                    candidate = "secant"
+                else:
+                    q = fa / fc
+                    r = fb / fc
+                    p = s * (2 * xm * q * (q - r) - (b - a) * (r - 1))
+                    q = (q - 1) * (r - 1) * (s - 1)
+                    candidate = "inverse_quadratic"
+                if p > 0:
+                    q = -q
+                p = abs(p)
+                # Se acepta la interpolación solo si cae dentro del intervalo y reduce el paso lo suficiente
+                if 2 * p < min(3 * xm * q - abs(tol1 * q), abs(e * q)):
+                    e = d
+                    d = p / q
+                    step_type = candidate
+                else:
+                    d = e = xm
+            else:
+                d = e = xm
+
+            a, fa = b, fb
+            b += d if abs(d) > tol1 else math.copysign(tol1, xm)
+            fb = f(b)
+            evaluations += 1
+
+            if not math.isfinite(fb):
+                return failure(f"La función no se puede calcular correctamente en x = {b} (paso {i+1}). Prueba con un intervalo diferente.")
+
+            if fb * fc > 0:
+                c, fc = a, fa
+                d = e = b - a
+            error = abs(c - b) / 2
+
+            iteraciones.append({
+                "step": i + 1,
+                "xi": round(float(min(b, c)), 10),
+                "xu": round(float(max(b, c)), 10),
+                "xr": round(float(b), 10),
+                "f(xr)": round(float(fb), 10),
+                "error": round(float(error), 10),
+                "step_type": step_type
+            })
+
+            if abs(fb) < tolerancia or error < tolerancia:
+                return {
+                    "function": function_str,
+                    "root": float(b),
+                    "iterations": i + 1,
+                    "error": float(error),
+                    "converged": True,
+                    "method": "brent",
+                    "function_evaluations": evaluations,
+                    "message": f"¡Solución encontrada! El método de Brent convergió en {i+1} pasos con {evaluations} evaluaciones de la función",
+                    "iterations_detail": iteraciones
+                }
+
+    except OverflowError:
+        return failure(f"Los números se volvieron demasiado grandes en el paso {len(iteraciones) + 1}. Prueba con un intervalo más pequeño.")
+    except ZeroDivisionError:
+        return failure(f"Se intentó dividir por cero en el paso {len(iteraciones) + 1}. Verifica tu función.")
+    except SolverError:
+        raise
+    except Exception as e:
+        return failure(f"Error inesperado en el paso {len(iteraciones) + 1}: {str(e)}. El cálculo no puede continuar.")
+
+    return failure(f"El método no encontró una solución después de {max_iteraciones} intentos. Prueba aumentando el número de intentos máximos o ajustando la precisión.")
+
+def polynomial_all_roots(coefficients, function_str, xi, xu):
+    roots = polynomial_roots(coefficients, xi, xu)
+    degree = len(coefficients) - 1
+    if roots:
+        message = f"El polinomio de grado {degree} tiene {len(roots)} raíces reales en [{xi}, {xu}], obtenidas de la matriz compañera sin iterar"
+    else:
+        message = f"El polinomio de grado {degree} no tiene raíces reales en [{xi}, {xu}]"
+    return {
+        "function": function_str,
+        "roots": roots,
+        "root": roots[0] if roots else None,
+        "converged": bool(roots),
+        "method": "polynomial",
+        "degree": degree,
+        "coefficients": list(coefficients),
+        "iterations": 0,
+        "message": message
+    }
+
+# Modo 'chebyshev': interpola f en puntos de Chebyshev con grado adaptativo (coeficientes
+# por FFT) y obtiene todas las raíces reales de una vez como valores propios de la matriz
+# colega. Si un tramo no se resuelve con CHEBYSHEV_MAX_DEGREE se parte en dos.
+CHEBYSHEV_MAX_DEGREE = int(os.environ.get('CHEBYSHEV_MAX_DEGREE', '256'))
+CHEBYSHEV_MAX_PIECES = int(os.environ.get('CHEBYSHEV_MAX_PIECES', '32'))
+CHEBYSHEV_MIN_DEGREE = 16
+# Coeficientes por debajo de esta fracción del máximo de |f| se consideran ruido de redondeo
+CHEBYSHEV_CHOP = 1e-13
+CHEBYSHEV_POLISH_STEPS = 3
+
+def chebyshev_coefficients(values):
+    # DCT-I por FFT de la extensión par: valores en cos(πk/n) -> coeficientes de T_0..T_n
+    n = len(values) - 1
+    coefficients = np.fft.rfft(np.concatenate((values, values[-2:0:-1]))).real[:n + 1] / n
+    coefficients[0] /= 2
+    coefficients[n] /= 2
+    return coefficients
+
+def chebyshev_piece(f, a, b):
+    """
+    Interpolante de f en [a, b]: duplica el grado (los puntos nuevos se intercalan con los
+    anteriores, que se reutilizan) hasta que la cola de coeficientes cae al nivel del
+    redondeo. Devuelve (coeficientes recortados o None si no se resolvió, evaluaciones).
+    """
+    n = CHEBYSHEV_MIN_DEGREE
+    values = evaluate_vectorized(f, (a + b) / 2 + (b - a) / 2 * np.cos(np.pi * np.arange(n + 1) / n))
+    evaluations = n + 1
+    while True:
+        if not np.all(np.isfinite(values)):
+            raise ValueError(f"La función no es finita en todo el tramo [{a:.6f}, {b:.6f}]. El modo 'chebyshev' necesita una función continua en el intervalo.")
+        if not np.any(values):
+            raise ValueError("La función es constantemente cero en el intervalo: todos sus puntos son raíces.")
+        coefficients = chebyshev_coefficients(values)
+        noise = CHEBYSHEV_CHOP * max(np.abs(values).max(), np.finfo(float).tiny)
+        if np.abs(coefficients[-max(4, n // 8):]).max() <= noise:
+            significant = np.flatnonzero(np.abs(coefficients) > noise)
+            return coefficients[:significant[-1] + 1 if significant.size else 1], evaluations
+        if n >= CHEBYSHEV_MAX_DEGREE:
+            return None, evaluations
+        check_deadline()
+        new_values = evaluate_vectorized(f, (a + b) / 2 + (b - a) / 2 * np.cos(np.pi * np.arange(1, 2 * n, 2) / (2 * n)))
+        evaluations += n
+        merged = np.empty(2 * n + 1)
+        merged[0::2], merged[1::2] = values, new_values
+        values, n = merged, 2 * n
+
+def chebyshev_piece_roots(f, coefficients, a, b):
+    # Valores propios casi reales dentro de [-1, 1], llevados a [a, b] y pulidos con Newton sobre f
+    if len(coefficients) < 2:
+        return np.empty(0)
+    with np.errstate(all='ignore'):
+        eigenvalues = np.polynomial.chebyshev.chebroots(coefficients)
+    t = eigenvalues[(np.abs(eigenvalues.imag) < 1e-6) & (np.abs(eigenvalues.real) <= 1 + 1e-8)].real
+    roots = (a + b) / 2 + (b - a) / 2 * np.clip(t, -1, 1)
+    derivative = np.polynomial.chebyshev.chebder(coefficients) * 2 / (b - a)
+    f_roots = evaluate_vectorized(f, roots)
+    for _ in range(CHEBYSHEV_POLISH_STEPS):
+        with np.errstate(all='ignore'):
+            slope = np.polynomial.chebyshev.chebval((2 * roots - a - b) / (b - a), derivative)
+            candidate = np.clip(roots - f_roots / slope, a, b)
+        f_candidate = evaluate_vectorized(f, candidate)
+        # Solo se acepta el paso si reduce |f|: protege las raíces múltiples y los extremos
+        better = np.isfinite(f_candidate) & (np.abs(f_candidate) < np.abs(f_roots))
+        roots, f_roots = np.where(better, candidate, roots), np.where(better, f_candidate, f_roots)
+    return roots
+
+def chebyshev_roots(f, function_str, xi, xu, tolerancia):
+    def failure(message):
+        return {
+            "function": function_str,
+            "error": message,
+            "converged": False,
+            "method": "chebyshev"
+        }
+
+    try:
+        pending = [(xi, xu)]
+        pieces = []
+        evaluations = 0
+        while pending:
+            a, b = pending.pop()
+            coefficients, used = chebyshev_piece(f, a, b)
+            evaluations += used
+            if coefficients is None:
+                if len(pieces) + len(pending) + 2 > CHEBYSHEV_MAX_PIECES:
+                    return failure(f"La función no se pudo aproximar con {CHEBYSHEV_MAX_PIECES} tramos de grado {CHEBYSHEV_MAX_DEGREE}. Prueba con un intervalo más pequeño o con el modo 'bisection'.")
+                middle = a + (b - a) / 2
+                pending.extend([(middle, b), (a, middle)])
+                continue
+            pieces.append((a, b, coefficients))
+
+        roots = np.sort(np.concatenate([chebyshev_piece_roots(f, c, a, b) for a, b, c in pieces]))
+        residuals = np.abs(evaluate_vectorized(f, roots))
+        # Raíces repetidas (bordes de tramos, raíces múltiples): se conserva la de menor |f|
+        distinct = []
+        for root, residual in zip(roots.tolist(), residuals.tolist()):
+            if distinct and root - distinct[-1][0] <= max(tolerancia, 1e-10 * (xu - xi)):
+                if residual < distinct[-1][1]:
+                    distinct[-1] = (root, residual)
+                continue
+            distinct.append((root, residual))
+
+        degree = max(len(c) - 1 for _, _, c in pieces)
+        if distinct:
+            message = f"Se encontraron {len(distinct)} raíces en [{xi}, {xu}] con un interpolante de Chebyshev de grado {degree} ({evaluations} evaluaciones de la función)"
+        else:
+            message = f"La función no tiene raíces reales en [{xi}, {xu}] según su interpolante de Chebyshev de grado {degree}"
+        return {
+            "function": function_str,
+            "roots": [root for root, _ in distinct],
+            "residuals": [residual for _, residual in distinct],
+            "root": distinct[0][0] if distinct else None,
+            "converged": bool(distinct),
+            "method": "chebyshev",
+            "degree": degree,
+            "pieces": [{"xi": a, "xu": b, "degree": len(c) - 1} for a, b, c in sorted(pieces)],
+            "function_evaluations": evaluations,
+            "message": message
+        }
+    except SolverError:
+        raise
+    except ValueError as e:
+        return failure(str(e))
+    except Exception as e:
+        return failure(f"Error inesperado al construir el interpolante: {str(e)}. El cálculo no puede continuar.")
+
+# Calentamiento al arrancar: compila y evalúa funciones habituales antes de declararse listo.
+# WARMUP_EXPRESSIONS reemplaza la lista (separadas por ';'); WARMUP=0 lo desactiva.
+WARMUP_EXPRESSIONS = [e.strip() for e in os.environ.get('WARMUP_EXPRESSIONS', 'x**2 - 2;x**3 - 2*x - 5;cos(x) - x;exp(x) - 3*x;sin(x)').split(';') if e.strip()]
+
+def warm_expression(expression):
+    f = parse_function(expression)
+    for value in WARMUP_POINTS:
+        f(value)
+
+warmup = Warmup([({"expression": expression}, partial(warm_expression, expression))
+                 for expression in WARMUP_EXPRESSIONS], sympy=True, pool=solver_pool)
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    if not warmup.done.is_set():
+        return jsonify({"status": "warming_up", "method": "bisection"}), 503
+    return jsonify({"status": "ready", "method": "bisection", "warmup": warmup.as_dict()})
+
+# Con el recargador de Werkzeug solo se calienta el proceso que atiende las peticiones
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    warmup.start()
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001, debug=True)
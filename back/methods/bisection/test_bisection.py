@@ -0,0 +1,184 @@
+import math
+import socketserver
+import threading
+
+import pytest
+
+from common.cache import (MemoryCacheBackend, RedisCacheBackend, SqliteCacheBackend, cache_key,
+                          open_cache_backend, shared_cache)
+from common.expressions import shared_expression
+from common.result_cache import InFlight, single_flight
+
+def solve(client, **payload):
+    return client.post('/solve', json={'tolerance': 1e-8, 'max_iterations': 100, **payload})
+
+def test_bisection_converges_to_root(client):
+    response = solve(client, function='x**3 - 2*x - 5', xi=0, xu=3)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['converged']
+    assert body['root'] == pytest.approx(2.0945514815423265, abs=1e-7)
+
+def test_brent_converges_to_root(client):
+    response = solve(client, function='x**3 - 2*x - 5', xi=0, xu=3, mode='brent')
+    assert response.status_code == 200
+    assert response.get_json()['root'] == pytest.approx(2.0945514815423265, abs=1e-7)
+
+def test_pruned_scan_reports_closest_value_from_uniform_sample(client):
+    # El recorrido por intervalos descarta todo [-3, 3]; el mínimo de x**2 + 1 está en 0
+    response = solve(client, function='x**2 + 1', xi=-3, xu=3)
+    assert response.status_code == 400
+    assert 'El valor más cercano a cero fue f(0.000000) = 1.000000' in response.get_json()['error']
+
+def test_result_cache_key_uses_validated_parameters(client):
+    first = solve(client, function='x**2-3', xi=0, xu=3)
+    second = solve(client, function=' x**2 - 3 ', xi=0.0, xu=3.0, mode='bisection')
+    other = solve(client, function='x**2-3', xi=0, xu=2)
+    assert first.headers['X-Cache'] == 'MISS'
+    assert second.headers['X-Cache'] == 'HIT'
+    assert other.headers['X-Cache'] == 'MISS'
+    assert second.get_json()['root'] == first.get_json()['root']
+
+def test_conditional_request_with_cached_etag_returns_304(client):
+    first = solve(client, function='x**2 - 5', xi=0, xu=3)
+    etag = first.headers['ETag']
+    response = client.post('/solve', json={'function': 'x**2 - 5', 'xi': 0, 'xu': 3, 'tolerance': 1e-8, 'max_iterations': 100},
+                           headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+def test_invalid_expression_does_not_reach_cached_result(client):
+    assert solve(client, function='10*x - 5', xi=0, xu=3).status_code == 200
+    response = solve(client, function='1 0*x - 5', xi=0, xu=3)
+    assert response.status_code == 400
+    assert response.headers.get('X-Cache') != 'HIT'
+
+def test_poisoned_shared_expression_is_rejected(client):
+    payload = 'numpy.ctypeslib.load_library("libc.so.6", "/lib/x86_64-linux-gnu").system(b"true") + x'
+    shared_cache.set(cache_key('expression', ('x',), 'erf(x) - 0.5'), payload.encode(), 60)
+    assert shared_expression('erf(x) - 0.5') is None
+
+    # La función se compila de nuevo con SymPy y el resultado es el correcto
+    response = solve(client, function='erf(x) - 0.5', xi=0, xu=2)
+    assert response.status_code == 200
+    assert response.get_json()['root'] == pytest.approx(0.4769362762044699, abs=1e-7)
+
+class RespHandler(socketserver.StreamRequestHandler):
+    """Servidor RESP mínimo con GET y SET, para probar el cliente sin Redis."""
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            parts = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                parts.append(self.rfile.read(length + 2)[:-2])
+            if parts[0] == b'SET':
+                self.server.store[parts[1]] = parts[2]
+                self.wfile.write(b'+OK\r\n')
+            elif parts[1] in self.server.store:
+                value = self.server.store[parts[1]]
+                self.wfile.write(b'$%d\r\n%s\r\n' % (len(value), value))
+            else:
+                self.wfile.write(b'$-1\r\n')
+
+@pytest.fixture
+def resp_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), RespHandler)
+    server.daemon_threads = True
+    server.store = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_sqlite_backend_round_trip_and_expiry(tmp_path):
+    backend = SqliteCacheBackend(str(tmp_path / 'cache.db'), max_bytes=1024)
+    backend.set('a', b'uno', 60)
+    backend.set('b', b'dos', -1)
+    assert backend.get('a') == b'uno'
+    assert backend.get('b') is None
+    # Otra instancia sobre el mismo archivo ve las mismas entradas
+    assert SqliteCacheBackend(str(tmp_path / 'cache.db'), max_bytes=1024).get('a') == b'uno'
+
+def test_sqlite_backend_evicts_least_recently_used(tmp_path):
+    backend = SqliteCacheBackend(str(tmp_path / 'cache.db'), max_bytes=10)
+    backend.set('a', b'12345', 60)
+    backend.set('b', b'12345', 60)
+    backend.set('c', b'12345', 60)
+    assert backend.get('a') is None
+    assert backend.get('c') == b'12345'
+
+def test_redis_backend_speaks_resp(resp_server):
+    backend = RedisCacheBackend(*resp_server.server_address)
+    assert backend.get('falta') is None
+    backend.set('clave', b'valor\r\ncon salto', 60)
+    assert backend.get('clave') == b'valor\r\ncon salto'
+
+def test_redis_backend_without_server_degrades_to_misses():
+    with socketserver.TCPServer(('127.0.0.1', 0), RespHandler) as closed:
+        address = closed.server_address
+    backend = RedisCacheBackend(*address)
+    backend.set('clave', b'valor', 60)
+    assert backend.get('clave') is None
+
+def test_open_cache_backend_parses_urls(tmp_path):
+    assert isinstance(open_cache_backend('memory', 1024), MemoryCacheBackend)
+    assert isinstance(open_cache_backend(f'sqlite:///{tmp_path}/cache.db', 1024), SqliteCacheBackend)
+    redis = open_cache_backend('redis://:secreto@cache:6380/2', 1024)
+    assert (redis.host, redis.port, redis.db, redis.password) == ('cache', 6380, 2, 'secreto')
+    with pytest.raises(ValueError):
+        open_cache_backend('memcached://cache', 1024)
+
+def test_duplicate_request_reuses_leader_response(monkeypatch, client):
+    # La petición llega mientras otra idéntica calcula: recibe su respuesta sin calcular
+    leader = InFlight()
+    leader.status, leader.body = 200, b'{"root": 1.5}'
+    leader.done.set()
+    monkeypatch.setattr(single_flight, 'join', lambda key: (leader, False))
+    response = solve(client, function='x**2 - 2.25', xi=0, xu=3)
+    assert response.headers['X-Coalesced'] == '1'
+    assert response.get_json() == {'root': 1.5}
+
+def test_duplicate_of_cancelled_leader_computes_on_its_own(monkeypatch, client):
+    # Un trabajo asíncrono cancelado responde 409: la petición idéntica no lo hereda
+    leader = InFlight()
+    leader.status, leader.body = 409, b'{"error": "Trabajo cancelado"}'
+    leader.done.set()
+    monkeypatch.setattr(single_flight, 'join', lambda key: (leader, False))
+    response = solve(client, function='x**2 - 6.25', xi=0, xu=3)
+    assert response.status_code == 200
+    assert 'X-Coalesced' not in response.headers
+    assert response.get_json()['root'] == pytest.approx(2.5, abs=1e-7)
+
+def test_chebyshev_mode_returns_every_root(client):
+    response = solve(client, function='cos(3*x)', xi=0, xu=3, mode='chebyshev')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['method'] == 'chebyshev'
+    assert body['roots'] == pytest.approx([math.pi / 6, math.pi / 2, 5 * math.pi / 6], abs=1e-10)
+    assert max(body['residuals']) < 1e-12
+
+def test_all_roots_of_polynomial_come_from_companion_matrix(client):
+    response = solve(client, function='x**3 - 6*x**2 + 11*x - 6', xi=0, xu=4, all_roots=True)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['method'] == 'polynomial'
+    assert body['roots'] == pytest.approx([1.0, 2.0, 3.0], abs=1e-12)
+
+def test_all_roots_rejects_other_modes(client):
+    response = solve(client, function='x**3 - x', xi=-2, xu=2, all_roots=True, mode='brent')
+    assert response.status_code == 400
+    assert "'all_roots'" in response.get_json()['error']
+
+def test_all_roots_requires_a_polynomial(client):
+    response = solve(client, function='sin(x)', xi=-2, xu=2, all_roots=True)
+    assert response.status_code == 400
+
+def test_all_roots_is_part_of_the_cache_key(client):
+    assert solve(client, function='x**2 - 4', xi=0, xu=3).status_code == 200
+    response = solve(client, function='x**2 - 4', xi=0, xu=3, all_roots=True)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json()['method'] == 'polynomial'
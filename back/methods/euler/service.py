@@ -1,13 +1,29 @@
 from flask import Flask, jsonify, request
 import math
 import numpy as np
-from sympy import symbols, sympify, lambdify
 from flask_cors import CORS
-import traceback
+from functools import partial
+import os
 import sys
 
+# El paquete común (back/common) está dos niveles arriba, también dentro de la imagen
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common import init_service
+from common.deadlines import SolverError, check_deadline
+from common.diagnostics import track_phase
+from common.expressions import build_function, compile_expression
+from common.jit import JIT_CHUNK, call_compiled, jit_function, jit_loop, numba
+from common.metrics import json_response
+from common.pool import SolverPool
+from common.result_cache import cached_result
+from common.warmup import WARMUP_POINTS, Warmup
+
 app = Flask(__name__)
 CORS(app)
+metrics = init_service(app, 'euler')
+# Procesos de cálculo: compilan y evalúan las funciones del usuario, así el plazo las puede cortar
+solver_pool = SolverPool(app)
 
 @app.route('/solve', methods=['POST'])
 def euler_solve():
@@ -95,6 +111,12 @@ def euler_solve():
                 "message": "Los valores no pueden ser infinitos o NaN"
             }), 400
         
+        # Con los datos ya validados, un cálculo idéntico se responde desde la caché sin
+        # interpretar la función
+        cached = cached_result(function=f_function_str, x0=x0, y0=y0, h=h, x_final=x_final)
+        if cached is not None:
+            return cached
+
         try:
             f = parse_function(f_function_str)
         except ValueError as ve:
@@ -103,15 +125,18 @@ def euler_solve():
                 "message": str(ve),
                 "suggestion": "Verifica la sintaxis de tu función. Usa 'x' e 'y' como variables y operadores como +, -, *, /, **, sin, cos, exp, log"
             }), 400
+        except SolverError:
+            raise
         except Exception as e:
             return jsonify({
                 "error": "Error inesperado al procesar la función",
                 "message": f"No se pudo interpretar la función: {str(e)}"
             }), 400
-        
+
         try:
-            result = metodo_euler(f, f_function_str, x0, y0, h, x_final)
-            return jsonify(result)
+            with track_phase('compute'):
+                result = solver_pool.run(metodo_euler, f, f_function_str, x0, y0, h, x_final)
+            return json_response(result)
         
         except OverflowError:
             return jsonify({
@@ -125,12 +150,16 @@ def euler_solve():
                 "message": "Se encontró una división por cero durante el cálculo. Revisa tu función y condiciones iniciales"
             }), 400
         
+        except SolverError:
+            raise
         except Exception as e:
             return jsonify({
                 "error": "Error durante el cálculo",
                 "message": f"Error en el método de Euler: {str(e)}"
             }), 500
     
+    except SolverError:
+        raise
     except Exception as e:
         return jsonify({
             "error": "Error interno del servidor",
@@ -148,23 +177,29 @@ def health_check():
             "message": "El servicio no está funcionando correctamente"
         }), 500
 
+def unknown_variables(expr, names):
+    if expr.free_symbols - set(names):
+        unknown_vars = expr.free_symbols - set(names)
+        raise ValueError(f"Variables no reconocidas en la función: {', '.join(str(v) for v in unknown_vars)}. Solo se permiten 'x' e 'y'")
+
+def compile_function(function_str):
+    # Receta de la RemoteFunction: lo que pasa por SymPy se compila en un proceso de cálculo
+    f = build_function(function_str, ('x', 'y'), check=unknown_variables)
+    try:
+        test_result = f(1.0, 1.0)
+        if not isinstance(test_result, (int, float, np.number)) or not math.isfinite(test_result):
+            raise ValueError("La función no produce valores numéricos válidos")
+    except Exception as test_e:
+        raise ValueError(f"La función no se puede evaluar correctamente: {str(test_e)}")
+    return f
+
 def parse_function(function_str):
     try:
-        x, y = symbols('x y')
         function_str = function_str.strip()
-        expr = sympify(function_str)
-        if expr.free_symbols - {x, y}:
-            unknown_vars = expr.free_symbols - {x, y}
-            raise ValueError(f"Variables no reconocidas en la función: {', '.join(str(v) for v in unknown_vars)}. Solo se permiten 'x' e 'y'")
-        f = lambdify((x, y), expr, modules=['numpy', 'math'])
-        try:
-            test_result = f(1.0, 1.0)
-            if not isinstance(test_result, (int, float, np.number)) or not math.isfinite(test_result):
-                raise ValueError("La función no produce valores numéricos válidos")
-        except Exception as test_e:
-            raise ValueError(f"La función no se puede evaluar correctamente: {str(test_e)}")
-        return f
-        
+        return solver_pool.function('f', compile_function, function_str,
+                                    local=compile_expression(function_str, ('x', 'y')) is not None)
+    except SolverError:
+        raise
     except Exception as e:
         if "Variables no reconocidas" in str(e):
             raise ValueError(str(e))
@@ -173,36 +208,83 @@ def parse_function(function_str):
         else:
             raise ValueError(f"Sintaxis de función inválida: {str(e)}. Ejemplo válido: 'x + y' o 'x**2 - y'")
 
+def build_euler_loop(source):
+    slope_of = jit_function(source, ('x', 'y'))
+
+    @numba.njit(error_model='numpy')
+    def loop(xs, ys, slopes, h, start, stop):
+        # Devuelve el paso donde se detuvo: stop si todos los valores fueron finitos
+        for i in range(start, stop):
+            slope = slope_of(xs[i], ys[i])
+            y_next = ys[i] + h * slope
+            if not (math.isfinite(slope) and math.isfinite(y_next)):
+                return i
+            slopes[i] = slope
+            xs[i + 1] = xs[i] + h
+            ys[i + 1] = y_next
+        return stop
+
+    loop(np.zeros(1), np.zeros(1), np.zeros(1), 0.0, 0, 0)
+    return loop
+
+def euler_compilado(loop, x0, y0, h, n):
+    """
+    Recorre los n pasos con el bucle compilado, en tramos de JIT_CHUNK para revisar el
+    plazo. Devuelve None ante un valor no finito: la versión en Python repite el cálculo
+    y produce el mensaje de error de siempre.
+    """
+    steps = max(n, 0)
+    xs, ys, slopes = np.empty(steps + 1), np.empty(steps + 1), np.empty(steps + 1)
+    xs[0], ys[0] = x0, y0
+    x_vals = [x0]
+    y_vals = [y0]
+    for start in range(0, steps, JIT_CHUNK):
+        check_deadline({"x_values": x_vals, "y_values": y_vals})
+        stop = min(start + JIT_CHUNK, steps)
+        stopped = call_compiled(loop, xs, ys, slopes, h, start, stop)
+        if stopped is None or stopped < stop:
+            return None
+        x_vals.extend(xs[start + 1:stop + 1].tolist())
+        y_vals.extend(ys[start + 1:stop + 1].tolist())
+    return x_vals, y_vals, slopes[:steps].tolist()
+
 def metodo_euler(f, f_function_str, x0, y0, h, x_final):
     try:
         n = int((x_final - x0) / h)
         
-        x_vals = [x0]
-        y_vals = [y0]
-        slopes = []
-        
-        x_current = x0
-        y_current = y0
-        
-        for i in range(n):
-            try:
-                slope = f(x_current, y_current)
-                if not isinstance(slope, (int, float, np.number)):
-                    raise ValueError(f"La función devolvió un tipo de dato inválido: {type(slope)}")
-                if not math.isfinite(slope):
-                    raise ValueError(f"La función devolvió un valor no finito en x={x_current}, y={y_current}")
-                slopes.append(slope)
-                y_next = y_current + h * slope
-                x_next = x_current + h
-                if not math.isfinite(y_next):
-                    raise ValueError(f"El valor de y se volvió no finito en la iteración {i+1}")
-                x_vals.append(x_next)
-                y_vals.append(y_next)
-                x_current = x_next
-                y_current = y_next
+        compiled = jit_loop(build_euler_loop, f)
+        jitted = euler_compilado(compiled, x0, y0, h, n) if compiled is not None else None
+        if jitted is not None:
+            x_vals, y_vals, slopes = jitted
+        else:
+            x_vals = [x0]
+            y_vals = [y0]
+            slopes = []
+        
+            x_current = x0
+            y_current = y0
+        
+            for i in range(n):
+                if i % 1024 == 0:
+                    check_deadline({"x_values": x_vals, "y_values": y_vals})
+                try:
+                    slope = f(x_current, y_current)
+                    if not isinstance(slope, (int, float, np.number)):
+                        raise ValueError(f"La función devolvió un tipo de dato inválido: {type(slope)}")
+                    if not math.isfinite(slope):
+                        raise ValueError(f"La función devolvió un valor no finito en x={x_current}, y={y_current}")
+                    slopes.append(slope)
+                    y_next = y_current + h * slope
+                    x_next = x_current + h
+                    if not math.isfinite(y_next):
+                        raise ValueError(f"El valor de y se volvió no finito en la iteración {i+1}")
+                    x_vals.append(x_next)
+                    y_vals.append(y_next)
+                    x_current = x_next
+                    y_current = y_next
                 
-            except Exception as iter_e:
-                raise Exception(f"Error en la iteración {i+1}: {str(iter_e)}")
+                except Exception as iter_e:
+                    raise Exception(f"Error en la iteración {i+1}: {str(iter_e)}")
         
         iterations_detail = []
         for i in range(len(x_vals) - 1):
@@ -234,8 +316,32 @@ def metodo_euler(f, f_function_str, x0, y0, h, x_final):
             "final_value": {"x": x_vals[-1], "y": y_vals[-1]}
         }
     
+    except SolverError:
+        raise
     except Exception as e:
         raise Exception(str(e))
 
+# Calentamiento al arrancar: compila y evalúa funciones habituales antes de declararse listo.
+# WARMUP_EXPRESSIONS reemplaza la lista (separadas por ';'); WARMUP=0 lo desactiva.
+WARMUP_EXPRESSIONS = [e.strip() for e in os.environ.get('WARMUP_EXPRESSIONS', 'x + y;x*y;sin(x) + y;-2*x*y;y - x**2 + 1').split(';') if e.strip()]
+
+def warm_expression(expression):
+    f = parse_function(expression)
+    for value in WARMUP_POINTS:
+        f(value, value)
+
+warmup = Warmup([({"expression": expression}, partial(warm_expression, expression))
+                 for expression in WARMUP_EXPRESSIONS], sympy=True, pool=solver_pool)
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    if not warmup.done.is_set():
+        return jsonify({"status": "warming_up", "method": "euler-method"}), 503
+    return jsonify({"status": "ready", "method": "euler-method", "warmup": warmup.as_dict()})
+
+# Con el recargador de Werkzeug solo se calienta el proceso que atiende las peticiones
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    warmup.start()
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5007, debug=True)
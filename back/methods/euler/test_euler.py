@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+def test_euler_matches_explicit_steps(client):
+    response = client.post('/solve', json={'function': 'x + y', 'x0': 0, 'y0': 1, 'h': 0.1, 'x_final': 1})
+    assert response.status_code == 200
+    solution = response.get_json()['solution']
+
+    x, y = 0.0, 1.0
+    expected = [y]
+    for _ in range(10):
+        x, y = x + 0.1, y + 0.1 * (x + y)
+        expected.append(y)
+    assert solution['y_values'] == pytest.approx(expected, abs=1e-6)
+
+def test_euler_rejects_unknown_variables(client):
+    response = client.post('/solve', json={'function': 'x + z', 'x0': 0, 'y0': 1, 'h': 0.1, 'x_final': 1})
+    assert response.status_code == 400
+    assert 'z' in response.get_json()['message']
+
+def test_invalid_timeout_is_rejected(client):
+    response = client.post('/solve', json={'function': 'x + y', 'x0': 0, 'y0': 1, 'h': 0.1, 'x_final': 1, 'timeout': -1})
+    assert response.status_code == 400
+
+def test_deadline_stops_long_solve_with_partial_result(client):
+    response = client.post('/solve', json={
+        'function': 'y*cos(x) + sin(x*y)', 'x0': 0, 'y0': 1, 'h': 0.0001, 'x_final': 9.9, 'timeout': 0.05
+    })
+    assert response.status_code == 504
+    body = response.get_json()
+    assert body['error'] == 'Tiempo de cálculo excedido'
+    assert body['partial_result']
+
+def test_cancelled_job_stops_and_reports_409(client):
+    response = client.post('/jobs', json={
+        'route': '/solve', 'function': 'y*cos(x) + sin(x*y)', 'x0': 0, 'y0': 1, 'h': 0.0001, 'x_final': 9.9
+    })
+    job_id = response.get_json()['id']
+    assert client.delete(f'/jobs/{job_id}').get_json()['status'] in ('cancelled', 'cancelling')
+
+    for _ in range(500):
+        job = client.get(f'/jobs/{job_id}').get_json()
+        if job['finished_at'] is not None:
+            break
+        time.sleep(0.01)
+    assert job['status'] == 'cancelled'
+    assert job['status_code'] in (None, 409)
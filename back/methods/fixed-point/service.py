@@ -1,11 +1,29 @@
 from flask import Flask, jsonify, request
 import math
 import numpy as np
-from sympy import symbols, sympify, lambdify
 from flask_cors import CORS
+from functools import partial
+import os
+import sys
+
+# El paquete común (back/common) está dos niveles arriba, también dentro de la imagen
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common import init_service
+from common.deadlines import SolverError, check_deadline
+from common.diagnostics import track_phase
+from common.expressions import build_function, compile_expression
+from common.jit import JIT_CHUNK, call_compiled, jit_function, jit_loop, numba
+from common.metrics import json_response
+from common.pool import SolverPool
+from common.result_cache import cached_result
+from common.warmup import WARMUP_POINTS, Warmup
 
 app = Flask(__name__)
 CORS(app)
+metrics = init_service(app, 'fixed-point')
+# Procesos de cálculo: compilan y evalúan las funciones del usuario, así el plazo las puede cortar
+solver_pool = SolverPool(app)
 
 @app.route('/solve', methods=['POST'])
 def fixed_point_solve():
@@ -82,35 +100,39 @@ def fixed_point_solve():
             }), 400
         
         try:
+            validate_function(g_function_str)
+            # Con los datos ya validados, un cálculo idéntico se responde desde la caché sin
+            # interpretar la función
+            cached = cached_result(function=g_function_str, x0=x0, tolerance=tolerancia,
+                                   max_iterations=max_iteraciones)
+            if cached is not None:
+                return cached
             g = parse_function(g_function_str)
         except ValueError as e:
             return jsonify({
                 "error": f"Error en la función matemática: {str(e)}. Verifica la sintaxis. Ejemplo válido: 'x**2 - 2' o 'cos(x)'"
             }), 400
+        except SolverError:
+            raise
         except Exception as e:
             return jsonify({
                 "error": f"Error inesperado al interpretar la función: {str(e)}. Contacta al administrador si el problema persiste."
             }), 500
         
         try:
-            test_result = g(x0)
-            if not math.isfinite(test_result):
-                return jsonify({
-                    "error": f"La función produce un resultado no finito en x0={x0}. Prueba con un valor inicial diferente."
-                }), 400
-        except Exception as e:
-            return jsonify({
-                "error": f"No se puede evaluar la función en x0={x0}: {str(e)}. Verifica que la función y el valor inicial sean compatibles."
-            }), 400
-        
-        try:
-            result = puntoFijo(g, g_function_str, x0, tolerancia, max_iteraciones)
-            return jsonify(result)
+            # La revisión de g(x0) y el método, en una sola llamada al proceso de cálculo
+            with track_phase('compute'):
+                result, status = solver_pool.run(resolver_punto_fijo, g, g_function_str, x0, tolerancia, max_iteraciones)
+            return json_response(result), status
+        except SolverError:
+            raise
         except Exception as e:
             return jsonify({
                 "error": f"Error durante la ejecución del algoritmo: {str(e)}."
             }), 500
     
+    except SolverError:
+        raise
     except Exception as e:
         return jsonify({
             "error": f"Error interno del servidor: {str(e)}. Contacta al administrador si el problema persiste."
@@ -125,29 +147,99 @@ def health_check():
             "error": f"Error en el chequeo de salud: {str(e)}"
         }), 500
 
+def validate_function(function_str):
+    dangerous_chars = ['__', 'import', 'exec', 'eval', 'open', 'file']
+    for char in dangerous_chars:
+        if char in function_str.lower():
+            raise ValueError(f"Función contiene elementos no permitidos: '{char}'")
+
+def compile_function(function_str):
+    # Receta de la RemoteFunction: lo que pasa por SymPy se compila en un proceso de cálculo
+    func = build_function(function_str)
+    if not callable(func):
+        raise ValueError("La función generada no es ejecutable")
+    return func
+
 def parse_function(function_str):
-    x = symbols('x')
     try:
-        dangerous_chars = ['__', 'import', 'exec', 'eval', 'open', 'file']
-        for char in dangerous_chars:
-            if char in function_str.lower():
-                raise ValueError(f"Función contiene elementos no permitidos: '{char}'")
-        
-        expr = sympify(function_str)
-        func = lambdify(x, expr, modules=['numpy', 'math'])
-        
-        if not callable(func):
-            raise ValueError("La función generada no es ejecutable")
-        
-        return func
+        return solver_pool.function('f', compile_function, function_str,
+                                    local=compile_expression(function_str) is not None)
+    except SolverError:
+        raise
     except Exception as e:
         raise ValueError(f"No se pudo interpretar la función '{function_str}': {str(e)}")
 
+def build_fixed_point_loop(source):
+    g = jit_function(source, ('x',))
+
+    @numba.njit(error_model='numpy')
+    def loop(x0, tolerance, start, stop, xs, errors):
+        # Devuelve (iteraciones hechas, estado): 1 convergió, 0 terminó el tramo, -1 anomalía
+        for i in range(start, stop):
+            x1 = g(x0)
+            error = abs(x1 - x0)
+            if not (math.isfinite(x1) and math.isfinite(error)):
+                return i, -1
+            xs[i] = x1
+            errors[i] = error
+            if error < tolerance:
+                return i + 1, 1
+            x0 = x1
+        return stop, 0
+
+    loop(0.0, 0.0, 0, 0, np.zeros(1), np.zeros(1))
+    return loop
+
+def punto_fijo_compilado(loop, g_function_str, x0, tolerancia, max_iteraciones):
+    """
+    Itera con el bucle compilado, en tramos de JIT_CHUNK para revisar el plazo. Devuelve
+    None ante un valor no finito: puntoFijo repite el cálculo en Python y produce el
+    mensaje de error de siempre.
+    """
+    xs, errors = np.empty(max_iteraciones), np.empty(max_iteraciones)
+    iteraciones = []
+    for start in range(0, max_iteraciones, JIT_CHUNK):
+        check_deadline(iteraciones)
+        outcome = call_compiled(loop, x0, tolerancia, start, min(start + JIT_CHUNK, max_iteraciones), xs, errors)
+        if outcome is None or outcome[1] < 0:
+            return None
+        count, status = outcome
+        for i, (x1, error) in enumerate(zip(xs[start:count].tolist(), errors[start:count].tolist()), start):
+            iteraciones.append({
+                "iteration": i + 1,
+                "x": round(x1, 10),
+                "error": round(error, 10)
+            })
+        if status == 1:
+            return {
+                "function": g_function_str,
+                "root": xs[count - 1].item(),
+                "iterations": count,
+                "error": errors[count - 1].item(),
+                "converged": True,
+                "message": f"Método convergió exitosamente después de {count} iteraciones",
+                "iterations_detail": iteraciones
+            }
+        x0 = xs[count - 1].item()
+    return {
+        "function": g_function_str,
+        "error": f"El método no convergió después de {max_iteraciones} iteraciones. Prueba aumentando el número máximo de iteraciones o cambiando el valor inicial.",
+        "converged": False,
+        "iterations_detail": iteraciones
+    }
+
 def puntoFijo(g, g_function_str, x0, tolerancia, max_iteraciones):
+    compiled = jit_loop(build_fixed_point_loop, g)
+    if compiled is not None:
+        result = punto_fijo_compilado(compiled, g_function_str, x0, tolerancia, max_iteraciones)
+        if result is not None:
+            return result
+
     x1 = x0
     iteraciones = []
 
     for i in range(max_iteraciones):
+        check_deadline(iteraciones)
         try:
             x1 = g(x0)
             
@@ -215,6 +307,43 @@ def puntoFijo(g, g_function_str, x0, tolerancia, max_iteraciones):
         "iterations_detail": iteraciones
     }
 
+def resolver_punto_fijo(g, g_function_str, x0, tolerancia, max_iteraciones):
+    """Revisa g(x0) y ejecuta el método. Devuelve (cuerpo, estado HTTP)."""
+    try:
+        test_result = g(x0)
+        if not math.isfinite(test_result):
+            return {
+                "error": f"La función produce un resultado no finito en x0={x0}. Prueba con un valor inicial diferente."
+            }, 400
+    except SolverError:
+        raise
+    except Exception as e:
+        return {
+            "error": f"No se puede evaluar la función en x0={x0}: {str(e)}. Verifica que la función y el valor inicial sean compatibles."
+        }, 400
+    return puntoFijo(g, g_function_str, x0, tolerancia, max_iteraciones), 200
+
+# Calentamiento al arrancar: compila y evalúa funciones habituales antes de declararse listo.
+# WARMUP_EXPRESSIONS reemplaza la lista (separadas por ';'); WARMUP=0 lo desactiva.
+WARMUP_EXPRESSIONS = [e.strip() for e in os.environ.get('WARMUP_EXPRESSIONS', 'cos(x);exp(-x);sqrt(x + 2);x/2 + 1/x').split(';') if e.strip()]
+
+def warm_expression(expression):
+    f = parse_function(expression)
+    for value in WARMUP_POINTS:
+        f(value)
+
+warmup = Warmup([({"expression": expression}, partial(warm_expression, expression))
+                 for expression in WARMUP_EXPRESSIONS], sympy=True, pool=solver_pool)
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    if not warmup.done.is_set():
+        return jsonify({"status": "warming_up", "method": "fixed-point"}), 503
+    return jsonify({"status": "ready", "method": "fixed-point", "warmup": warmup.as_dict()})
+
+# Con el recargador de Werkzeug solo se calienta el proceso que atiende las peticiones
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    warmup.start()
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5002, debug=True)
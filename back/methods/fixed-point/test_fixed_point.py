@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from common import jit
+from common.jit import JitTier
+
+def test_fixed_point_converges_to_cosine_fixed_point(client):
+    response = client.post('/solve', json={'function': 'cos(x)', 'x0': 1, 'tolerance': 1e-10})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['converged']
+    assert body['root'] == pytest.approx(0.7390851332151607, abs=1e-8)
+
+def test_fixed_point_reports_divergence(client):
+    response = client.post('/solve', json={'function': 'x**2 + 1', 'x0': 1, 'max_iterations': 50})
+    body = response.get_json()
+    assert not body['converged']
+    assert 'Desbordamiento numérico' in body['error']
+
+def test_fixed_point_rejects_undefined_start(client):
+    response = client.post('/solve', json={'function': 'log(x)', 'x0': -1})
+    assert response.status_code == 400
+
+def wait_for_compilation(tier):
+    for _ in range(200):
+        with tier.lock:
+            if not tier.pending:
+                return
+        threading.Event().wait(0.01)
+
+def test_jit_tier_promotes_after_repeated_use():
+    tier = JitTier(promote_after=3, max_compiled=4)
+    built = []
+
+    def build(source):
+        built.append(source)
+        return f"compilado: {source}"
+
+    key = ('build', 'x + 1')
+    assert tier.lookup(key, build) is None
+    assert tier.lookup(key, build) is None
+    assert not built
+    # La tercera llamada la promueve; la compilación corre en segundo plano
+    assert tier.lookup(key, build) is None
+    wait_for_compilation(tier)
+    assert tier.lookup(key, build) == "compilado: x + 1"
+    assert built == ['x + 1']
+
+def test_jit_without_numba_falls_back_to_python(monkeypatch, service):
+    g = service.parse_function('cos(x)')
+    expected = service.puntoFijo(g, 'cos(x)', 1.0, 1e-10, 100)
+
+    tier = JitTier(promote_after=1, max_compiled=4)
+    monkeypatch.setattr(jit, 'JIT_ENABLED', True)
+    monkeypatch.setattr(jit, 'numba', None)
+    monkeypatch.setattr(jit, 'jit_tier', tier)
+    for _ in range(2):
+        assert service.puntoFijo(g, 'cos(x)', 1.0, 1e-10, 100) == expected
+        wait_for_compilation(tier)
+    # La compilación falló y quedó registrada: no se vuelve a intentar
+    assert list(tier.compiled.values()) == [None]
+
+def test_jit_loop_matches_python(monkeypatch, service):
+    pytest.importorskip('numba')
+    g = service.parse_function('cos(x)')
+    expected = service.puntoFijo(g, 'cos(x)', 1.0, 1e-10, 100)
+
+    tier = JitTier(promote_after=1, max_compiled=4)
+    monkeypatch.setattr(jit, 'JIT_ENABLED', True)
+    monkeypatch.setattr(jit, 'jit_tier', tier)
+    service.puntoFijo(g, 'cos(x)', 1.0, 1e-10, 100)
+    wait_for_compilation(tier)
+    assert list(tier.compiled.values())[0] is not None
+    assert service.puntoFijo(g, 'cos(x)', 1.0, 1e-10, 100) == expected
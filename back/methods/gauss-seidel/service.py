@@ -3,9 +3,22 @@ import numpy as np
 from fractions import Fraction
 from flask_cors import CORS
 import math
+import os
+import sys
+
+# El paquete común (back/common) está dos niveles arriba, también dentro de la imagen
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common import init_service
+from common.deadlines import SolverError, check_deadline
+from common.diagnostics import track_phase
+from common.metrics import json_response
+from common.result_cache import cached_result
+from common.warmup import Warmup
 
 app = Flask(__name__)
 CORS(app)
+metrics = init_service(app, 'gauss-seidel')
 
 @app.route('/solve', methods=['POST'])
 def gauss_seidel_solve():
@@ -209,13 +222,20 @@ def gauss_seidel_solve():
                 is_diagonally_dominant = False
                 break
         
+        # Con los datos ya validados, un cálculo idéntico se responde desde la caché
+        cached = cached_result(A=A.tolist(), b=b.tolist(), tolerance=tolerance,
+                               max_iterations=max_iterations)
+        if cached is not None:
+            return cached
+
         try:
-            result = gauss_seidel(A, b, tolerance, max_iterations)
+            with track_phase('compute'):
+                result = gauss_seidel(A, b, tolerance, max_iterations)
             
             if not is_diagonally_dominant:
                 result["warning"] = "La matriz no es diagonalmente dominante. La convergencia no está garantizada"
             
-            return jsonify(result)
+            return json_response(result)
         
         except np.linalg.LinAlgError as linalg_e:
             return jsonify({
@@ -229,12 +249,16 @@ def gauss_seidel_solve():
                 "message": "Los valores calculados son demasiado grandes. El método puede no converger para este sistema"
             }), 400
         
+        except SolverError:
+            raise
         except Exception as e:
             return jsonify({
                 "error": "Error durante el cálculo",
                 "message": f"Error en el método de Gauss-Seidel: {str(e)}"
             }), 500
     
+    except SolverError:
+        raise
     except Exception as e:
         return jsonify({
             "error": "Error interno del servidor",
@@ -259,6 +283,7 @@ def gauss_seidel(A, b, tolerance, max_iterations):
         iterations_detail = []
 
         for iteration in range(max_iterations):
+            check_deadline(iterations_detail)
             x_old = x.copy()
             row = {"iteration": iteration + 1, "x": x_old.tolist()}
 
@@ -308,8 +333,26 @@ def gauss_seidel(A, b, tolerance, max_iterations):
             "message": f"No se alcanzó la convergencia después de {max_iterations} iteraciones"
         }
     
+    except SolverError:
+        raise
     except Exception as e:
         raise Exception(str(e))
 
+# Calentamiento al arrancar: resuelve un sistema pequeño antes de declararse listo. WARMUP=0 lo desactiva.
+WARMUP_SYSTEM = ([[4.0, -1.0, 0.0], [-1.0, 4.0, -1.0], [0.0, -1.0, 4.0]], [15.0, 10.0, 10.0])
+
+warmup = Warmup([({"system": WARMUP_SYSTEM},
+                  lambda: gauss_seidel(np.array(WARMUP_SYSTEM[0]), np.array(WARMUP_SYSTEM[1]), 1e-6, 100))])
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    if not warmup.done.is_set():
+        return jsonify({"status": "warming_up", "method": "Gauss-Seidel"}), 503
+    return jsonify({"status": "ready", "method": "Gauss-Seidel", "warmup": warmup.as_dict()})
+
+# Con el recargador de Werkzeug solo se calienta el proceso que atiende las peticiones
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    warmup.start()
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5006, debug=True)
@@ -0,0 +1,30 @@
+import os
+
+import numpy as np
+import pytest
+
+from common import profiling
+
+def test_solution_matches_direct_solve(client):
+    A = [[4, 1, 0], [1, 5, 2], [0, 2, 6]]
+    b = [1, 2, 3]
+    response = client.post('/solve', json={'A': A, 'b': b, 'tolerance': 1e-10, 'max_iterations': 500})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['converged']
+    assert body['solution'] == pytest.approx(np.linalg.solve(A, b).tolist(), abs=1e-6)
+
+def test_profiling_is_refused_unless_enabled(monkeypatch, client):
+    monkeypatch.setattr(profiling, 'PROFILING_ENABLED', False)
+    response = client.post('/solve?profile=1', json={'A': [[4, 1], [2, 5]], 'b': [1, 2]})
+    assert response.status_code == 403
+
+def test_profiled_request_reports_top_functions(monkeypatch, tmp_path, client):
+    monkeypatch.setattr(profiling, 'PROFILING_ENABLED', True)
+    monkeypatch.setattr(profiling, 'PROFILING_TOKEN', None)
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+    response = client.post('/solve?profile=1&profile_top=5', json={'A': [[4, 1], [2, 5]], 'b': [1, 2]})
+    assert response.status_code == 200
+    profile = response.get_json()['profile']
+    assert 0 < len(profile['top_functions']) <= 5
+    assert os.path.exists(profile['saved_to'])
@@ -2,9 +2,22 @@ from flask import Flask, jsonify, request
 import numpy as np
 from fractions import Fraction
 from flask_cors import CORS
+import os
+import sys
+
+# El paquete común (back/common) está dos niveles arriba, también dentro de la imagen
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common import init_service
+from common.deadlines import SolverError, check_deadline
+from common.diagnostics import track_phase
+from common.metrics import json_response
+from common.result_cache import cached_result
+from common.warmup import Warmup
 
 app = Flask(__name__)
 CORS(app)
+metrics = init_service(app, 'jacobi')
 
 @app.route('/solve', methods=['POST'])
 def jacobi_solve():
@@ -82,8 +95,15 @@ def jacobi_solve():
         except (ValueError, TypeError):
             return jsonify({"error": "El número máximo de iteraciones debe ser un número entero válido"}), 400
 
-        result = jacobi(A, b, tolerance, max_iterations)
-        return jsonify(result)
+        # Con los datos ya validados, un cálculo idéntico se responde desde la caché
+        cached = cached_result(A=A.tolist(), b=b.tolist(), tolerance=tolerance,
+                               max_iterations=max_iterations)
+        if cached is not None:
+            return cached
+
+        with track_phase('compute'):
+            result = jacobi(A, b, tolerance, max_iterations)
+        return json_response(result)
 
     except np.linalg.LinAlgError as e:
         return jsonify({"error": "Error en el cálculo de álgebra lineal: la matriz puede ser singular o mal condicionada"}), 400
@@ -91,6 +111,8 @@ def jacobi_solve():
         return jsonify({"error": "Los valores son demasiado grandes para procesar. Intente con números más pequeños"}), 400
     except MemoryError:
         return jsonify({"error": "La matriz es demasiado grande para procesar en memoria"}), 400
+    except SolverError:
+        raise
     except Exception as e:
         return jsonify({"error": f"Error inesperado en el procesamiento: {str(e)}"}), 500
 
@@ -109,6 +131,7 @@ def jacobi(A, b, tolerance, max_iterations):
         iterations_detail = []
 
         for iteration in range(max_iterations):
+            check_deadline(iterations_detail)
             row = {"iteration": iteration + 1, "x": x.tolist()}
             
             for i in range(n):
@@ -141,8 +164,26 @@ def jacobi(A, b, tolerance, max_iterations):
             "message": f"Se alcanzó el máximo de iteraciones ({max_iterations}). La solución puede no haber convergido completamente."
         }
     
+    except SolverError:
+        raise
     except Exception as e:
         raise Exception(f"Error en el algoritmo de Jacobi: {str(e)}")
 
+# Calentamiento al arrancar: resuelve un sistema pequeño antes de declararse listo. WARMUP=0 lo desactiva.
+WARMUP_SYSTEM = ([[4.0, -1.0, 0.0], [-1.0, 4.0, -1.0], [0.0, -1.0, 4.0]], [15.0, 10.0, 10.0])
+
+warmup = Warmup([({"system": WARMUP_SYSTEM},
+                  lambda: jacobi(np.array(WARMUP_SYSTEM[0]), np.array(WARMUP_SYSTEM[1]), 1e-6, 100))])
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    if not warmup.done.is_set():
+        return jsonify({"status": "warming_up", "method": "Jacobi"}), 503
+    return jsonify({"status": "ready", "method": "Jacobi", "warmup": warmup.as_dict()})
+
+# Con el recargador de Werkzeug solo se calienta el proceso que atiende las peticiones
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    warmup.start()
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5005, debug=True)
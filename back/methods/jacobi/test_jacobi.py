@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+def test_solution_matches_direct_solve(client):
+    A = [[4, 1, 0], [1, 5, 2], [0, 2, 6]]
+    b = [1, 2, 3]
+    response = client.post('/solve', json={'A': A, 'b': b, 'tolerance': 1e-10, 'max_iterations': 500})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['converged']
+    assert body['solution'] == pytest.approx(np.linalg.solve(A, b).tolist(), abs=1e-6)
+
+def metric_value(client, line_prefix):
+    for line in client.get('/metrics').get_data(as_text=True).splitlines():
+        if line.startswith(line_prefix + ' '):
+            return float(line.split()[-1])
+    return 0.0
+
+def test_metrics_count_requests_by_outcome(client):
+    success = 'numeric_http_requests_total{service="jacobi",route="/solve",outcome="success"}'
+    client_error = 'numeric_http_requests_total{service="jacobi",route="/solve",outcome="client_error"}'
+    before = metric_value(client, success), metric_value(client, client_error)
+
+    assert client.post('/solve', json={'A': [[4, 1], [2, 5]], 'b': [1, 2]}).status_code == 200
+    assert client.post('/solve', json={'A': [[4, 1], [2, 5]]}).status_code == 400
+
+    assert metric_value(client, success) == before[0] + 1
+    assert metric_value(client, client_error) == before[1] + 1
+
+def test_metrics_expose_iteration_histogram(client):
+    client.post('/solve', json={'A': [[4, 1], [2, 5]], 'b': [1, 2]})
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert 'numeric_solve_iterations_count{service="jacobi",route="/solve"}' in response.get_data(as_text=True)
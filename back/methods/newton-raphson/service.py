@@ -1,11 +1,373 @@
 from flask import Flask, jsonify, request
 import numpy as np
-from sympy import symbols, sympify, lambdify, diff, Symbol, SympifyError
 from flask_cors import CORS
+from collections import OrderedDict
+from functools import lru_cache, partial
+import ast
+import keyword
 import math
+import os
+import re
+import threading
+import sys
+
+# El paquete común (back/common) está dos niveles arriba, también dentro de la imagen
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common import init_service
+from common.deadlines import SolverError, check_deadline
+from common.diagnostics import track_phase
+from common.expressions import code_function, dual_kernel, evaluate_vectorized, optimize_expression
+from common.jit import JIT_CHUNK, JIT_ENABLED, call_compiled, jit_function, jit_loop, numba
+from common.cache import CACHE_MAX_BYTES, SharedCache, SqliteCacheBackend, cache_key, expression_key, shared_cache
+from common.metrics import json_response, observe_cache
+from common.polynomials import POLYNOMIAL_MAX_DEGREE, horner_source, polynomial_derivative, polynomial_roots
+from common.pool import RemoteFunction, SolverPool
+from common.result_cache import cached_result
+from common.warmup import WARMUP_POINTS, Warmup
 
 app = Flask(__name__)
 CORS(app)
+metrics = init_service(app, 'newton-raphson')
+# Procesos de cálculo: compilan y evalúan las funciones del usuario, así el plazo las puede cortar
+solver_pool = SolverPool(app)
+
+# Polinomios: Poly da los coeficientes exactos; f y f' se evalúan con Horner sobre ellos y
+# todas las raíces salen de la matriz compañera. Una forma factorizada ((x - 1)**5) se
+# sigue evaluando tal cual, porque expandirla pierde precisión cerca de sus raíces.
+def expression_coefficients(expr, var):
+    """(coeficientes de mayor a menor grado, si expr ya está expandido) o (None, False)."""
+    from sympy import Poly, PolynomialError
+    if not expr.is_polynomial(var):
+        return None, False
+    try:
+        poly = Poly(expr, var)
+        coefficients = tuple(float(c) for c in poly.all_coeffs())
+    except (PolynomialError, TypeError, ValueError):
+        return None, False
+    if not 1 <= poly.degree() <= POLYNOMIAL_MAX_DEGREE or not all(math.isfinite(c) for c in coefficients):
+        return None, False
+    return coefficients, poly.as_expr() == expr
+
+def horner_function(coefficients):
+    # Con su receta de código, otro proceso la reconstruye sin pasar por SymPy
+    return code_function(horner_source(coefficients))
+
+def lambdify_kernels(var, expr):
+    from sympy import lambdify
+    return dual_kernel(
+        lambdify(var, expr, modules=['math', 'numpy'], cse=True),
+        lambdify(var, expr, modules=['numpy', 'math'], cse=True)
+    )
+
+def horner_pair_function(coefficients):
+    # p y p' en una sola llamada, con los mismos redondeos que por separado
+    derivative = polynomial_derivative(coefficients)
+    return code_function(f"({horner_source(coefficients)}, {horner_source(derivative)})")
+
+# La derivada compartida vuelve a pasar por sympify, que evalúa el texto: solo se aceptan
+# números, las variables, operadores, comparaciones y clases o constantes de SymPy por nombre.
+# La lista no acota el costo (9**9**9**9 la pasa): por eso la búsqueda corre en los procesos
+# de cálculo, dentro del plazo de la petición, igual que sympify sobre la función
+DERIVATIVE_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.BitAnd, ast.BitOr)
+DERIVATIVE_COMPARISONS = (ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+# sqrt es una función de Python que devuelve Pow, pero str() la imprime así
+DERIVATIVE_FUNCTIONS = {'sqrt'}
+
+def sympy_name(name):
+    import sympy
+    value = getattr(sympy, name, None)
+    return isinstance(value, sympy.Basic) or (isinstance(value, type) and issubclass(value, sympy.Basic))
+
+def derivative_text_allowed(node, variables):
+    if isinstance(node, ast.Expression):
+        return derivative_text_allowed(node.body, variables)
+    if isinstance(node, ast.Constant):
+        return type(node.value) in (bool, int, float)
+    if isinstance(node, ast.Name):
+        return node.id in variables or sympy_name(node.id)
+    if isinstance(node, ast.BinOp):
+        return (isinstance(node.op, DERIVATIVE_OPERATORS) and derivative_text_allowed(node.left, variables)
+                and derivative_text_allowed(node.right, variables))
+    if isinstance(node, ast.UnaryOp):
+        return isinstance(node.op, (ast.UAdd, ast.USub, ast.Invert)) and derivative_text_allowed(node.operand, variables)
+    if isinstance(node, ast.Compare):
+        return (all(isinstance(op, DERIVATIVE_COMPARISONS) for op in node.ops)
+                and all(derivative_text_allowed(child, variables) for child in [node.left, *node.comparators]))
+    if isinstance(node, ast.Tuple):
+        return all(derivative_text_allowed(element, variables) for element in node.elts)
+    if isinstance(node, ast.Call):
+        return (isinstance(node.func, ast.Name) and node.func.id not in variables
+                and (node.func.id in DERIVATIVE_FUNCTIONS or sympy_name(node.func.id))
+                and not node.keywords and all(derivative_text_allowed(argument, variables) for argument in node.args))
+    return False
+
+class DerivativeCache:
+    """
+    Caché de derivadas simbólicas en dos niveles:
+    - LRU en memoria con la expresión, la derivada simplificada y sus funciones compiladas.
+    - La caché compartida con la derivada en texto, para otras réplicas y reinicios.
+    """
+
+    def __init__(self, max_size=256, shared=None):
+        self.max_size = max_size
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(function_str):
+        # Por token: 'x**2-4' y 'x**2 - 4' comparten entrada, pero 'x 2' no cae en la de 'x2'
+        return expression_key(function_str)
+
+    def lookup(self, function_str, variable):
+        key = (self.normalize(function_str), variable)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        observe_cache('derivative_memory', entry is not None)
+        if entry is not None:
+            return entry
+
+        derivative_str = self._load(key)
+        if self.shared is not None:
+            observe_cache('derivative_shared', derivative_str is not None)
+        if derivative_str is None:
+            return None
+        # El texto viene de fuera del proceso: lo que no pase la lista se recalcula
+        try:
+            if not derivative_text_allowed(ast.parse(derivative_str, mode='eval'), (variable,)):
+                return None
+        except (SyntaxError, RecursionError):
+            return None
+
+        # La derivada ya está calculada: solo falta interpretar y compilar
+        try:
+            from sympy import symbols, sympify
+            var = symbols(variable)
+            with track_phase('parse'):
+                expr, derivative_expr = sympify(function_str), sympify(derivative_str)
+            entry = self._build(key, var, expr, derivative_expr)
+        except Exception:
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def store(self, function_str, variable, expr, derivative_expr):
+        from sympy import symbols
+        key = (self.normalize(function_str), variable)
+        entry = self._build(key, symbols(variable), expr, derivative_expr)
+        self._remember(key, entry)
+        self._save(key, str(derivative_expr))
+        return entry
+
+    def _build(self, key, var, expr, derivative_expr):
+        coefficients, expanded = expression_coefficients(expr, var)
+        with track_phase('compile'):
+            if expanded:
+                f = horner_function(coefficients)
+                f_derivative = horner_function(polynomial_derivative(coefficients))
+                f_and_derivative = horner_pair_function(coefficients)
+            else:
+                compiled_expr = optimize_expression(expr, (var,))
+                f = lambdify_kernels(var, compiled_expr)
+                f_derivative = lambdify_kernels(var, derivative_expr)
+                # Compiladas juntas, f y f' comparten las subexpresiones (exp(-x**2) está en ambas)
+                f_and_derivative = lambdify_kernels(var, (compiled_expr, derivative_expr))
+            entry = {
+                "expr": expr,
+                "derivative": derivative_expr,
+                "polynomial": coefficients,
+                "f": f,
+                "f_derivative": f_derivative,
+                "f_and_derivative": f_and_derivative
+            }
+        if JIT_ENABLED and expanded:
+            # El nivel JIT compila el mismo Horner, con los mismos redondeos
+            entry["f"].jit_source = horner_source(coefficients)
+            entry["f_derivative"].jit_source = horner_source(polynomial_derivative(coefficients))
+        elif JIT_ENABLED:
+            entry["f"].jit_source = jit_source(expr)
+            entry["f_derivative"].jit_source = jit_source(derivative_expr)
+        return entry
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _load(self, key):
+        if self.shared is None:
+            return None
+        value = self.shared.get(cache_key(metrics.service, 'derivative', *key))
+        try:
+            return value.decode('utf-8') if value is not None else None
+        except UnicodeDecodeError:
+            return None
+
+    def _save(self, key, derivative_str):
+        if self.shared is not None:
+            self.shared.set(cache_key(metrics.service, 'derivative', *key), derivative_str.encode('utf-8'), DERIVATIVE_CACHE_TTL)
+
+DERIVATIVE_CACHE_TTL = float(os.environ.get('DERIVATIVE_CACHE_TTL', str(30 * 24 * 3600)))
+# DERIVATIVE_CACHE_DB sigue disponible para guardar las derivadas en un archivo propio
+derivative_cache = DerivativeCache(
+    max_size=int(os.environ.get('DERIVATIVE_CACHE_SIZE', 256)),
+    shared=SharedCache(SqliteCacheBackend(os.environ['DERIVATIVE_CACHE_DB'], CACHE_MAX_BYTES))
+    if os.environ.get('DERIVATIVE_CACHE_DB') else shared_cache
+)
+
+# Número de derivadas que necesita cada variante de orden superior
+HIGHER_ORDER_MODES = {'halley': 2, 'householder': 3}
+
+# Simplificar expresiones muy grandes puede tardar más que derivarlas
+SIMPLIFY_MAX_OPS = int(os.environ.get('DERIVATIVE_SIMPLIFY_MAX_OPS', 200))
+
+def derive(expr, var):
+    from sympy import diff, simplify, count_ops
+    derivative_expr = diff(expr, var)
+    # La derivada de un polinomio expandido ya sale expandida: simplify no la mejora
+    if expression_coefficients(expr, var)[1]:
+        return derivative_expr
+    if count_ops(derivative_expr) <= SIMPLIFY_MAX_OPS:
+        simplified = simplify(derivative_expr)
+        if count_ops(simplified) <= count_ops(derivative_expr):
+            return simplified
+    return derivative_expr
+
+higher_order_lock = threading.Lock()
+
+def compile_higher_order(cached, order):
+    """
+    Compila f y sus derivadas hasta el orden indicado en una sola función con
+    eliminación de subexpresiones comunes. El resultado se guarda en la entrada de caché.
+    """
+    compiled = cached.get("higher", {}).get(order)
+    if compiled is None:
+        from sympy import symbols
+        x = symbols('x')
+        derivatives = [cached["derivative"]]
+        with track_phase('compile'):
+            while len(derivatives) < order:
+                derivatives.append(derive(derivatives[-1], x))
+            evaluate_all = lambdify_kernels(x, [cached["expr"], *derivatives])
+        compiled = (evaluate_all, [str(d) for d in derivatives])
+        # La entrada es compartida entre hilos: se reemplaza por una copia con el nuevo orden
+        with higher_order_lock:
+            cached["higher"] = {**cached.get("higher", {}), order: compiled}
+    return compiled
+
+def prepare_function(function_str):
+    """
+    Interpreta la función en 'x', valida que Newton-Raphson sea aplicable y devuelve
+    la entrada de caché con la derivada y las funciones compiladas.
+    """
+    # SymPy se importa al primer uso: el arranque del servicio no paga su carga
+    from sympy import symbols, sympify, SympifyError
+    x = symbols('x')
+    cached = derivative_cache.lookup(function_str, 'x')
+
+    if cached:
+        expr = cached["expr"]
+    else:
+        try:
+            with track_phase('parse'):
+                expr = sympify(function_str)
+        except SympifyError as e:
+            raise ValueError(f"La función no es válida matemáticamente: {str(e)}. Asegúrese de usar sintaxis correcta (ej: x**2 + 2*x - 1)")
+        except Exception as e:
+            raise ValueError(f"Error al interpretar la función: {str(e)}. Use sintaxis matemática estándar")
+
+    if not expr.has(x):
+        raise ValueError("La función debe contener la variable 'x'")
+
+    invalid_symbols = expr.free_symbols - {x}
+    if invalid_symbols:
+        raise ValueError(f"La función contiene variables no permitidas: {', '.join(str(s) for s in invalid_symbols)}. Solo se permite la variable 'x'")
+
+    if cached:
+        derivative_expr = cached["derivative"]
+    else:
+        try:
+            with track_phase('compile'):
+                derivative_expr = derive(expr, x)
+        except Exception as e:
+            raise ValueError(f"No se pudo calcular la derivada de la función: {str(e)}")
+
+    if derivative_expr == 0:
+        raise ValueError("La derivada de la función es constantemente cero. El método de Newton-Raphson no es aplicable")
+
+    if not cached:
+        try:
+            cached = derivative_cache.store(function_str, 'x', expr, derivative_expr)
+        except Exception as e:
+            raise ValueError(f"Error al crear las funciones evaluables: {str(e)}")
+
+    return cached
+
+def compiled_function(function_str, key):
+    # Recetas de RemoteFunction: reconstruyen las funciones compiladas en los procesos de cálculo
+    return prepare_function(function_str)[key]
+
+def compiled_higher_order(function_str, order):
+    return compile_higher_order(prepare_function(function_str), order)[0]
+
+def compiled_system(functions, variables, index):
+    return compile_system(functions, variables)[index]
+
+@lru_cache(maxsize=64)
+def compile_system(functions, variables):
+    """
+    Construye F y su jacobiano simbólico una sola vez y los compila con
+    eliminación de subexpresiones comunes. Devuelve F(x) y (F(x), J(x)) como arreglos.
+    """
+    # Los nombres se pasan a sympify y a lambdify: solo identificadores que no sean palabras reservadas
+    for name in variables:
+        if not name.isidentifier() or keyword.iskeyword(name):
+            raise ValueError(f"El nombre de variable '{name}' no es válido: debe ser un identificador (letras, dígitos y _) que no sea una palabra reservada")
+    from sympy import Symbol, sympify, lambdify, Matrix, SympifyError
+    variable_symbols = [Symbol(name) for name in variables]
+    # Sin locals, E, I, S, N o Q serían las constantes y funciones de SymPy y no las variables
+    names = dict(zip(variables, variable_symbols))
+    exprs = []
+    for k, function_str in enumerate(functions):
+        try:
+            with track_phase('parse'):
+                expr = sympify(function_str, locals=names)
+        except SympifyError as e:
+            raise ValueError(f"La ecuación {k + 1} no es válida matemáticamente: {str(e)}")
+        except Exception as e:
+            raise ValueError(f"Error al interpretar la ecuación {k + 1}: {str(e)}")
+
+        invalid_symbols = expr.free_symbols - set(variable_symbols)
+        if invalid_symbols:
+            raise ValueError(f"La ecuación {k + 1} contiene variables no permitidas: {', '.join(str(s) for s in invalid_symbols)}. Variables permitidas: {', '.join(variables)}")
+        exprs.append(expr)
+
+    F = Matrix(exprs)
+    with track_phase('compile'):
+        J = F.jacobian(variable_symbols)
+    if J.is_zero_matrix:
+        raise ValueError("El jacobiano del sistema es constantemente cero. El método de Newton no es aplicable")
+
+    try:
+        with track_phase('compile'):
+            F_numeric = lambdify(variable_symbols, list(F), modules='numpy', cse=True)
+            FJ_numeric = lambdify(variable_symbols, [list(F), J.tolist()], modules='numpy', cse=True)
+    except Exception as e:
+        raise ValueError(f"Error al crear las funciones evaluables: {str(e)}")
+
+    def evaluate_F(x):
+        return np.asarray(F_numeric(*x), dtype=np.float64)
+
+    def evaluate_FJ(x):
+        F_value, J_value = FJ_numeric(*x)
+        return np.asarray(F_value, dtype=np.float64), np.asarray(J_value, dtype=np.float64)
+
+    return evaluate_F, evaluate_FJ, [str(entry) for entry in J]
 
 @app.route('/solve', methods=['POST'])
 def newton_raphson_solve():
@@ -58,65 +420,30 @@ def newton_raphson_solve():
             return jsonify({"error": "El número máximo de iteraciones no puede exceder 10,000 para evitar sobrecarga del servidor"}), 400
     except (ValueError, TypeError):
         return jsonify({"error": "El número máximo de iteraciones debe ser un número entero válido"}), 400
+
+    mode = data.get('mode', 'newton')
+    if mode not in HIGHER_ORDER_MODES and mode != 'newton':
+        return jsonify({"error": "El campo 'mode' debe ser 'newton', 'halley' o 'householder'"}), 400
     
     try:
-        x = symbols('x')
-        try:
-            expr = sympify(function_str)
-        except SympifyError as e:
-            return jsonify({"error": f"La función no es válida matemáticamente: {str(e)}. Asegúrese de usar sintaxis correcta (ej: x**2 + 2*x - 1)"}), 400
-        except Exception as e:
-            return jsonify({"error": f"Error al interpretar la función: {str(e)}. Use sintaxis matemática estándar"}), 400
-
-        if not expr.has(x):
-            return jsonify({"error": "La función debe contener la variable 'x'"}), 400
-
-        free_symbols = expr.free_symbols
-        invalid_symbols = free_symbols - {x}
-        if invalid_symbols:
-            return jsonify({"error": f"La función contiene variables no permitidas: {', '.join(str(s) for s in invalid_symbols)}. Solo se permite la variable 'x'"}), 400
-
-        try:
-            derivative_expr = diff(expr, x)
-        except Exception as e:
-            return jsonify({"error": f"No se pudo calcular la derivada de la función: {str(e)}"}), 400
-
-        if derivative_expr == 0:
-            return jsonify({"error": "La derivada de la función es constantemente cero. El método de Newton-Raphson no es aplicable"}), 400
+        # Con los datos ya validados, un cálculo idéntico se responde desde la caché sin
+        # interpretar la función
+        cached_response = cached_result(function=function_str, x0=x0, tolerance=tolerancia,
+                                        max_iterations=max_iteraciones, mode=mode)
+        if cached_response is not None:
+            return cached_response
 
-        try:
-            f = lambdify(x, expr, modules=['numpy', 'math'])
-            f_derivative = lambdify(x, derivative_expr, modules=['numpy', 'math'])
-        except Exception as e:
-            return jsonify({"error": f"Error al crear las funciones evaluables: {str(e)}"}), 400
-
-        try:
-            f_x0_test = f(x0)
-            if not math.isfinite(f_x0_test):
-                return jsonify({"error": f"La función no está definida en x0 = {x0} (resultado: {f_x0_test})"}), 400
-        except Exception as e:
-            return jsonify({"error": f"La función no se puede evaluar en x0 = {x0}: {str(e)}"}), 400
-
-        try:
-            f_prime_x0_test = f_derivative(x0)
-            if not math.isfinite(f_prime_x0_test):
-                return jsonify({"error": f"La derivada no está definida en x0 = {x0} (resultado: {f_prime_x0_test})"}), 400
-            if abs(f_prime_x0_test) < 1e-15:
-                return jsonify({"error": f"La derivada es cero o muy cercana a cero en x0 = {x0}. El método puede no converger"}), 400
-        except Exception as e:
-            return jsonify({"error": f"La derivada no se puede evaluar en x0 = {x0}: {str(e)}"}), 400
-
-        result = newton_raphson(
-            f, f_derivative, 
-            function_str, str(derivative_expr), 
-            x0, tolerancia, max_iteraciones
-        )
-        return jsonify(result)
+        # La derivada, las revisiones en x0 y el método, en una sola llamada al proceso de cálculo
+        with track_phase('compute'):
+            result, status = solver_pool.run(resolver_newton, function_str, x0, tolerancia, max_iteraciones, mode)
+        return json_response(result), status
     
     except OverflowError:
         return jsonify({"error": "Los valores son demasiado grandes para procesar. Intente con números más pequeños o una tolerancia mayor"}), 400
     except MemoryError:
         return jsonify({"error": "La función es demasiado compleja para procesar en memoria"}), 400
+    except SolverError:
+        raise
     except Exception as e:
         return jsonify({"error": f"Error inesperado en el procesamiento: {str(e)}"}), 500
 
@@ -155,39 +482,204 @@ def calculate_derivative():
         return jsonify({"error": "El nombre de la variable es demasiado largo. Máximo 10 caracteres"}), 400
 
     try:
-        try:
-            var = symbols(variable)
-        except Exception as e:
-            return jsonify({"error": f"Nombre de variable inválido '{variable}': {str(e)}"}), 400
-
-        try:
-            expr = sympify(function_str)
-        except SympifyError as e:
-            return jsonify({"error": f"La función no es válida matemáticamente: {str(e)}. Asegúrese de usar sintaxis correcta"}), 400
-        except Exception as e:
-            return jsonify({"error": f"Error al interpretar la función: {str(e)}"}), 400
-
-        if not expr.has(var):
-            return jsonify({"error": f"La función debe contener la variable '{variable}'"}), 400
+        # Con los datos ya validados, un cálculo idéntico se responde desde la caché
+        cached_response = cached_result(function=function_str, variable=variable)
+        if cached_response is not None:
+            return cached_response
 
-        try:
-            derivative = diff(expr, var)
-        except Exception as e:
-            return jsonify({"error": f"No se pudo calcular la derivada: {str(e)}"}), 400
-        
-        return jsonify({
-            "function": function_str,
-            "variable": variable,
-            "derivative": str(derivative),
-            "derivative_lambda": "Available",
-            "message": f"Derivada calculada exitosamente con respecto a '{variable}'"
-        })
+        # sympify y la derivada corren en el proceso de cálculo, dentro del plazo
+        with track_phase('compute'):
+            result, status = solver_pool.run(calcular_derivada, function_str, variable)
+        return json_response(result), status
     
     except OverflowError:
         return jsonify({"error": "La función es demasiado compleja para derivar"}), 400
+    except SolverError:
+        raise
     except Exception as e:
         return jsonify({"error": f"Error inesperado al calcular la derivada: {str(e)}"}), 500
 
+@app.route('/multistart', methods=['POST'])
+def newton_multistart_solve():
+    if not request.is_json:
+        return jsonify({"error": "El contenido debe ser JSON válido"}), 400
+
+    try:
+        data = request.get_json()
+    except Exception:
+        return jsonify({"error": "JSON malformado o inválido"}), 400
+
+    if not data:
+        return jsonify({"error": "No se recibieron datos"}), 400
+
+    if not all(k in data for k in ['function', 'xi', 'xu']):
+        missing_fields = [field for field in ['function', 'xi', 'xu'] if field not in data]
+        return jsonify({
+            "error": f"Faltan campos requeridos: {', '.join(missing_fields)}. Se necesitan 'function' (función a evaluar), 'xi' y 'xu' (extremos del rango de búsqueda)"
+        }), 400
+
+    if not isinstance(data.get('function'), str) or data['function'].strip() == '':
+        return jsonify({"error": "El campo 'function' no puede estar vacío"}), 400
+
+    try:
+        xi = float(data['xi'])
+        xu = float(data['xu'])
+        if not (math.isfinite(xi) and math.isfinite(xu)):
+            return jsonify({"error": "Los extremos 'xi' y 'xu' deben ser números finitos (no infinito ni NaN)"}), 400
+    except (ValueError, TypeError):
+        return jsonify({"error": "Los extremos 'xi' y 'xu' deben ser números válidos"}), 400
+
+    if xi >= xu:
+        return jsonify({"error": f"El extremo inferior ({xi}) debe ser menor que el extremo superior ({xu})"}), 400
+
+    function_str = data['function'].strip()
+
+    if len(function_str) > 1000:
+        return jsonify({"error": "La función es demasiado larga. Máximo 1000 caracteres"}), 400
+
+    try:
+        starts = int(data.get('starts', 50))
+        if starts < 2:
+            return jsonify({"error": "El número de puntos iniciales 'starts' debe ser al menos 2"}), 400
+        if starts > 5000:
+            return jsonify({"error": "El número de puntos iniciales 'starts' no puede exceder 5,000"}), 400
+    except (ValueError, TypeError):
+        return jsonify({"error": "El número de puntos iniciales 'starts' debe ser un número entero válido"}), 400
+
+    try:
+        tolerancia = float(data.get('tolerance', 1e-6))
+        if tolerancia <= 0:
+            return jsonify({"error": "La tolerancia debe ser un número positivo"}), 400
+        if tolerancia >= 1:
+            return jsonify({"error": "La tolerancia debe ser menor que 1 para obtener resultados precisos"}), 400
+    except (ValueError, TypeError):
+        return jsonify({"error": "La tolerancia debe ser un número válido"}), 400
+
+    try:
+        max_iteraciones = int(data.get('max_iterations', 100))
+        if max_iteraciones <= 0:
+            return jsonify({"error": "El número máximo de iteraciones debe ser un entero positivo"}), 400
+        if max_iteraciones > 10000:
+            return jsonify({"error": "El número máximo de iteraciones no puede exceder 10,000 para evitar sobrecarga del servidor"}), 400
+    except (ValueError, TypeError):
+        return jsonify({"error": "El número máximo de iteraciones debe ser un número entero válido"}), 400
+
+    try:
+        # Con los datos ya validados, un cálculo idéntico se responde desde la caché sin
+        # interpretar la función
+        all_roots = bool(data.get('all_roots'))
+        cached_response = cached_result(function=function_str, xi=xi, xu=xu, starts=starts, tolerance=tolerancia,
+                                        max_iterations=max_iteraciones, all_roots=all_roots)
+        if cached_response is not None:
+            return cached_response
+
+        with track_phase('compute'):
+            result, status = solver_pool.run(resolver_multistart, function_str, xi, xu, starts, tolerancia,
+                                             max_iteraciones, all_roots)
+        return json_response(result), status
+
+    except MemoryError:
+        return jsonify({"error": "La función es demasiado compleja para procesar en memoria"}), 400
+    except SolverError:
+        raise
+    except Exception as e:
+        return jsonify({"error": f"Error inesperado en el procesamiento: {str(e)}"}), 500
+
+@app.route('/system', methods=['POST'])
+def newton_system_solve():
+    if not request.is_json:
+        return jsonify({"error": "El contenido debe ser JSON válido"}), 400
+
+    try:
+        data = request.get_json()
+    except Exception:
+        return jsonify({"error": "JSON malformado o inválido"}), 400
+
+    if not data:
+        return jsonify({"error": "No se recibieron datos"}), 400
+
+    if not all(k in data for k in ['functions', 'x0']):
+        missing_fields = [field for field in ['functions', 'x0'] if field not in data]
+        return jsonify({
+            "error": f"Faltan campos requeridos: {', '.join(missing_fields)}. Se necesitan 'functions' (lista de ecuaciones) y 'x0' (vector inicial)"
+        }), 400
+
+    functions = data['functions']
+    if not isinstance(functions, list) or not functions:
+        return jsonify({"error": "El campo 'functions' debe ser una lista no vacía de ecuaciones"}), 400
+    if not all(isinstance(function_str, str) and function_str.strip() for function_str in functions):
+        return jsonify({"error": "Cada ecuación de 'functions' debe ser una cadena de texto no vacía"}), 400
+
+    n = len(functions)
+    if n > 50:
+        return jsonify({"error": "El sistema no puede tener más de 50 ecuaciones"}), 400
+
+    functions = tuple(function_str.strip() for function_str in functions)
+    if any(len(function_str) > 1000 for function_str in functions):
+        return jsonify({"error": "Una de las ecuaciones es demasiado larga. Máximo 1000 caracteres"}), 400
+
+    variables = data.get('variables', [f"x{i + 1}" for i in range(n)])
+    if not isinstance(variables, list) or len(variables) != n:
+        return jsonify({"error": f"Se necesitan exactamente {n} variables, una por ecuación"}), 400
+    if not all(isinstance(name, str) and re.fullmatch(r'[A-Za-z]\w{0,9}', name) for name in variables):
+        return jsonify({"error": "Los nombres de las variables deben empezar con una letra y tener máximo 10 caracteres"}), 400
+    if len(set(variables)) != n:
+        return jsonify({"error": "Los nombres de las variables no pueden repetirse"}), 400
+
+    x0 = data['x0']
+    if not isinstance(x0, list) or len(x0) != n:
+        return jsonify({"error": f"El vector inicial 'x0' debe tener {n} elementos"}), 400
+    try:
+        x0 = np.array([float(value) for value in x0], dtype=np.float64)
+        if not np.all(np.isfinite(x0)):
+            return jsonify({"error": "El vector inicial 'x0' debe contener números finitos (no infinito ni NaN)"}), 400
+    except (ValueError, TypeError):
+        return jsonify({"error": "El vector inicial 'x0' debe contener números válidos"}), 400
+
+    jacobian_update = data.get('jacobian', 'exact')
+    if jacobian_update not in ('exact', 'broyden'):
+        return jsonify({"error": "El campo 'jacobian' debe ser 'exact' (jacobiano en cada iteración) o 'broyden' (actualizaciones de Broyden)"}), 400
+
+    try:
+        tolerancia = float(data.get('tolerance', 1e-6))
+        if tolerancia <= 0:
+            return jsonify({"error": "La tolerancia debe ser un número positivo"}), 400
+        if tolerancia >= 1:
+            return jsonify({"error": "La tolerancia debe ser menor que 1 para obtener resultados precisos"}), 400
+    except (ValueError, TypeError):
+        return jsonify({"error": "La tolerancia debe ser un número válido"}), 400
+
+    try:
+        max_iteraciones = int(data.get('max_iterations', 100))
+        if max_iteraciones <= 0:
+            return jsonify({"error": "El número máximo de iteraciones debe ser un entero positivo"}), 400
+        if max_iteraciones > 10000:
+            return jsonify({"error": "El número máximo de iteraciones no puede exceder 10,000 para evitar sobrecarga del servidor"}), 400
+    except (ValueError, TypeError):
+        return jsonify({"error": "El número máximo de iteraciones debe ser un número entero válido"}), 400
+
+    try:
+        # Con los datos ya validados, un cálculo idéntico se responde desde la caché
+        cached_response = cached_result(functions=list(functions), variables=variables, x0=x0.tolist(),
+                                        jacobian=jacobian_update, tolerance=tolerancia, max_iterations=max_iteraciones)
+        if cached_response is not None:
+            return cached_response
+
+        # El jacobiano simbólico, la revisión en x0 y el método, en una sola llamada al proceso de cálculo
+        with track_phase('compute'):
+            result, status = solver_pool.run(resolver_sistema, functions, tuple(variables), x0, tolerancia,
+                                             max_iteraciones, jacobian_update)
+        return json_response(result), status
+
+    except OverflowError:
+        return jsonify({"error": "Los valores son demasiado grandes para procesar. Intente con números más pequeños o una tolerancia mayor"}), 400
+    except MemoryError:
+        return jsonify({"error": "El sistema es demasiado complejo para procesar en memoria"}), 400
+    except SolverError:
+        raise
+    except Exception as e:
+        return jsonify({"error": f"Error inesperado en el procesamiento: {str(e)}"}), 500
+
 @app.route('/health', methods=['GET'])
 def health_check():
     try:
@@ -195,15 +687,113 @@ def health_check():
     except Exception as e:
         return jsonify({"error": f"Error en el servidor: {str(e)}"}), 500
 
-def newton_raphson(f, f_derivative, function_str, derivative_str, x0, tolerancia, max_iteraciones):
+def jit_source(expr):
+    # Código de NumPy para Numba; None si SymPy no sabe imprimir alguna parte
+    from sympy.printing.numpy import NumPyPrinter
+    printer = NumPyPrinter({'fully_qualified_modules': True, 'inline': True})
+    try:
+        code = printer.doprint(expr)
+    except Exception:
+        return None
+    return None if printer._not_supported else code
+
+def build_newton_loop(f_source, derivative_source):
+    f = jit_function(f_source, ('x',))
+    f_derivative = jit_function(derivative_source, ('x',))
+
+    @numba.njit(error_model='numpy')
+    def loop(x_current, tolerance, start, stop, rows):
+        # Devuelve (iteraciones hechas, estado): 1 convergió, 0 terminó el tramo, -1 anomalía
+        for i in range(start, stop):
+            f_x = f(x_current)
+            f_prime_x = f_derivative(x_current)
+            if not (math.isfinite(f_x) and math.isfinite(f_prime_x)) or abs(f_prime_x) < 1e-15:
+                return i, -1
+            x_next = x_current - (f_x / f_prime_x)
+            if not math.isfinite(x_next):
+                return i, -1
+            error = abs(x_next - x_current)
+            rows[i, 0] = x_current
+            rows[i, 1] = f_x
+            rows[i, 2] = f_prime_x
+            rows[i, 3] = x_next
+            rows[i, 4] = error
+            if error < tolerance:
+                return i + 1, 1
+            # Estancamiento: lo informa la versión en Python
+            if i > 0 and error > tolerance and abs(error - rows[i - 1, 4]) < tolerance * 0.01:
+                return i, -1
+            x_current = x_next
+        return stop, 0
+
+    loop(0.0, 0.0, 0, 0, np.zeros((1, 5)))
+    return loop
+
+def newton_compilado(loop, function_str, derivative_str, x0, tolerancia, max_iteraciones):
+    """
+    Itera con el bucle compilado, en tramos de JIT_CHUNK para revisar el plazo. Devuelve
+    None en cualquier caso anómalo (valores no finitos, derivada nula, estancamiento):
+    newton_raphson repite el cálculo en Python y produce el mensaje de siempre.
+    """
+    rows = np.empty((max_iteraciones, 5))
+    iterations_detail = []
+    x_current = x0
+    for start in range(0, max_iteraciones, JIT_CHUNK):
+        check_deadline(iterations_detail)
+        outcome = call_compiled(loop, x_current, tolerancia, start, min(start + JIT_CHUNK, max_iteraciones), rows)
+        if outcome is None or outcome[1] < 0:
+            return None
+        count, status = outcome
+        for i, row in enumerate(rows[start:count].tolist(), start):
+            iterations_detail.append({
+                "iteration": i + 1,
+                "x": row[0],
+                "fx": row[1],
+                "fpx": row[2],
+                "x_next": row[3],
+                "error": row[4]
+            })
+        x_current, error = iterations_detail[-1]["x_next"], iterations_detail[-1]["error"]
+        if status == 1:
+            return {
+                "function": function_str,
+                "derivative": derivative_str,
+                "root": x_current,
+                "iterations": count,
+                "final_error": error,
+                "iterations_detail": iterations_detail,
+                "converged": True,
+                "message": f"Raíz encontrada en {count} iteraciones con error {error:.2e}"
+            }
+    return {
+        "function": function_str,
+        "derivative": derivative_str,
+        "root": x_current,
+        "iterations": max_iteraciones,
+        "final_error": error,
+        "iterations_detail": iterations_detail,
+        "converged": False,
+        "message": f"Se alcanzó el máximo de iteraciones ({max_iteraciones}). La solución puede no haber convergido completamente"
+    }
+
+def newton_raphson(f, f_derivative, function_str, derivative_str, x0, tolerancia, max_iteraciones, f_and_derivative=None):
+    compiled = jit_loop(build_newton_loop, f, f_derivative)
+    if compiled is not None:
+        result = newton_compilado(compiled, function_str, derivative_str, x0, tolerancia, max_iteraciones)
+        if result is not None:
+            return result
+
+    if f_and_derivative is None:
+        f_and_derivative = lambda x: (f(x), f_derivative(x))
+
     iterations_detail = []
     x_current = x0
 
     try:
         for i in range(max_iteraciones):
+            check_deadline(iterations_detail)
             try:
-                f_x = f(x_current)
-                f_prime_x = f_derivative(x_current)
+                f_x, f_prime_x = f_and_derivative(x_current)
 
                 if not math.isfinite(f_x):
                     return {
@@ -305,6 +895,8 @@ def newton_raphson(f, f_derivative, function_str, derivative_str, x0, tolerancia
             "message": f"Se alcanzó el máximo de iteraciones ({max_iteraciones}). La solución puede no haber convergido completamente"
         }
 
+    except SolverError:
+        raise
     except Exception as e:
         return {
             "function": function_str,
@@ -314,5 +906,470 @@ def newton_raphson(f, f_derivative, function_str, derivative_str, x0, tolerancia
             "error": f"Error inesperado en el algoritmo: {str(e)}"
         }
 
+def newton_higher_order(evaluate_all, function_str, derivatives_str, x0, tolerancia, max_iteraciones, mode):
+    """
+    Iteraciones de Halley (convergencia cúbica) y de Householder de orden 3
+    (convergencia cuártica). f y sus derivadas se evalúan juntas en cada paso.
+    """
+    iterations_detail = []
+    x_current = x0
+    base = {
+        "function": function_str,
+        "derivative": derivatives_str[0],
+        "higher_derivatives": derivatives_str[1:],
+        "mode": mode
+    }
+
+    def failure(message):
+        return {**base, "iterations_detail": iterations_detail, "converged": False, "error": message}
+
+    for i in range(max_iteraciones):
+        check_deadline(iterations_detail)
+        try:
+            values = [float(value) for value in evaluate_all(x_current)]
+            if not all(math.isfinite(value) for value in values):
+                return failure(f"La función o sus derivadas no están definidas en x = {x_current} (iteración {i + 1})")
+
+            f_x, f1, f2 = values[0], values[1], values[2]
+            if mode == 'halley':
+                numerator = 2 * f_x * f1
+                denominator = 2 * f1 * f1 - f_x * f2
+            else:
+                f3 = values[3]
+                numerator = 3 * f_x * (2 * f1 * f1 - f_x * f2)
+                denominator = 6 * f1 ** 3 - 6 * f_x * f1 * f2 + f_x * f_x * f3
+
+            if abs(denominator) >= 1e-15:
+                x_next = x_current - numerator / denominator
+            elif abs(f1) >= 1e-15:
+                # Denominador degenerado: se recurre a un paso de Newton
+                x_next = x_current - f_x / f1
+            else:
+                return failure(f"La derivada es cero en x = {x_current} (iteración {i + 1}). No se puede continuar")
+
+            if not math.isfinite(x_next):
+                return failure(f"El cálculo resultó en un valor no finito (iteración {i + 1})")
+
+            error = abs(x_next - x_current)
+            iterations_detail.append({
+                "iteration": i + 1,
+                "x": float(x_current),
+                "fx": f_x,
+                "fpx": f1,
+                "fppx": f2,
+                "x_next": float(x_next),
+                "error": float(error)
+            })
+
+            if error < tolerancia:
+                return {
+                    **base,
+                    "root": float(x_next),
+                    "iterations": i + 1,
+                    "final_error": float(error),
+                    "iterations_detail": iterations_detail,
+                    "converged": True,
+                    "message": f"Raíz encontrada en {i + 1} iteraciones con error {error:.2e}"
+                }
+
+            x_current = x_next
+
+        except OverflowError:
+            return failure(f"Desbordamiento numérico en la iteración {i + 1}. Los valores son demasiado grandes")
+        except Exception as e:
+            return failure(f"Error en la iteración {i + 1}: {str(e)}")
+
+    return {
+        **base,
+        "root": float(x_current),
+        "iterations": max_iteraciones,
+        "final_error": iterations_detail[-1]["error"] if iterations_detail else None,
+        "iterations_detail": iterations_detail,
+        "converged": False,
+        "message": f"Se alcanzó el máximo de iteraciones ({max_iteraciones}). La solución puede no haber convergido completamente"
+    }
+
+def newton_system(F, FJ, functions, variables, jacobian_str, x0, tolerancia, max_iteraciones, jacobian_update='exact', start=None):
+    iterations_detail = []
+    x_current = x0.copy()
+    function_evaluations = 0
+    jacobian_evaluations = 0
+
+    def failure(message):
+        return {
+            "functions": functions,
+            "variables": variables,
+            "jacobian": jacobian_str,
+            "jacobian_update": jacobian_update,
+            "iterations_detail": iterations_detail,
+            "function_evaluations": function_evaluations,
+            "jacobian_evaluations": jacobian_evaluations,
+            "converged": False,
+            "error": message
+        }
+
+    # El manejador ya evaluó el sistema en x0 para validarlo
+    F_x, J_x = start if start is not None else FJ(x_current)
+    function_evaluations += 1
+    jacobian_evaluations += 1
+
+    for i in range(max_iteraciones):
+        check_deadline(iterations_detail)
+        try:
+            if not np.all(np.isfinite(F_x)):
+                return failure(f"El sistema no está definido en x = {x_current.tolist()} (iteración {i + 1})")
+            if not np.all(np.isfinite(J_x)):
+                return failure(f"El jacobiano no está definido en x = {x_current.tolist()} (iteración {i + 1})")
+
+            try:
+                delta = np.linalg.solve(J_x, -F_x)
+            except np.linalg.LinAlgError:
+                return failure(f"El jacobiano es singular en x = {x_current.tolist()} (iteración {i + 1}). Intente con un vector inicial diferente")
+
+            x_next = x_current + delta
+            if not np.all(np.isfinite(x_next)):
+                return failure(f"El cálculo resultó en un valor no finito (iteración {i + 1})")
+
+            error = float(np.linalg.norm(delta))
+            iterations_detail.append({
+                "iteration": i + 1,
+                "x": x_current.tolist(),
+                "fx_norm": float(np.linalg.norm(F_x)),
+                "x_next": x_next.tolist(),
+                "error": error
+            })
+
+            if error < tolerancia:
+                return {
+                    "functions": functions,
+                    "variables": variables,
+                    "jacobian": jacobian_str,
+                    "jacobian_update": jacobian_update,
+                    "solution": x_next.tolist(),
+                    "iterations": i + 1,
+                    "final_error": error,
+                    "iterations_detail": iterations_detail,
+                    "function_evaluations": function_evaluations,
+                    "jacobian_evaluations": jacobian_evaluations,
+                    "converged": True,
+                    "message": f"Solución encontrada en {i + 1} iteraciones con error {error:.2e}"
+                }
+
+            if jacobian_update == 'broyden':
+                # Actualización de rango uno: evita reevaluar el jacobiano simbólico
+                F_next = F(x_next)
+                function_evaluations += 1
+                J_x = J_x + np.outer(F_next - F_x - J_x @ delta, delta) / (delta @ delta)
+                F_x = F_next
+            else:
+                F_x, J_x = FJ(x_next)
+                function_evaluations += 1
+                jacobian_evaluations += 1
+
+            x_current = x_next
+
+        except OverflowError:
+            return failure(f"Desbordamiento numérico en la iteración {i + 1}. Los valores son demasiado grandes")
+        except Exception as e:
+            return failure(f"Error en la iteración {i + 1}: {str(e)}")
+
+    return {
+        "functions": functions,
+        "variables": variables,
+        "jacobian": jacobian_str,
+        "jacobian_update": jacobian_update,
+        "solution": x_current.tolist(),
+        "iterations": max_iteraciones,
+        "final_error": iterations_detail[-1]["error"] if iterations_detail else None,
+        "iterations_detail": iterations_detail,
+        "function_evaluations": function_evaluations,
+        "jacobian_evaluations": jacobian_evaluations,
+        "converged": False,
+        "message": f"Se alcanzó el máximo de iteraciones ({max_iteraciones}). La solución puede no haber convergido completamente"
+    }
+
+def newton_multistart(f, f_derivative, function_str, derivative_str, xi, xu, starts, tolerancia, max_iteraciones):
+    x = np.linspace(xi, xu, starts)
+    x_start = x.copy()
+    active = np.ones(starts, dtype=bool)
+    converged = np.zeros(starts, dtype=bool)
+    iterations = np.zeros(starts, dtype=np.int64)
+    last_step = np.full(starts, np.nan)
+    step_ratio = np.full(starts, np.nan)
+
+    # Las iteraciones que salen muy lejos del rango se consideran divergentes
+    width = xu - xi
+    lower_bound = xi - 10 * width
+    upper_bound = xu + 10 * width
+
+    evaluations = 0
+    for i in range(max_iteraciones):
+        check_deadline()
+        lanes = np.flatnonzero(active)
+        if lanes.size == 0:
+            break
+
+        x_lane = x[lanes]
+        f_x = evaluate_vectorized(f, x_lane)
+        f_prime_x = evaluate_vectorized(f_derivative, x_lane)
+        evaluations += lanes.size
+
+        with np.errstate(all='ignore'):
+            step = f_x / f_prime_x
+            x_next = x_lane - step
+
+        diverged = (
+            ~np.isfinite(f_x) | ~np.isfinite(f_prime_x) | (np.abs(f_prime_x) < 1e-15)
+            | ~np.isfinite(x_next) | (x_next < lower_bound) | (x_next > upper_bound)
+        )
+        error = np.abs(step)
+        done = ~diverged & (error < tolerancia)
+
+        with np.errstate(all='ignore'):
+            step_ratio[lanes] = error / last_step[lanes]
+        last_step[lanes] = error
+        x[lanes] = np.where(diverged, x_lane, x_next)
+        iterations[lanes] = i + 1
+        converged[lanes[done]] = True
+        active[lanes[diverged | done]] = False
+
+    unconverged_count = int(np.count_nonzero(active))
+    diverged_count = starts - int(np.count_nonzero(converged)) - unconverged_count
+
+    in_range = converged & (x >= xi - tolerancia) & (x <= xu + tolerancia)
+    roots = cluster_roots(f, x[in_range], x_start[in_range], step_ratio[in_range], tolerancia)
+
+    if roots:
+        message = f"Se encontraron {len(roots)} raíces distintas en [{xi}, {xu}] a partir de {starts} puntos iniciales"
+    else:
+        message = f"No se encontraron raíces en [{xi}, {xu}] a partir de {starts} puntos iniciales. Intente con más puntos o un rango diferente"
+
+    return {
+        "function": function_str,
+        "derivative": derivative_str,
+        "interval": [float(xi), float(xu)],
+        "starts": starts,
+        "roots": roots,
+        "converged_starts": int(np.count_nonzero(converged)),
+        "diverged_starts": diverged_count,
+        "unconverged_starts": unconverged_count,
+        "out_of_range_starts": int(np.count_nonzero(converged & ~in_range)),
+        "iterations": int(iterations.max()) if starts else 0,
+        "function_evaluations": evaluations,
+        "converged": bool(roots),
+        "message": message
+    }
+
+def polynomial_multistart(cached, function_str, xi, xu):
+    coefficients = cached["polynomial"]
+    roots = polynomial_roots(coefficients, xi, xu)
+    degree = len(coefficients) - 1
+    if roots:
+        message = f"El polinomio de grado {degree} tiene {len(roots)} raíces reales en [{xi}, {xu}], obtenidas de la matriz compañera sin iterar"
+    else:
+        message = f"El polinomio de grado {degree} no tiene raíces reales en [{xi}, {xu}]"
+    return {
+        "function": function_str,
+        "derivative": str(cached["derivative"]),
+        "interval": [float(xi), float(xu)],
+        "roots": [{"root": root, "f_root": float(cached["f"](root))} for root in roots],
+        "method": "polynomial",
+        "degree": degree,
+        "coefficients": list(coefficients),
+        "iterations": 0,
+        "converged": bool(roots),
+        "message": message
+    }
+
+def cluster_roots(f, x_roots, x_start, step_ratio, tolerancia):
+    if x_roots.size == 0:
+        return []
+
+    order = np.argsort(x_roots)
+    x_roots, x_start, step_ratio = x_roots[order], x_start[order], step_ratio[order]
+    gap = np.maximum(10 * tolerancia, 1e-9 * (1 + np.abs(x_roots[:-1])))
+    boundaries = np.flatnonzero(np.diff(x_roots) > gap) + 1
+
+    roots = []
+    for members in np.split(np.arange(x_roots.size), boundaries):
+        f_values = np.abs(evaluate_vectorized(f, x_roots[members]))
+        best = members[int(np.nanargmin(f_values))] if np.isfinite(f_values).any() else members[0]
+
+        # Cerca de una raíz de multiplicidad m, Newton reduce el paso en un factor (m - 1) / m
+        ratios = step_ratio[members]
+        ratios = ratios[np.isfinite(ratios) & (ratios < 1)]
+        multiplicity = max(1, int(round(1 / (1 - float(np.median(ratios)))))) if ratios.size else 1
+
+        roots.append({
+            "root": float(x_roots[best]),
+            "f_root": float(f(float(x_roots[best]))),
+            "multiplicity": multiplicity,
+            "basin_count": int(members.size),
+            "basin_range": [float(x_start[members].min()), float(x_start[members].max())]
+        })
+    return roots
+
+def resolver_newton(function_str, x0, tolerancia, max_iteraciones, mode):
+    """
+    Todo lo que pasa por SymPy o evalúa f después de validar la petición: la derivada,
+    las revisiones en x0 y el método. Devuelve (cuerpo, estado HTTP).
+    """
+    try:
+        cached = prepare_function(function_str)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    f = RemoteFunction('f', cached["f"], compiled_function, function_str, "f")
+    f_derivative = RemoteFunction('f_derivative', cached["f_derivative"], compiled_function, function_str, "f_derivative")
+    f_and_derivative = RemoteFunction('f_and_derivative', cached["f_and_derivative"], compiled_function, function_str, "f_and_derivative")
+
+    try:
+        f_x0_test = f(x0)
+        if not math.isfinite(f_x0_test):
+            return {"error": f"La función no está definida en x0 = {x0} (resultado: {f_x0_test})"}, 400
+    except SolverError:
+        raise
+    except Exception as e:
+        return {"error": f"La función no se puede evaluar en x0 = {x0}: {str(e)}"}, 400
+
+    try:
+        f_prime_x0_test = f_derivative(x0)
+        if not math.isfinite(f_prime_x0_test):
+            return {"error": f"La derivada no está definida en x0 = {x0} (resultado: {f_prime_x0_test})"}, 400
+        if abs(f_prime_x0_test) < 1e-15:
+            return {"error": f"La derivada es cero o muy cercana a cero en x0 = {x0}. El método puede no converger"}, 400
+    except SolverError:
+        raise
+    except Exception as e:
+        return {"error": f"La derivada no se puede evaluar en x0 = {x0}: {str(e)}"}, 400
+
+    if mode in HIGHER_ORDER_MODES:
+        order = HIGHER_ORDER_MODES[mode]
+        try:
+            evaluate_all, derivatives_str = compile_higher_order(cached, order)
+        except SolverError:
+            raise
+        except Exception as e:
+            return {"error": f"No se pudieron calcular las derivadas de orden superior: {str(e)}"}, 400
+
+        evaluate_all = RemoteFunction('f_and_derivatives', evaluate_all, compiled_higher_order, function_str, order)
+        return newton_higher_order(evaluate_all, function_str, derivatives_str, x0, tolerancia, max_iteraciones, mode), 200
+
+    return newton_raphson(
+        f, f_derivative, function_str, str(cached["derivative"]),
+        x0, tolerancia, max_iteraciones, f_and_derivative
+    ), 200
+
+def calcular_derivada(function_str, variable):
+    """La derivada de /derivative, con sympify dentro del plazo. Devuelve (cuerpo, estado HTTP)."""
+    from sympy import symbols, sympify, SympifyError
+    try:
+        var = symbols(variable)
+    except Exception as e:
+        return {"error": f"Nombre de variable inválido '{variable}': {str(e)}"}, 400
+
+    cached = derivative_cache.lookup(function_str, variable)
+
+    if cached:
+        expr = cached["expr"]
+    else:
+        try:
+            with track_phase('parse'):
+                expr = sympify(function_str)
+        except SympifyError as e:
+            return {"error": f"La función no es válida matemáticamente: {str(e)}. Asegúrese de usar sintaxis correcta"}, 400
+        except Exception as e:
+            return {"error": f"Error al interpretar la función: {str(e)}"}, 400
+
+    if not expr.has(var):
+        return {"error": f"La función debe contener la variable '{variable}'"}, 400
+
+    if cached:
+        derivative = cached["derivative"]
+    else:
+        try:
+            with track_phase('compile'):
+                derivative = derive(expr, var)
+        except Exception as e:
+            return {"error": f"No se pudo calcular la derivada: {str(e)}"}, 400
+
+        try:
+            derivative_cache.store(function_str, variable, expr, derivative)
+        except Exception:
+            pass
+
+    return {
+        "function": function_str,
+        "variable": variable,
+        "derivative": str(derivative),
+        "derivative_lambda": "Available",
+        "message": f"Derivada calculada exitosamente con respecto a '{variable}'"
+    }, 200
+
+def resolver_multistart(function_str, xi, xu, starts, tolerancia, max_iteraciones, all_roots):
+    """La derivada y el barrido de puntos iniciales. Devuelve (cuerpo, estado HTTP)."""
+    try:
+        cached = prepare_function(function_str)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    # Polinomios: con 'all_roots' las raíces salen de la matriz compañera, sin iterar
+    if all_roots:
+        if cached.get("polynomial") is None:
+            return {"error": "La opción 'all_roots' solo está disponible para polinomios (por ejemplo 'x**3 - 2*x - 5')"}, 400
+        return polynomial_multistart(cached, function_str, xi, xu), 200
+
+    return newton_multistart(
+        RemoteFunction('f', cached["f"], compiled_function, function_str, "f", vectorized=True),
+        RemoteFunction('f_derivative', cached["f_derivative"], compiled_function, function_str, "f_derivative", vectorized=True),
+        function_str, str(cached["derivative"]),
+        xi, xu, starts, tolerancia, max_iteraciones
+    ), 200
+
+def resolver_sistema(functions, variables, x0, tolerancia, max_iteraciones, jacobian_update):
+    """El jacobiano simbólico, la revisión en x0 y el método. Devuelve (cuerpo, estado HTTP)."""
+    try:
+        F, FJ, jacobian_str = compile_system(functions, variables)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    F = RemoteFunction('F', F, compiled_system, functions, variables, 0)
+    FJ = RemoteFunction('F_and_J', FJ, compiled_system, functions, variables, 1)
+
+    try:
+        F_x0, J_x0 = FJ(x0)
+        if not (np.all(np.isfinite(F_x0)) and np.all(np.isfinite(J_x0))):
+            return {"error": f"El sistema o su jacobiano no están definidos en x0 = {x0.tolist()}"}, 400
+    except SolverError:
+        raise
+    except Exception as e:
+        return {"error": f"El sistema no se puede evaluar en x0 = {x0.tolist()}: {str(e)}"}, 400
+
+    return newton_system(F, FJ, list(functions), list(variables), jacobian_str, x0, tolerancia, max_iteraciones,
+                         jacobian_update, (F_x0, J_x0)), 200
+
+# Calentamiento al arrancar: compila y evalúa funciones habituales antes de declararse listo.
+# WARMUP_EXPRESSIONS reemplaza la lista (separadas por ';'); WARMUP=0 lo desactiva.
+WARMUP_EXPRESSIONS = [e.strip() for e in os.environ.get('WARMUP_EXPRESSIONS', 'x**2 - 2;x**3 - 2*x - 5;cos(x) - x;exp(x) - 3*x;sin(x)').split(';') if e.strip()]
+
+def warm_expression(expression):
+    cached = prepare_function(expression)
+    for value in WARMUP_POINTS:
+        cached["f"](value)
+        cached["f_derivative"](value)
+
+warmup = Warmup([({"expression": expression}, partial(warm_expression, expression))
+                 for expression in WARMUP_EXPRESSIONS], sympy=True, pool=solver_pool)
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    if not warmup.done.is_set():
+        return jsonify({"status": "warming_up", "method": "newton-raphson"}), 503
+    return jsonify({"status": "ready", "method": "newton-raphson", "warmup": warmup.as_dict()})
+
+# Con el recargador de Werkzeug solo se calienta el proceso que atiende las peticiones
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    warmup.start()
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5003, debug=True)
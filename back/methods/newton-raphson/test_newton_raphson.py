@@ -0,0 +1,96 @@
+import math
+
+import pytest
+
+from common.cache import cache_key
+
+def test_newton_converges_to_root(client):
+    response = client.post('/solve', json={'function': 'x**3 - 2*x - 5', 'x0': 2})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['converged']
+    assert body['root'] == pytest.approx(2.0945514815423265, abs=1e-9)
+
+def test_derivative_cache_key_keeps_token_separation(service, client):
+    normalize = service.derivative_cache.normalize
+    assert normalize('x**2-4') == normalize(' x**2 - 4 ')
+    assert normalize('1 0*x') != normalize('10*x')
+
+    assert client.post('/derivative', json={'function': '10*x'}).status_code == 200
+    assert client.post('/derivative', json={'function': '1 0*x'}).status_code == 400
+
+def test_poisoned_shared_derivative_is_rejected(service, client):
+    key = (service.derivative_cache.normalize('exp(x) - 3*x'), 'x')
+    service.derivative_cache.shared.set(cache_key(service.metrics.service, 'derivative', *key), b'__import__("os").getpid()', 60)
+    assert service.derivative_cache.lookup(*key) is None
+
+    response = client.post('/solve', json={'function': 'exp(x) - 3*x', 'x0': 2})
+    assert response.status_code == 200
+    assert response.get_json()['root'] == pytest.approx(1.5121345516578424, abs=1e-9)
+
+def test_derivative_endpoint_returns_simplified_derivative(client):
+    response = client.post('/derivative', json={'function': 'sin(x)*x'})
+    assert response.status_code == 200
+    assert response.get_json()['derivative'] == 'x*cos(x) + sin(x)'
+
+def test_derivative_cache_reuses_compiled_entry(service):
+    entry = service.prepare_function('x**4 - 3*x')
+    assert service.derivative_cache.lookup('x**4 - 3*x', 'x') is entry
+    # La misma expresión con otros espacios comparte la entrada
+    assert service.derivative_cache.lookup(' x**4-3*x ', 'x') is entry
+    assert str(entry["derivative"]) == '4*x**3 - 3'
+
+def test_multistart_finds_every_root_in_range(client):
+    response = client.post('/multistart', json={'function': 'sin(x)', 'xi': -5, 'xu': 5})
+    assert response.status_code == 200
+    roots = [root['root'] for root in response.get_json()['roots']]
+    assert roots == pytest.approx([-math.pi, 0.0, math.pi], abs=1e-9)
+
+def test_multistart_estimates_root_multiplicity(client):
+    response = client.post('/multistart', json={'function': '(x - 1)**2*(x + 2)', 'xi': -3, 'xu': 3})
+    assert response.status_code == 200
+    roots = response.get_json()['roots']
+    assert [root['multiplicity'] for root in roots] == [1, 2]
+    assert roots[1]['root'] == pytest.approx(1.0, abs=1e-5)
+
+def test_system_accepts_sympy_names_as_variables(client):
+    # E, I, S, N y Q son constantes o funciones de SymPy; como variables son símbolos
+    for variables in (['E', 'I'], ['S', 'N']):
+        first, second = variables
+        response = client.post('/system', json={
+            'functions': [f'{first}**2 - 2', f'{second} - {first}'],
+            'variables': variables,
+            'x0': [1, 1]
+        })
+        assert response.status_code == 200
+        assert response.get_json()['solution'] == pytest.approx([math.sqrt(2), math.sqrt(2)], abs=1e-9)
+
+def test_system_rejects_reserved_variable_names(client):
+    response = client.post('/system', json={'functions': ['lambda - 1'], 'variables': ['lambda'], 'x0': [0]})
+    assert response.status_code == 400
+
+@pytest.mark.parametrize('mode', ['halley', 'householder'])
+def test_higher_order_modes_need_fewer_iterations(client, mode):
+    newton = client.post('/solve', json={'function': 'x**3 - 2*x - 5', 'x0': 2}).get_json()
+    response = client.post('/solve', json={'function': 'x**3 - 2*x - 5', 'x0': 2, 'mode': mode})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['mode'] == mode
+    assert body['root'] == pytest.approx(newton['root'], abs=1e-12)
+    assert body['iterations'] < newton['iterations']
+
+def test_unknown_mode_is_rejected(client):
+    response = client.post('/solve', json={'function': 'x**2 - 2', 'x0': 1, 'mode': 'secant'})
+    assert response.status_code == 400
+
+def test_all_roots_of_polynomial_come_from_companion_matrix(client):
+    response = client.post('/multistart', json={'function': 'x**3 - 6*x**2 + 11*x - 6', 'xi': 0, 'xu': 4, 'all_roots': True})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['method'] == 'polynomial'
+    assert body['iterations'] == 0
+    assert [root['root'] for root in body['roots']] == pytest.approx([1.0, 2.0, 3.0], abs=1e-12)
+
+def test_all_roots_requires_a_polynomial(client):
+    response = client.post('/multistart', json={'function': 'sin(x)', 'xi': 0, 'xu': 4, 'all_roots': True})
+    assert response.status_code == 400
@@ -1,13 +1,31 @@
 from flask import Flask, jsonify, request
 import math
 import numpy as np
-from sympy import symbols, sympify, lambdify
 from flask_cors import CORS
+from functools import partial
 import traceback
 import re
+import os
+import sys
+
+# El paquete común (back/common) está dos niveles arriba, también dentro de la imagen
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common import init_service
+from common.deadlines import SolverError, check_deadline
+from common.cumulative import install_cumulative
+from common.diagnostics import track_phase
+from common.expressions import build_function, compile_expression, evaluate_vectorized
+from common.metrics import json_response
+from common.pool import SolverPool
+from common.result_cache import cached_result
+from common.warmup import WARMUP_POINTS, Warmup
 
 app = Flask(__name__)
 CORS(app)
+metrics = init_service(app, 'romberg')
+# Procesos de cálculo: compilan y evalúan las funciones del usuario, así el plazo las puede cortar
+solver_pool = SolverPool(app)
 
 @app.route('/solve', methods=['POST'])
 def romberg_solve():
@@ -111,6 +129,13 @@ def romberg_solve():
         
         # Intentar parsear la función
         try:
+            validate_function(f_function_str)
+            # Con los datos ya validados, un cálculo idéntico se responde desde la caché sin
+            # interpretar la función
+            cached = cached_result(function=f_function_str, a=a, b=b, tolerance=tolerancia,
+                                   max_iterations=max_iteraciones)
+            if cached is not None:
+                return cached
             f = parse_function(f_function_str)
         except ValueError as ve:
             return jsonify({
@@ -118,45 +143,22 @@ def romberg_solve():
                 "message": str(ve),
                 "suggestion": "Verifica que la función use sintaxis de Python válida. Ejemplos: 'x**2 + 1', 'sin(x)', 'exp(x)', 'log(x)'"
             }), 400
+        except SolverError:
+            raise
         except Exception as e:
             return jsonify({
                 "error": "Error inesperado al interpretar la función",
                 "message": f"No se pudo procesar la función matemática: {str(e)}"
             }), 400
         
-        # Validar que la función sea evaluable en el intervalo
+        # La revisión de f en el intervalo y el método, en una sola llamada al proceso de cálculo
         try:
-            test_points = [a, (a + b) / 2, b]
-            for point in test_points:
-                result = f(point)
-                # Ser más permisivo con los tipos de resultado
-                if result is None or (isinstance(result, (int, float, np.number)) and (math.isnan(float(result)) or math.isinf(float(result)))):
-                    return jsonify({
-                        "error": "Función no evaluable",
-                        "message": f"La función no puede ser evaluada correctamente en x={point}. Resultado: {result}",
-                        "suggestion": "Verifica que la función esté definida en todo el intervalo [a, b]"
-                    }), 400
-        except Exception as e:
-            return jsonify({
-                "error": "Error al evaluar la función",
-                "message": f"La función no puede ser evaluada en el intervalo dado: {str(e)}",
-                "suggestion": "Verifica que la función esté definida en todo el intervalo [a, b] y no tenga divisiones por cero u operaciones inválidas"
-            }), 400
-        
-        # Ejecutar el método de Romberg
-        try:
-            result = metodo_romberg(f, f_function_str, a, b, tolerancia, max_iteraciones)
-            
-            # Verificar si el resultado contiene error REAL (no el error de convergencia)
-            if "error" in result and "integral" not in result:
-                return jsonify({
-                    "error": "Error en el cálculo del método de Romberg",
-                    "message": result["error"],
-                    "suggestion": "Intenta con una función más simple o verifica que esté bien definida"
-                }), 500
-            
-            return jsonify(result)
+            with track_phase('compute'):
+                result, status = solver_pool.run(resolver_romberg, f, f_function_str, a, b, tolerancia, max_iteraciones)
+            return json_response(result), status
         
+        except SolverError:
+            raise
         except Exception as e:
             return jsonify({
                 "error": "Error durante el cálculo",
@@ -164,6 +166,8 @@ def romberg_solve():
                 "suggestion": "Intenta con parámetros diferentes o contacta al administrador si el problema persiste"
             }), 500
     
+    except SolverError:
+        raise
     except Exception as e:
         # Capturar cualquier error no previsto
         return jsonify({
@@ -186,10 +190,7 @@ def health_check():
             "message": f"Error en el servicio: {str(e)}"
         }), 500
 
-def parse_function(function_str):
-    """
-    Parsea una función matemática de string a función evaluable
-    """
+def validate_function(function_str):
     if not isinstance(function_str, str):
         raise ValueError("La función debe ser una cadena de texto")
     
@@ -210,30 +211,38 @@ def parse_function(function_str):
     for pattern in forbidden_patterns:
         if re.search(pattern, function_str, re.IGNORECASE):
             raise ValueError("La función contiene elementos no permitidos por seguridad")
-    
-    x = symbols('x')
+
+def only_x(expr, names):
+    if not expr.free_symbols.issubset(set(names)):
+        raise ValueError("La función solo puede contener la variable 'x'")
+
+def compile_function(function_str):
+    # Receta de la RemoteFunction: lo que pasa por SymPy se compila en un proceso de cálculo
+    func = build_function(function_str, check=only_x)
+    # Probar la función con algunos valores
     try:
-        expr = sympify(function_str)
-        if not expr.free_symbols.issubset({x}):
-            raise ValueError("La función solo puede contener la variable 'x'")
-        
-        func = lambdify(x, expr, modules=['numpy', 'math'])
-        
-        # Probar la función con algunos valores
-        try:
-            test_val = func(1.0)
-            # Ser más permisivo - solo verificar que no sea None y que sea un número válido
-            if test_val is None:
-                raise ValueError("La función retorna None")
-            # Convertir a float para verificar
-            float_val = float(test_val)
-            if math.isnan(float_val) or math.isinf(float_val):
-                raise ValueError(f"La función retorna un valor no válido: {test_val}")
-        except Exception as e:
-            raise ValueError(f"Error al evaluar la función de prueba: {str(e)}")
-        
-        return func
-        
+        test_val = func(1.0)
+        # Ser más permisivo - solo verificar que no sea None y que sea un número válido
+        if test_val is None:
+            raise ValueError("La función retorna None")
+        # Convertir a float para verificar
+        float_val = float(test_val)
+        if math.isnan(float_val) or math.isinf(float_val):
+            raise ValueError(f"La función retorna un valor no válido: {test_val}")
+    except Exception as e:
+        raise ValueError(f"Error al evaluar la función de prueba: {str(e)}")
+    return func
+
+def parse_function(function_str):
+    """
+    Parsea una función matemática de string a función evaluable
+    """
+    function_str = function_str.strip()
+    try:
+        return solver_pool.function('f', compile_function, function_str,
+                                    local=compile_expression(function_str) is not None)
+    except SolverError:
+        raise
     except Exception as e:
         if "sympify" in str(e).lower():
             raise ValueError(f"Sintaxis matemática inválida: {str(e)}")
@@ -251,9 +260,16 @@ def regla_trapecio_compuesta(f, a, b, n):
         h = (b - a) / n
         suma = f(a) + f(b)
         
+        # Los nodos interiores de una vez con el núcleo de NumPy; si alguno no es finito se
+        # evalúa punto a punto para informar el error como siempre
+        values = evaluate_vectorized(f, a + h * np.arange(1, n))
+        values = values.tolist() if np.isfinite(values).all() else None
+        
         for i in range(1, n):
+            if i % 1024 == 0:
+                check_deadline()
             x_i = a + i * h
-            valor = f(x_i)
+            valor = f(x_i) if values is None else values[i - 1]
             # Convertir a float y verificar
             try:
                 valor_float = float(valor)
@@ -270,6 +286,8 @@ def regla_trapecio_compuesta(f, a, b, n):
         
         return resultado
         
+    except SolverError:
+        raise
     except Exception as e:
         raise ValueError(f"Error en regla del trapecio: {str(e)}")
 
@@ -281,6 +299,7 @@ def metodo_romberg(f, f_function_str, a, b, tolerancia, max_iteraciones):
         R = np.zeros((max_iteraciones, max_iteraciones))
         
         for i in range(max_iteraciones):
+            check_deadline([R[k, :k + 1].tolist() for k in range(i)])
             try:
                 n = 2**i
                 R[i, 0] = regla_trapecio_compuesta(f, a, b, n)
@@ -352,12 +371,72 @@ def metodo_romberg(f, f_function_str, a, b, tolerancia, max_iteraciones):
             "suggestion": "Considera aumentar max_iterations o reducir la tolerancia"
         }
     
+    except SolverError:
+        raise
     except Exception as e:
         return {
             "function": f_function_str,
             "error": f"Error en el cálculo del método de Romberg: {str(e)}"
         }
 
+def resolver_romberg(f, f_function_str, a, b, tolerancia, max_iteraciones):
+    """Revisa f en el intervalo y ejecuta el método. Devuelve (cuerpo, estado HTTP)."""
+    # Validar que la función sea evaluable en el intervalo
+    try:
+        test_points = [a, (a + b) / 2, b]
+        for point in test_points:
+            result = f(point)
+            # Ser más permisivo con los tipos de resultado
+            if result is None or (isinstance(result, (int, float, np.number)) and (math.isnan(float(result)) or math.isinf(float(result)))):
+                return {
+                    "error": "Función no evaluable",
+                    "message": f"La función no puede ser evaluada correctamente en x={point}. Resultado: {result}",
+                    "suggestion": "Verifica que la función esté definida en todo el intervalo [a, b]"
+                }, 400
+    except SolverError:
+        raise
+    except Exception as e:
+        return {
+            "error": "Error al evaluar la función",
+            "message": f"La función no puede ser evaluada en el intervalo dado: {str(e)}",
+            "suggestion": "Verifica que la función esté definida en todo el intervalo [a, b] y no tenga divisiones por cero u operaciones inválidas"
+        }, 400
+
+    result = metodo_romberg(f, f_function_str, a, b, tolerancia, max_iteraciones)
+    # Verificar si el resultado contiene error REAL (no el error de convergencia)
+    if "error" in result and "integral" not in result:
+        return {
+            "error": "Error en el cálculo del método de Romberg",
+            "message": result["error"],
+            "suggestion": "Intenta con una función más simple o verifica que esté bien definida"
+        }, 500
+    return result, 200
+
+# Integral acumulada en toda la malla (POST /cumulative)
+install_cumulative(app, solver_pool, parse_function, ('trapezoid', 'simpson', 'romberg'), 'romberg', validate_function=validate_function)
+
+# Calentamiento al arrancar: compila y evalúa funciones habituales antes de declararse listo.
+# WARMUP_EXPRESSIONS reemplaza la lista (separadas por ';'); WARMUP=0 lo desactiva.
+WARMUP_EXPRESSIONS = [e.strip() for e in os.environ.get('WARMUP_EXPRESSIONS', 'x**2;sin(x);exp(x);x**3 + 2*x;sqrt(x);log(x)').split(';') if e.strip()]
+
+def warm_expression(expression):
+    f = parse_function(expression)
+    for value in WARMUP_POINTS:
+        f(value)
+
+warmup = Warmup([({"expression": expression}, partial(warm_expression, expression))
+                 for expression in WARMUP_EXPRESSIONS], sympy=True, pool=solver_pool)
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    if not warmup.done.is_set():
+        return jsonify({"status": "warming_up", "method": "romberg-method"}), 503
+    return jsonify({"status": "ready", "method": "romberg-method", "warmup": warmup.as_dict()})
+
+# Con el recargador de Werkzeug solo se calienta el proceso que atiende las peticiones
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    warmup.start()
+
 if __name__ == '__main__':
     try:
         app.run(host='0.0.0.0', port=5010, debug=True)
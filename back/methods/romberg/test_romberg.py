@@ -0,0 +1,53 @@
+import math
+import time
+
+import pytest
+
+def test_romberg_converges_to_closed_form(client):
+    response = client.post('/solve', json={'function': 'exp(-x**2)', 'a': 0, 'b': 1, 'tolerance': 1e-8})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['converged']
+    assert body['integral'] == pytest.approx(math.sqrt(math.pi) / 2 * math.erf(1), abs=1e-7)
+
+def test_romberg_rejects_reversed_interval(client):
+    response = client.post('/solve', json={'function': 'x**2', 'a': 1, 'b': 0})
+    assert response.status_code == 400
+
+def test_romberg_is_exact_for_cubics(client):
+    response = client.post('/solve', json={'function': 'x**3 - x', 'a': 0, 'b': 2})
+    assert response.status_code == 200
+    assert response.get_json()['integral'] == pytest.approx(2.0, abs=1e-12)
+
+def wait_for_job(client, job_id):
+    for _ in range(500):
+        job = client.get(f'/jobs/{job_id}').get_json()
+        if job['finished_at'] is not None:
+            return job
+        time.sleep(0.01)
+    raise AssertionError("el trabajo no terminó")
+
+def test_job_runs_route_in_background(client):
+    response = client.post('/jobs', json={'route': '/solve', 'function': 'exp(-x**2)', 'a': 0, 'b': 1})
+    assert response.status_code == 202
+    job_id = response.get_json()['id']
+    assert response.headers['Location'] == f'/jobs/{job_id}'
+
+    job = wait_for_job(client, job_id)
+    assert job['status'] == 'done'
+    assert job['status_code'] == 200
+    assert job['result']['integral'] == pytest.approx(math.sqrt(math.pi) / 2 * math.erf(1), abs=1e-7)
+
+def test_job_with_invalid_payload_fails_like_the_route(client):
+    job_id = client.post('/jobs', json={'route': '/solve', 'function': 'x**2', 'a': 1, 'b': 0}).get_json()['id']
+    job = wait_for_job(client, job_id)
+    assert job['status'] == 'failed'
+    assert job['status_code'] == 400
+
+def test_job_rejects_unknown_route(client):
+    response = client.post('/jobs', json={'route': '/health'})
+    assert response.status_code == 400
+
+def test_unknown_job_is_not_found(client):
+    assert client.get('/jobs/no-existe').status_code == 404
+    assert client.delete('/jobs/no-existe').status_code == 404
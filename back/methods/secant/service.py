@@ -1,12 +1,30 @@
 from flask import Flask, jsonify, request
 import numpy as np
 import math
-from sympy import symbols, sympify, lambdify
 from flask_cors import CORS
+from functools import partial
 import re
+import os
+import sys
+
+# El paquete común (back/common) está dos niveles arriba, también dentro de la imagen
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common import init_service
+from common.deadlines import SolverError, check_deadline
+from common.diagnostics import track_phase
+from common.expressions import build_function, compile_expression
+from common.jit import JIT_CHUNK, call_compiled, jit_function, jit_loop, numba
+from common.metrics import json_response
+from common.pool import SolverPool
+from common.result_cache import cached_result
+from common.warmup import WARMUP_POINTS, Warmup
 
 app = Flask(__name__)
 CORS(app)
+metrics = init_service(app, 'secant')
+# Procesos de cálculo: compilan y evalúan las funciones del usuario, así el plazo las puede cortar
+solver_pool = SolverPool(app)
 
 @app.route('/solve', methods=['POST'])
 def secant_solve():
@@ -103,6 +121,13 @@ def secant_solve():
             }), 400
         
         try:
+            validate_function(function_str)
+            # Con los datos ya validados, un cálculo idéntico se responde desde la caché sin
+            # interpretar la función
+            cached = cached_result(function=function_str, x0=x0, x1=x1, tolerance=tolerancia,
+                                   max_iterations=max_iteraciones)
+            if cached is not None:
+                return cached
             f = parse_function(function_str)
         except ValueError as ve:
             return jsonify({
@@ -110,6 +135,8 @@ def secant_solve():
                 "message": str(ve),
                 "suggestion": "Verifica que la función use sintaxis de Python válida. Ejemplos: 'x**2 - 4', 'sin(x) - 0.5', 'exp(x) - 2'"
             }), 400
+        except SolverError:
+            raise
         except Exception as e:
             return jsonify({
                 "error": "Error inesperado al interpretar la función",
@@ -117,58 +144,13 @@ def secant_solve():
             }), 400
         
         try:
-            f_x0 = f(x0)
-            f_x1 = f(x1)
-            
-            for val, name in [(f_x0, f'f({x0})'), (f_x1, f'f({x1})')]:
-                if val is None:
-                    return jsonify({
-                        "error": "Función no evaluable",
-                        "message": f"La función retorna None en {name}",
-                        "suggestion": "Verifica que la función esté bien definida en los puntos iniciales"
-                    }), 400
-                
-                try:
-                    val_float = float(val)
-                    if math.isnan(val_float) or math.isinf(val_float):
-                        return jsonify({
-                            "error": "Función no evaluable",
-                            "message": f"La función produce valores no válidos en {name}: {val}",
-                            "suggestion": "Verifica que la función no tenga divisiones por cero u operaciones inválidas"
-                        }), 400
-                except (TypeError, ValueError):
-                    return jsonify({
-                        "error": "Función no evaluable",
-                        "message": f"La función no produce valores numéricos en {name}: {val}",
-                        "suggestion": "Verifica que la función retorne valores numéricos"
-                    }), 400
-            
-            if abs(f_x1 - f_x0) < 1e-15:
-                return jsonify({
-                    "error": "Condición inicial problemática",
-                    "message": f"Los valores f(x0)={f_x0} y f(x1)={f_x1} son prácticamente iguales, lo que causaría división por cero",
-                    "suggestion": "Elige valores iniciales x0 y x1 donde f(x0) y f(x1) sean significativamente diferentes"
-                }), 400
-                
-        except Exception as e:
-            return jsonify({
-                "error": "Error al evaluar la función",
-                "message": f"La función no puede ser evaluada en los puntos iniciales: {str(e)}",
-                "suggestion": "Verifica que la función esté bien definida y no tenga operaciones inválidas"
-            }), 400
-        
-        try:
-            result = secant_method(f, function_str, x0, x1, tolerancia, max_iteraciones)
-            
-            if "error" in result and "root" not in result:
-                return jsonify({
-                    "error": "Error en el cálculo del método de la secante",
-                    "message": result["error"],
-                    "suggestion": "Intenta con valores iniciales diferentes o verifica que la función tenga raíces en la región de búsqueda"
-                }), 500
-            
-            return jsonify(result)
+            # Las revisiones en x0 y x1 y el método, en una sola llamada al proceso de cálculo
+            with track_phase('compute'):
+                result, status = solver_pool.run(resolver_secante, f, function_str, x0, x1, tolerancia, max_iteraciones)
+            return json_response(result), status
         
+        except SolverError:
+            raise
         except Exception as e:
             return jsonify({
                 "error": "Error durante el cálculo",
@@ -176,6 +158,8 @@ def secant_solve():
                 "suggestion": "Intenta con parámetros diferentes o contacta al administrador si el problema persiste"
             }), 500
     
+    except SolverError:
+        raise
     except Exception as e:
         return jsonify({
             "error": "Error interno del servidor",
@@ -197,7 +181,7 @@ def health_check():
             "message": f"Error en el servicio: {str(e)}"
         }), 500
 
-def parse_function(function_str):
+def validate_function(function_str):
     if not isinstance(function_str, str):
         raise ValueError("La función debe ser una cadena de texto")
     
@@ -217,38 +201,126 @@ def parse_function(function_str):
     for pattern in forbidden_patterns:
         if re.search(pattern, function_str, re.IGNORECASE):
             raise ValueError("La función contiene elementos no permitidos por seguridad")
-    
-    x = symbols('x')
+
+def only_x(expr, names):
+    if not expr.free_symbols.issubset(set(names)):
+        raise ValueError("La función solo puede contener la variable 'x'")
+
+def compile_function(function_str):
+    # Receta de la RemoteFunction: lo que pasa por SymPy se compila en un proceso de cálculo
+    func = build_function(function_str, horner=True, check=only_x)
     try:
-        expr = sympify(function_str)
-        if not expr.free_symbols.issubset({x}):
-            raise ValueError("La función solo puede contener la variable 'x'")
-        
-        func = lambdify(x, expr, modules=['numpy', 'math'])
-        
-        try:
-            test_val = func(1.0)
-            if test_val is None:
-                raise ValueError("La función retorna None")
-            float_val = float(test_val)
-            if math.isnan(float_val) or math.isinf(float_val):
-                raise ValueError(f"La función retorna un valor no válido: {test_val}")
-        except Exception as e:
-            raise ValueError(f"Error al evaluar la función de prueba: {str(e)}")
-        
-        return func
-        
+        test_val = func(1.0)
+        if test_val is None:
+            raise ValueError("La función retorna None")
+        float_val = float(test_val)
+        if math.isnan(float_val) or math.isinf(float_val):
+            raise ValueError(f"La función retorna un valor no válido: {test_val}")
+    except Exception as e:
+        raise ValueError(f"Error al evaluar la función de prueba: {str(e)}")
+    return func
+
+def parse_function(function_str):
+    function_str = function_str.strip()
+    try:
+        return solver_pool.function('f', compile_function, function_str,
+                                    local=compile_expression(function_str, horner=True) is not None)
+    except SolverError:
+        raise
     except Exception as e:
         if "sympify" in str(e).lower():
             raise ValueError(f"Sintaxis matemática inválida: {str(e)}")
         else:
             raise ValueError(f"No se pudo interpretar la función: {str(e)}")
 
+def build_secant_loop(source):
+    f = jit_function(source, ('x',))
+
+    @numba.njit(error_model='numpy')
+    def loop(x0, x1, tolerance, start, stop, rows):
+        # Devuelve (iteraciones hechas, estado): 1 convergió, 0 terminó el tramo, -1 anomalía
+        for i in range(start, stop):
+            f_x0 = f(x0)
+            f_x1 = f(x1)
+            denominador = f_x1 - f_x0
+            if not (math.isfinite(f_x0) and math.isfinite(f_x1)) or abs(denominador) < 1e-15:
+                return i, -1
+            x2 = x1 - f_x1 * (x1 - x0) / denominador
+            if not math.isfinite(x2):
+                return i, -1
+            error = abs((x2 - x1) / x2) if abs(x2) > 1e-15 else abs(x2 - x1)
+            rows[i, 0] = x0
+            rows[i, 1] = x1
+            rows[i, 2] = f_x0
+            rows[i, 3] = f_x1
+            rows[i, 4] = x2
+            rows[i, 5] = error
+            if error < tolerance:
+                return i + 1, 1
+            x0, x1 = x1, x2
+        return stop, 0
+
+    loop(0.0, 0.0, 0.0, 0, 0, np.zeros((1, 6)))
+    return loop
+
+def secante_compilada(loop, function_str, x0, x1, tolerancia, max_iteraciones):
+    """
+    Itera con el bucle compilado, en tramos de JIT_CHUNK para revisar el plazo. Devuelve
+    None ante un valor no finito o una secante horizontal: secant_method repite el cálculo
+    en Python y produce el mensaje de error de siempre.
+    """
+    rows = np.empty((max_iteraciones, 6))
+    detalles = []
+    for start in range(0, max_iteraciones, JIT_CHUNK):
+        check_deadline(detalles)
+        outcome = call_compiled(loop, x0, x1, tolerancia, start, min(start + JIT_CHUNK, max_iteraciones), rows)
+        if outcome is None or outcome[1] < 0:
+            return None
+        count, status = outcome
+        for i, row in enumerate(rows[start:count].tolist(), start):
+            detalles.append({
+                "iteration": i + 1,
+                "x0": row[0],
+                "x1": row[1],
+                "fx0": row[2],
+                "fx1": row[3],
+                "x2": row[4],
+                "error": row[5]
+            })
+        if status == 1:
+            return {
+                "function": function_str,
+                "root": detalles[-1]["x2"],
+                "iterations": count,
+                "error": detalles[-1]["error"],
+                "iterations_detail": detalles,
+                "converged": True,
+                "method": "Método de la Secante",
+                "message": "Raíz encontrada exitosamente"
+            }
+        x0, x1 = detalles[-1]["x1"], detalles[-1]["x2"]
+    return {
+        "function": function_str,
+        "iterations_detail": detalles,
+        "error": f"El método no convergió en {max_iteraciones} iteraciones",
+        "converged": False,
+        "method": "Método de la Secante",
+        "message": f"Se alcanzó el número máximo de iteraciones ({max_iteraciones}) sin convergencia",
+        "suggestion": "Intenta aumentar max_iterations, cambiar los valores iniciales, o reducir la tolerancia"
+    }
+
 def secant_method(f, function_str, x0, x1, tolerancia, max_iteraciones):
+    compiled = jit_loop(build_secant_loop, f)
+    if compiled is not None:
+        result = secante_compilada(compiled, function_str, x0, x1, tolerancia, max_iteraciones)
+        if result is not None:
+            return result
+
     try:
         detalles = []
 
         for i in range(max_iteraciones):
+            check_deadline(detalles)
             try:
                 f_x0 = f(x0)
                 f_x1 = f(x1)
@@ -331,6 +403,8 @@ def secant_method(f, function_str, x0, x1, tolerancia, max_iteraciones):
             "suggestion": "Intenta aumentar max_iterations, cambiar los valores iniciales, o reducir la tolerancia"
         }
         
+    except SolverError:
+        raise
     except Exception as e:
         return {
             "function": function_str,
@@ -338,6 +412,82 @@ def secant_method(f, function_str, x0, x1, tolerancia, max_iteraciones):
             "converged": False
         }
 
+def resolver_secante(f, function_str, x0, x1, tolerancia, max_iteraciones):
+    """Revisa f(x0) y f(x1) y ejecuta el método. Devuelve (cuerpo, estado HTTP)."""
+    try:
+        f_x0 = f(x0)
+        f_x1 = f(x1)
+        
+        for val, name in [(f_x0, f'f({x0})'), (f_x1, f'f({x1})')]:
+            if val is None:
+                return {
+                    "error": "Función no evaluable",
+                    "message": f"La función retorna None en {name}",
+                    "suggestion": "Verifica que la función esté bien definida en los puntos iniciales"
+                }, 400
+            
+            try:
+                val_float = float(val)
+                if math.isnan(val_float) or math.isinf(val_float):
+                    return {
+                        "error": "Función no evaluable",
+                        "message": f"La función produce valores no válidos en {name}: {val}",
+                        "suggestion": "Verifica que la función no tenga divisiones por cero u operaciones inválidas"
+                    }, 400
+            except (TypeError, ValueError):
+                return {
+                    "error": "Función no evaluable",
+                    "message": f"La función no produce valores numéricos en {name}: {val}",
+                    "suggestion": "Verifica que la función retorne valores numéricos"
+                }, 400
+        
+        if abs(f_x1 - f_x0) < 1e-15:
+            return {
+                "error": "Condición inicial problemática",
+                "message": f"Los valores f(x0)={f_x0} y f(x1)={f_x1} son prácticamente iguales, lo que causaría división por cero",
+                "suggestion": "Elige valores iniciales x0 y x1 donde f(x0) y f(x1) sean significativamente diferentes"
+            }, 400
+            
+    except SolverError:
+        raise
+    except Exception as e:
+        return {
+            "error": "Error al evaluar la función",
+            "message": f"La función no puede ser evaluada en los puntos iniciales: {str(e)}",
+            "suggestion": "Verifica que la función esté bien definida y no tenga operaciones inválidas"
+        }, 400
+    
+    result = secant_method(f, function_str, x0, x1, tolerancia, max_iteraciones)
+    if "error" in result and "root" not in result:
+        return {
+            "error": "Error en el cálculo del método de la secante",
+            "message": result["error"],
+            "suggestion": "Intenta con valores iniciales diferentes o verifica que la función tenga raíces en la región de búsqueda"
+        }, 500
+    return result, 200
+
+# Calentamiento al arrancar: compila y evalúa funciones habituales antes de declararse listo.
+# WARMUP_EXPRESSIONS reemplaza la lista (separadas por ';'); WARMUP=0 lo desactiva.
+WARMUP_EXPRESSIONS = [e.strip() for e in os.environ.get('WARMUP_EXPRESSIONS', 'x**2 - 2;x**3 - 2*x - 5;cos(x) - x;exp(x) - 3*x;sin(x)').split(';') if e.strip()]
+
+def warm_expression(expression):
+    f = parse_function(expression)
+    for value in WARMUP_POINTS:
+        f(value)
+
+warmup = Warmup([({"expression": expression}, partial(warm_expression, expression))
+                 for expression in WARMUP_EXPRESSIONS], sympy=True, pool=solver_pool)
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    if not warmup.done.is_set():
+        return jsonify({"status": "warming_up", "method": "secant"}), 503
+    return jsonify({"status": "ready", "method": "secant", "warmup": warmup.as_dict()})
+
+# Con el recargador de Werkzeug solo se calienta el proceso que atiende las peticiones
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    warmup.start()
+
 if __name__ == '__main__':
     try:
         app.run(host='0.0.0.0', port=5004, debug=True)
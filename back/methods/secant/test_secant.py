@@ -0,0 +1,43 @@
+import os
+import threading
+
+import pytest
+
+def test_secant_converges_to_root(client):
+    response = client.post('/solve', json={'function': 'x**3 - 2*x - 5', 'x0': 1, 'x1': 3})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['converged']
+    assert body['root'] == pytest.approx(2.0945514815423265, abs=1e-7)
+
+def test_secant_rejects_starts_with_equal_values(client):
+    response = client.post('/solve', json={'function': 'x**2 - 4', 'x0': -1, 'x1': 1})
+    assert response.status_code == 400
+    assert 'prácticamente iguales' in response.get_json()['message']
+
+def test_responses_have_no_diagnostics_by_default(client):
+    response = client.post('/solve', json={'function': 'x**2 - 3', 'x0': 1, 'x1': 2})
+    assert response.status_code == 200
+    assert 'diagnostics' not in response.get_json()
+
+def test_diagnostics_count_evaluations_and_time_phases(client):
+    response = client.post('/solve', json={'function': 'x**2 - 3', 'x0': 1, 'x1': 2, 'diagnostics': True})
+    assert response.status_code == 200
+    body = response.get_json()
+    diagnostics = body['diagnostics']
+    # Dos evaluaciones para revisar x0 y x1 y una por iteración
+    assert diagnostics['function_evaluations']['f'] >= body['iterations']
+    assert {'validate', 'compute', 'serialize'} <= set(diagnostics['phases'])
+    assert all(phase['wall_ms'] >= 0 for phase in diagnostics['phases'].values())
+
+def test_solves_run_in_worker_processes(service):
+    with service.app.test_request_context('/solve', method='POST'):
+        assert service.solver_pool.run(os.getpid) != os.getpid()
+    # Fuera de una petición (calentamiento) se calcula en el proceso actual
+    assert service.solver_pool.run(os.getpid) == os.getpid()
+
+def test_busy_pool_answers_503(monkeypatch, service, client):
+    monkeypatch.setattr(service.solver_pool, 'slots', threading.BoundedSemaphore(1))
+    service.solver_pool.slots.acquire()
+    response = client.post('/solve', json={'function': 'x**2 - 7', 'x0': 1, 'x1': 2})
+    assert response.status_code == 503
@@ -1,13 +1,30 @@
 from flask import Flask, jsonify, request
 import math
 import numpy as np
-from sympy import symbols, sympify, lambdify
 from flask_cors import CORS
+from functools import partial
 import traceback
+import os
 import sys
 
+# El paquete común (back/common) está dos niveles arriba, también dentro de la imagen
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common import init_service
+from common.deadlines import SolverError, check_deadline
+from common.cumulative import install_cumulative
+from common.diagnostics import track_phase
+from common.expressions import build_function, compile_expression, evaluate_vectorized
+from common.metrics import json_response
+from common.pool import SolverPool
+from common.result_cache import cached_result
+from common.warmup import WARMUP_POINTS, Warmup
+
 app = Flask(__name__)
 CORS(app)
+metrics = init_service(app, 'simpson')
+# Procesos de cálculo: compilan y evalúan las funciones del usuario, así el plazo las puede cortar
+solver_pool = SolverPool(app)
 
 @app.route('/solve', methods=['POST'])
 def simpson_solve():
@@ -101,9 +118,16 @@ def simpson_solve():
             }), 400
         
         try:
+            # Con los datos ya validados, un cálculo idéntico se responde desde la caché sin
+            # interpretar la función
+            cached = cached_result(function=f_function_str, a=a, b=b, n=n)
+            if cached is not None:
+                return cached
+
             f = parse_function(f_function_str)
-            
-            result = regla_simpson(f, f_function_str, a, b, n)
+
+            with track_phase('compute'):
+                result = solver_pool.run(regla_simpson, f, f_function_str, a, b, n)
             
             if "error" in result:
                 return jsonify({
@@ -112,7 +136,7 @@ def simpson_solve():
                     "function": f_function_str
                 }), 400
             
-            return jsonify(result)
+            return json_response(result)
         
         except ValueError as ve:
             return jsonify({
@@ -135,6 +159,8 @@ def simpson_solve():
                 "suggestion": "Intenta con un intervalo más pequeño o menos subintervalos"
             }), 400
         
+        except SolverError:
+            raise
         except Exception as e:
             error_type = type(e).__name__
             print(f"Error inesperado: {error_type}: {str(e)}")
@@ -146,6 +172,8 @@ def simpson_solve():
                 "function": f_function_str
             }), 500
     
+    except SolverError:
+        raise
     except Exception as e:
         print(f"Error general del servidor: {str(e)}")
         traceback.print_exc()
@@ -170,30 +198,32 @@ def health_check():
             "message": f"Error en el servicio: {str(e)}"
         }), 500
 
+def only_x(expr, names):
+    if not expr.free_symbols:
+        raise ValueError("La función debe contener la variable 'x'")
+
+    if len(expr.free_symbols) > 1 or (expr.free_symbols and 'x' not in str(expr.free_symbols)):
+        invalid_vars = [str(var) for var in expr.free_symbols if str(var) != 'x']
+        raise ValueError(f"La función solo puede contener la variable 'x'. Variables no válidas encontradas: {', '.join(invalid_vars)}")
+
+def compile_function(function_str):
+    # Receta de la RemoteFunction: lo que pasa por SymPy se compila en un proceso de cálculo
+    func = build_function(function_str, check=only_x)
+    try:
+        test_result = func(1.0)
+        if not isinstance(test_result, (int, float, np.number)):
+            raise ValueError("La función debe retornar valores numéricos")
+    except Exception as test_error:
+        raise ValueError(f"Error al evaluar la función: {str(test_error)}")
+    return func
+
 def parse_function(function_str):
-    x = symbols('x')
     try:
         function_str = function_str.strip()
-        expr = sympify(function_str)
-        
-        if not expr.free_symbols:
-            raise ValueError("La función debe contener la variable 'x'")
-        
-        if len(expr.free_symbols) > 1 or (expr.free_symbols and 'x' not in str(expr.free_symbols)):
-            invalid_vars = [str(var) for var in expr.free_symbols if str(var) != 'x']
-            raise ValueError(f"La función solo puede contener la variable 'x'. Variables no válidas encontradas: {', '.join(invalid_vars)}")
-        
-        func = lambdify(x, expr, modules=['numpy', 'math'])
-        
-        try:
-            test_result = func(1.0)
-            if not isinstance(test_result, (int, float, np.number)):
-                raise ValueError("La función debe retornar valores numéricos")
-        except Exception as test_error:
-            raise ValueError(f"Error al evaluar la función: {str(test_error)}")
-        
-        return func
-        
+        return solver_pool.function('f', compile_function, function_str,
+                                    local=compile_expression(function_str) is not None)
+    except SolverError:
+        raise
     except Exception as e:
         if "ValueError" in str(type(e)):
             raise e
@@ -212,7 +242,14 @@ def regla_simpson(f, f_function_str, a, b, n):
         table_data = []
         suma_total = 0
         
+        # Todos los nodos de una vez con el núcleo de NumPy; si alguno no es finito se
+        # evalúa punto a punto para informar el error como siempre
+        values = evaluate_vectorized(f, a + h * np.arange(n + 1))
+        values = values.tolist() if np.isfinite(values).all() else None
+        
         for i in range(n + 1):
+            if i % 1024 == 0:
+                check_deadline(table_data)
             x_i = a + i * h
             
             if i == 0 or i == n:
@@ -223,7 +260,7 @@ def regla_simpson(f, f_function_str, a, b, n):
                 coefficient = 2
             
             try:
-                fx_i = f(x_i)
+                fx_i = f(x_i) if values is None else values[i]
                 
                 if math.isnan(fx_i) or math.isinf(fx_i):
                     return {
@@ -269,6 +306,8 @@ def regla_simpson(f, f_function_str, a, b, n):
             "formula_explanation": f"I ≈ (h/3) × [suma total] = ({round(h, 6)}/3) × {round(suma_total, 6)} = {round(integral, 8)}"
         }
     
+    except SolverError:
+        raise
     except Exception as e:
         return {
             "error": f"Error durante el cálculo de la regla de Simpson: {str(e)}"
@@ -279,17 +318,13 @@ def generate_graph_data(f, a, b, num_points=200):
         step = (b - a) / num_points
         graph_data = []
         
-        for i in range(num_points + 1):
-            x = a + i * step
-            try:
-                y = f(x)
-                if math.isfinite(y):
-                    graph_data.append({
-                        "x": round(x, 6),
-                        "function": round(y, 6)
-                    })
-            except:
-                continue
+        x_values = a + step * np.arange(num_points + 1)
+        for x, y in zip(x_values.tolist(), evaluate_vectorized(f, x_values).tolist()):
+            if math.isfinite(y):
+                graph_data.append({
+                    "x": round(x, 6),
+                    "function": round(y, 6)
+                })
         
         return graph_data
     
@@ -297,5 +332,30 @@ def generate_graph_data(f, a, b, num_points=200):
         print(f"Error generando datos del gráfico: {str(e)}")
         return []
 
+# Integral acumulada en toda la malla (POST /cumulative)
+install_cumulative(app, solver_pool, parse_function, ('trapezoid', 'simpson'), 'simpson')
+
+# Calentamiento al arrancar: compila y evalúa funciones habituales antes de declararse listo.
+# WARMUP_EXPRESSIONS reemplaza la lista (separadas por ';'); WARMUP=0 lo desactiva.
+WARMUP_EXPRESSIONS = [e.strip() for e in os.environ.get('WARMUP_EXPRESSIONS', 'x**2;sin(x);exp(x);x**3 + 2*x;sqrt(x);log(x)').split(';') if e.strip()]
+
+def warm_expression(expression):
+    f = parse_function(expression)
+    for value in WARMUP_POINTS:
+        f(value)
+
+warmup = Warmup([({"expression": expression}, partial(warm_expression, expression))
+                 for expression in WARMUP_EXPRESSIONS], sympy=True, pool=solver_pool)
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    if not warmup.done.is_set():
+        return jsonify({"status": "warming_up", "method": "simpson-rule"}), 503
+    return jsonify({"status": "ready", "method": "simpson-rule", "warmup": warmup.as_dict()})
+
+# Con el recargador de Werkzeug solo se calienta el proceso que atiende las peticiones
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    warmup.start()
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5008, debug=True)
@@ -0,0 +1,46 @@
+import math
+
+import numpy as np
+import pytest
+
+from common.expressions import compile_expression
+from common.warmup import Warmup
+
+def test_integral_matches_closed_form(client):
+    response = client.post('/solve', json={'function': 'exp(-x**2)', 'a': 0, 'b': 1, 'n': 10})
+    assert response.status_code == 200
+    assert response.get_json()['integral'] == pytest.approx(math.sqrt(math.pi) / 2 * math.erf(1), abs=1e-5)
+
+def test_cumulative_integral_matches_antiderivative(client):
+    response = client.post('/cumulative', json={'function': 'x**2', 'a': 0, 'b': 3, 'n': 30})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['cumulative'] == pytest.approx([node ** 3 / 3 for node in body['nodes']], abs=1e-6)
+    assert body['integral'] == pytest.approx(9.0, abs=1e-9)
+
+def test_scalar_kernel_matches_array_kernel():
+    f = compile_expression('log(x) + sqrt(x)*exp(-x)')
+    xs = np.linspace(0.5, 4.0, 9)
+    assert isinstance(f(2.0), float)
+    assert [f(float(x)) for x in xs] == pytest.approx(f.vector(xs).tolist(), rel=1e-15)
+    # Fuera del dominio de math se repite con NumPy: nan, como antes
+    with np.errstate(invalid='ignore'):
+        assert math.isnan(f(-1.0))
+
+def test_arithmetic_expression_shares_one_kernel():
+    f = compile_expression('x**2 + 3*x + 1')
+    assert f.vector is f
+
+def test_ready_reports_warmup(client):
+    response = client.get('/ready')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'ready'
+
+def test_warmup_records_failed_tasks():
+    def fails():
+        raise ValueError('sin dominio')
+    warmup = Warmup([({"expression": "x"}, lambda: None), ({"expression": "log(-x)"}, fails)])
+    warmup.run()
+    assert warmup.done.is_set()
+    assert warmup.warmed == 1
+    assert warmup.failed == [{"expression": "log(-x)", "error": "sin dominio"}]
@@ -1,12 +1,30 @@
 from flask import Flask, jsonify, request
 import math
 import numpy as np
-from sympy import symbols, sympify, lambdify
 from flask_cors import CORS
+from functools import partial
 import traceback
+import os
+import sys
+
+# El paquete común (back/common) está dos niveles arriba, también dentro de la imagen
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from common import init_service
+from common.deadlines import SolverError, check_deadline
+from common.cumulative import install_cumulative
+from common.diagnostics import track_phase
+from common.expressions import build_function, compile_expression, evaluate_vectorized
+from common.metrics import json_response
+from common.pool import SolverPool
+from common.result_cache import cached_result
+from common.warmup import WARMUP_POINTS, Warmup
 
 app = Flask(__name__)
 CORS(app)
+metrics = init_service(app, 'trapezoid')
+# Procesos de cálculo: compilan y evalúan las funciones del usuario, así el plazo las puede cortar
+solver_pool = SolverPool(app)
 
 @app.route('/solve', methods=['POST'])
 def simpson_solve():
@@ -68,8 +86,16 @@ def simpson_solve():
             }), 400
 
         try:
+            # Con los datos ya validados, un cálculo idéntico se responde desde la caché sin
+            # interpretar la función
+            cached = cached_result(function=f_function_str, a=a, b=b, n=n)
+            if cached is not None:
+                return cached
+
             f = parse_function(f_function_str)
-            result = regla_simpson(f, f_function_str, a, b, n)
+
+            with track_phase('compute'):
+                result = solver_pool.run(regla_simpson, f, f_function_str, a, b, n)
 
             if "error" in result:
                 return jsonify({
@@ -77,14 +103,18 @@ def simpson_solve():
                     "message": result["error"]
                 }), 400
 
-            return jsonify(result)
+            return json_response(result)
 
+        except SolverError:
+            raise
         except Exception as e:
             return jsonify({
                 "error": "Error en el procesamiento de la función",
                 "message": str(e)
             }), 400
 
+    except SolverError:
+        raise
     except Exception as e:
         traceback.print_exc()
         return jsonify({
@@ -100,10 +130,12 @@ def health_check():
     })
 
 def parse_function(function_str):
-    x = symbols('x')
     try:
-        expr = sympify(function_str)
-        return lambdify(x, expr, modules=['numpy', 'math'])
+        # Lo que pasa por SymPy se compila en un proceso de cálculo
+        return solver_pool.function('f', build_function, function_str,
+                                    local=compile_expression(function_str) is not None)
+    except SolverError:
+        raise
     except Exception as e:
         raise ValueError(f"No se pudo interpretar la función: {str(e)}")
 
@@ -114,7 +146,14 @@ def regla_simpson(f, f_function_str, a, b, n):
         tabla = []
         suma = 0
 
+        # Todos los nodos de una vez con el núcleo de NumPy; si alguno no es finito se
+        # evalúa punto a punto para informar el error como siempre
+        values = evaluate_vectorized(f, a + h * np.arange(n + 1))
+        values = values.tolist() if np.isfinite(values).all() else None
+
         for i in range(n + 1):
+            if i % 1024 == 0:
+                check_deadline(tabla)
             x_i = a + i * h
 
             if i == 0 or i == n:
@@ -125,7 +164,7 @@ def regla_simpson(f, f_function_str, a, b, n):
                 coef = 4
 
             try:
-                fx = f(x_i)
+                fx = f(x_i) if values is None else values[i]
                 if not isinstance(fx, (int, float, np.number)):
                     return {"error": f"f({x_i}) devolvió un valor no numérico"}
 
@@ -163,6 +202,8 @@ def regla_simpson(f, f_function_str, a, b, n):
             "graph_data": generate_graph_data(f, a, b)
         }
 
+    except SolverError:
+        raise
     except Exception as e:
         return {"error": f"Error general durante el cálculo: {str(e)}"}
 
@@ -170,20 +211,41 @@ def generate_graph_data(f, a, b, points=200):
     try:
         step = (b - a) / points
         data = []
-        for i in range(points + 1):
-            x = a + i * step
-            try:
-                y = f(x)
-                if math.isfinite(y):
-                    data.append({
-                        "x": round(x, 6),
-                        "function": round(y, 6)
-                    })
-            except:
-                continue
+        x_values = a + step * np.arange(points + 1)
+        for x, y in zip(x_values.tolist(), evaluate_vectorized(f, x_values).tolist()):
+            if math.isfinite(y):
+                data.append({
+                    "x": round(x, 6),
+                    "function": round(y, 6)
+                })
         return data
     except Exception as e:
         return []
 
+# Integral acumulada en toda la malla (POST /cumulative)
+install_cumulative(app, solver_pool, parse_function, ('trapezoid', 'simpson'), 'trapezoid')
+
+# Calentamiento al arrancar: compila y evalúa funciones habituales antes de declararse listo.
+# WARMUP_EXPRESSIONS reemplaza la lista (separadas por ';'); WARMUP=0 lo desactiva.
+WARMUP_EXPRESSIONS = [e.strip() for e in os.environ.get('WARMUP_EXPRESSIONS', 'x**2;sin(x);exp(x);x**3 + 2*x;sqrt(x);log(x)').split(';') if e.strip()]
+
+def warm_expression(expression):
+    f = parse_function(expression)
+    for value in WARMUP_POINTS:
+        f(value)
+
+warmup = Warmup([({"expression": expression}, partial(warm_expression, expression))
+                 for expression in WARMUP_EXPRESSIONS], sympy=True, pool=solver_pool)
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    if not warmup.done.is_set():
+        return jsonify({"status": "warming_up", "method": "simpson-rule"}), 503
+    return jsonify({"status": "ready", "method": "simpson-rule", "warmup": warmup.as_dict()})
+
+# Con el recargador de Werkzeug solo se calienta el proceso que atiende las peticiones
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    warmup.start()
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5009, debug=True)
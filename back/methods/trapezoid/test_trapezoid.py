@@ -0,0 +1,36 @@
+import math
+
+import pytest
+from sympy import symbols, sympify
+
+from common.expressions import optimize_expression
+
+def test_integral_matches_closed_form(client):
+    response = client.post('/solve', json={'function': 'exp(-x**2)', 'a': 0, 'b': 1, 'n': 10})
+    assert response.status_code == 200
+    assert response.get_json()['integral'] == pytest.approx(math.sqrt(math.pi) / 2 * math.erf(1), abs=1e-5)
+
+def test_cumulative_trapezoid_matches_its_exact_error(client):
+    response = client.post('/cumulative', json={'function': 'x**2', 'a': 0, 'b': 3, 'n': 30})
+    assert response.status_code == 200
+    body = response.get_json()
+    # La regla del trapecio sobre x**2 tiene error exacto x·h²/6
+    h = body['step_size']
+    assert body['rule'] == 'trapezoid'
+    assert body['cumulative'] == pytest.approx([node ** 3 / 3 + node * h ** 2 / 6 for node in body['nodes']], abs=1e-9)
+
+def test_optimize_expression_rewrites_polynomials_in_horner_form():
+    x = symbols('x')
+    assert optimize_expression(sympify('x**3 + 2*x**2 + 3*x + 4'), (x,)) == sympify('x*(x*(x + 2) + 3) + 4')
+
+def test_optimize_expression_skips_high_degree_powers():
+    # (x + 1)**500 son dos operaciones, pero su forma de Horner tiene grado 500
+    x = symbols('x')
+    expr = sympify('(x + 1)**500')
+    assert optimize_expression(expr, (x,)) is expr
+
+def test_repeated_subexpressions_keep_the_same_values(client):
+    response = client.post('/solve', json={'function': 'sin(x)**2 + 2*sin(x) + 1', 'a': 0, 'b': 2, 'n': 40})
+    assert response.status_code == 200
+    exact = 2 + 2 * (1 - math.cos(2)) + (2 - math.sin(4) / 2) / 2
+    assert response.get_json()['integral'] == pytest.approx(exact, abs=1e-5)